@@ -0,0 +1,136 @@
+"""Compares the NumPy batch rules of `batch_board` with the same work done one
+board or one game at a time by the scalar rules.
+
+Boards evaluated per second, by `evaluate` and by `Bitboard.status` on each
+board, and random games played per second, by `simulate` and by MatchService
+one movement at a time:
+
+    python -m benchmarks.batch_board --games 100000 --variants 3x3/3 15x15/5
+
+The scalar figures are measured on at most --scalar-games games, they do not
+depend on how many there are.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+import numpy as np
+
+from src.domain.models.match import Match
+from src.domain.models.movement import Movement
+from src.domain.models.status import Status
+from src.domain.services.batch_board import EMPTY, O, X, evaluate, simulate
+from src.domain.services.bitboard import Bitboard
+from src.domain.services.match_service import MatchService
+
+NAMES = {EMPTY: None, X: "X", O: "O"}
+
+
+def play_scalar(service: MatchService, size: int, win_length: int, rng) -> Match:
+    match = Match(
+        id=uuid4(),
+        board=[[None] * size for _ in range(size)],
+        turn="X",
+        status=Status.PLAYING,
+        board_size=size,
+        win_length=win_length,
+    )
+    squares = list(range(size * size))
+    rng.shuffle(squares)
+    for square in squares:
+        if match.status != Status.PLAYING:
+            break
+
+        x, y = divmod(square, size)
+        service._apply_movement(
+            Movement(matchId=match.id, playerId=match.turn, square={"x": x, "y": y}),
+            match,
+        )
+
+    return match
+
+
+def measure(size: int, win_length: int, games: int, scalar_games: int) -> dict:
+    started = time.perf_counter()
+    simulation = simulate(games, size, win_length, rng=np.random.default_rng(0))
+    batch_games = games / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    evaluate(simulation.boards, win_length)
+    batch_boards = games / (time.perf_counter() - started)
+
+    boards = [
+        [[NAMES[square] for square in row] for row in board]
+        for board in simulation.boards[:scalar_games].tolist()
+    ]
+    # Builds the cached tables of the variant out of the timings
+    Bitboard.from_board(boards[0], win_length).status()
+    started = time.perf_counter()
+    for board in boards:
+        Bitboard.from_board(board, win_length).status()
+    scalar_boards = len(boards) / (time.perf_counter() - started)
+
+    service = MatchService(MagicMock(), MagicMock())
+    rng = random.Random(0)
+    started = time.perf_counter()
+    for _ in range(scalar_games):
+        play_scalar(service, size, win_length, rng)
+    scalar_games_per_second = scalar_games / (time.perf_counter() - started)
+
+    return {
+        "variant": f"{size}x{size}/{win_length}",
+        "games": games,
+        "boards_per_second": round(batch_boards),
+        "scalar_boards_per_second": round(scalar_boards),
+        "evaluate_speedup": round(batch_boards / scalar_boards, 1),
+        "games_per_second": round(batch_games),
+        "scalar_games_per_second": round(scalar_games_per_second),
+        "simulate_speedup": round(batch_games / scalar_games_per_second, 1),
+    }
+
+
+def print_table(rows: list[dict]) -> None:
+    print("".join(f"{name:>26}" for name in rows[0]))
+    for row in rows:
+        print("".join(f"{value:>26}" for value in row.values()))
+
+
+def main(arguments: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.batch_board")
+    parser.add_argument("--games", type=int, default=100_000)
+    parser.add_argument("--scalar-games", type=int, default=2_000)
+    parser.add_argument(
+        "--variants",
+        nargs="+",
+        default=["3x3/3", "4x4/4", "15x15/5"],
+        help="board size and win length, as SIZExSIZE/WIN_LENGTH",
+    )
+    parser.add_argument("--json", action="store_true", help="print the rows as JSON")
+    args = parser.parse_args(arguments)
+
+    rows = []
+    for variant in args.variants:
+        board, win_length = variant.split("/")
+        size = int(board.split("x")[0])
+        rows.append(
+            measure(
+                size, int(win_length), args.games, min(args.scalar_games, args.games)
+            )
+        )
+
+    if args.json:
+        json.dump(rows, sys.stdout, indent=2)
+        print()
+    else:
+        print_table(rows)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
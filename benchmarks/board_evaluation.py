@@ -0,0 +1,134 @@
+"""Compares the former row/col/diagonal scans with the bitboard evaluation of the
+whole board and with the incremental check through the last placed square.
+
+Run it with `python -m benchmarks.board_evaluation`.
+"""
+
+import timeit
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+from src.domain.models.match import Match
+from src.domain.models.status import Status
+from src.domain.services.bitboard import Bitboard
+from src.domain.services.match_service import MatchService
+
+BOARD_SIZE = 3
+
+# Boards with the square of their last movement
+BOARDS: dict[str, tuple[list[list[str | None]], tuple[int, int]]] = {
+    "opening": ([[None, None, None], [None, "X", None], [None, None, None]], (1, 1)),
+    "playing": ([["X", "O", None], [None, "X", None], ["O", None, None]], (2, 0)),
+    "row_winner": ([[None, None, None], ["X", "X", "X"], ["O", "O", None]], (1, 2)),
+    "last_diagonal_winner": (
+        [["O", "O", "X"], [None, "X", None], ["X", None, None]],
+        (2, 0),
+    ),
+    "draw": ([["X", "O", "X"], ["X", "O", "O"], ["O", "X", "X"]], (2, 2)),
+}
+
+
+# Rules as implemented by MatchService before the bitboard representation
+def _check_same_row(board: list[list[str | None]]) -> bool:
+    for row in board:
+        value = row[0]
+        if value is not None and all(square == value for square in row):
+            return True
+
+    return False
+
+
+def _check_same_col(board: list[list[str | None]]) -> bool:
+    for i in range(0, BOARD_SIZE):
+        value = board[0][i]
+        if value is not None and all(row[i] == value for row in board):
+            return True
+
+    return False
+
+
+def _check_first_diagonal(board: list[list[str | None]]) -> bool:
+    value = board[0][0]
+    if value is not None and all(board[i][i] == value for i in range(BOARD_SIZE)):
+        return True
+
+    return False
+
+
+def _check_last_diagonal(board: list[list[str | None]]) -> bool:
+    j = BOARD_SIZE - 1
+    value = board[0][j]
+    if value is None:
+        return False
+
+    for row in board:
+        if row[j] != value:
+            return False
+        j -= 1
+
+    return True
+
+
+def _check_draw(board: list[list[str | None]]) -> bool:
+    return all(
+        board[x][y] is not None for x in range(BOARD_SIZE) for y in range(BOARD_SIZE)
+    )
+
+
+def scan_check_movement(board: list[list[str | None]]) -> Status:
+    if (
+        _check_same_row(board)
+        or _check_same_col(board)
+        or _check_first_diagonal(board)
+        or _check_last_diagonal(board)
+    ):
+        return Status.WINNER
+
+    if _check_draw(board):
+        return Status.DRAW
+
+    return Status.PLAYING
+
+
+def bitboard_check_movement(board: list[list[str | None]]) -> Status:
+    return Bitboard.from_board(board).status()
+
+
+def _time_per_call(function, board, number: int) -> float:
+    return min(timeit.repeat(lambda: function(board), number=number, repeat=5)) / number
+
+
+def main(number: int = 100_000) -> None:
+    service = MatchService(MagicMock(), MagicMock())
+
+    print(
+        f"{'board':<22}{'scans (ns)':>12}{'bitboard (ns)':>15}"
+        + f"{'only masks (ns)':>17}{'last move (ns)':>16}"
+    )
+    for name, (board, (x, y)) in BOARDS.items():
+        match = Match(
+            id=uuid4(),
+            board=board,
+            turn="X",
+            status=Status.PLAYING,
+            move_count=sum(square is not None for row in board for square in row),
+        )
+        status = scan_check_movement(board)
+        assert bitboard_check_movement(board) == status
+        assert service._check_movement(match, x, y) == status
+
+        bitboard = Bitboard.from_board(board)
+        scans = _time_per_call(scan_check_movement, board, number)
+        converted = _time_per_call(bitboard_check_movement, board, number)
+        masks = _time_per_call(Bitboard.status, bitboard, number)
+        last_move = _time_per_call(
+            lambda match: service._check_movement(match, x, y), match, number
+        )
+        print(
+            f"{name:<22}{scans * 1e9:>12.0f}{converted * 1e9:>15.0f}"
+            + f"{masks * 1e9:>17.0f}{last_move * 1e9:>16.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
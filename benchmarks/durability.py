@@ -0,0 +1,199 @@
+"""Cost of keeping the in-memory matches on disk (MEMORY_DATA_DIR).
+
+Moves per second and latency of threads playing moves, for each fsync window
+given, against the log in a temporary directory (pick one on the disk to
+measure with --directory):
+
+    python -m benchmarks.durability writes --threads 8 --windows 0 1 2 5
+
+Time to recover a snapshot of --matches matches and --records more moves
+left in the log:
+
+    python -m benchmarks.durability recovery --matches 100000 --records 100000
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+from benchmarks.load import PERCENTILES, percentile
+from src.domain.models.match import Match
+from src.domain.models.status import Status
+from src.infra.repositories.match_log import SYNC_ASYNC, SYNC_GROUP, DurabilitySettings
+from src.infra.repositories.sharded_memory_repository import (
+    MemorySettings,
+    ShardedInMemoryRepository,
+)
+
+
+def new_match() -> Match:
+    return Match(
+        id=uuid4(),
+        board=[[None] * 3 for _ in range(3)],
+        turn="X",
+        status=Status.PLAYING,
+    )
+
+
+def play(match: Match) -> None:
+    # Any change is logged whole, the board does not need to be valid
+    match.move_count += 1
+    match.turn = "O" if match.turn == "X" else "X"
+
+
+def open_repository(
+    directory: Path, durability: DurabilitySettings
+) -> ShardedInMemoryRepository:
+    return ShardedInMemoryRepository.open(
+        MagicMock(),
+        MemorySettings(capacity=10_000_000),
+        DurabilitySettings(
+            directory=str(directory),
+            sync=durability.sync,
+            group_commit_ms=durability.group_commit_ms,
+        ),
+    )
+
+
+def measure_writes(
+    directory: Path, sync: str, window_ms: float, threads: int, duration: float
+) -> dict:
+    repository = open_repository(
+        directory, DurabilitySettings(sync=sync, group_commit_ms=window_ms)
+    )
+    latencies: list[list[float]] = [[] for _ in range(threads)]
+    try:
+        # A match per thread, the threads only contend on the log
+        matches = repository.save_matches([new_match() for _ in range(threads)])
+        deadline = time.perf_counter() + duration
+
+        def writer(match_id, thread_latencies: list[float]) -> None:
+            while (started := time.perf_counter()) < deadline:
+                repository.apply_move(match_id, play)
+                thread_latencies.append(time.perf_counter() - started)
+
+        workers = [
+            threading.Thread(target=writer, args=(match.id, thread_latencies))
+            for match, thread_latencies in zip(matches, latencies)
+        ]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+        assert repository.log is not None
+        syncs = repository.log.syncs
+    finally:
+        repository.close()
+
+    moves = [latency for thread_latencies in latencies for latency in thread_latencies]
+    return {
+        "sync": sync,
+        "window_ms": window_ms,
+        "moves_per_second": round(len(moves) / elapsed, 1),
+        "moves_per_fsync": round(len(moves) / max(syncs, 1), 1),
+        **{
+            f"p{percent}_ms": round(percentile(moves, percent) * 1000, 3)
+            for percent in PERCENTILES
+        },
+    }
+
+
+def measure_recovery(directory: Path, matches: int, records: int) -> dict:
+    durability = DurabilitySettings(sync=SYNC_ASYNC)
+    repository = open_repository(directory, durability)
+    try:
+        stored = repository.save_matches([new_match() for _ in range(matches)])
+        repository.snapshot()
+        rng = random.Random(0)
+        for _ in range(records):
+            repository.apply_move(rng.choice(stored).id, play)
+    finally:
+        # Closed without the snapshot `close` would take
+        assert repository.log is not None
+        repository.log.close()
+
+    started = time.perf_counter()
+    repository = open_repository(directory, durability)
+    elapsed = time.perf_counter() - started
+    recovered = repository.count()
+    repository.close()
+
+    return {
+        "matches": recovered,
+        "log_records": records,
+        "recovery_seconds": round(elapsed, 3),
+        "size_bytes": sum(path.stat().st_size for path in directory.iterdir()),
+    }
+
+
+def print_table(rows: list[dict]) -> None:
+    print("".join(f"{name:>18}" for name in rows[0]))
+    for row in rows:
+        print("".join(f"{value:>18}" for value in row.values()))
+
+
+def main(arguments: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.durability")
+    parser.add_argument("--directory", help="parent of the data directories")
+    parser.add_argument("--json", action="store_true", help="print the rows as JSON")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    writes = commands.add_parser("writes", help="moves per fsync window")
+    writes.add_argument("--threads", type=int, default=8)
+    writes.add_argument("--duration", type=float, default=2.0, help="seconds")
+    writes.add_argument(
+        "--windows",
+        type=float,
+        nargs="+",
+        default=[0.0, 1.0, 2.0, 5.0],
+        help="MEMORY_WAL_GROUP_COMMIT_MS values",
+    )
+    writes.add_argument(
+        "--async", dest="include_async", action="store_true", help="also without waits"
+    )
+
+    recovery = commands.add_parser("recovery", help="time to recover")
+    recovery.add_argument("--matches", type=int, default=100_000)
+    recovery.add_argument("--records", type=int, default=100_000)
+
+    args = parser.parse_args(arguments)
+    rows = []
+    with tempfile.TemporaryDirectory(dir=args.directory) as parent:
+        if args.command == "writes":
+            runs = [(SYNC_GROUP, window) for window in args.windows]
+            if args.include_async:
+                runs.append((SYNC_ASYNC, DurabilitySettings.group_commit_ms))
+            for index, (sync, window) in enumerate(runs):
+                rows.append(
+                    measure_writes(
+                        Path(parent) / str(index),
+                        sync,
+                        window,
+                        args.threads,
+                        args.duration,
+                    )
+                )
+        else:
+            rows.append(measure_recovery(Path(parent), args.matches, args.records))
+
+    if args.json:
+        json.dump(rows, sys.stdout, indent=2)
+        print()
+    else:
+        print_table(rows)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
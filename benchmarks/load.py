@@ -0,0 +1,270 @@
+"""Load generator simulating concurrent players through the whole stack.
+
+Each player creates a match, then plays both sides with random moves until the
+match ends, polling /status after some of the moves, and starts over until
+the run is over. The report gives the throughput and the latency percentiles
+of each endpoint.
+
+In process, through ASGI (the app and the players share the event loop):
+
+    python -m benchmarks.load --players 50 --duration 30 --repository memory
+
+Against a running server, e.g. `uvicorn main:app --workers 4`:
+
+    python -m benchmarks.load --url http://localhost:8000 --players 200
+
+`--repository` sets MATCH_REPOSITORY for the in-process app, with
+`postgresql` it uses the DATABASE_URL database, which must be migrated.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+
+import httpx
+
+ENDPOINTS = ("/create", "/move", "/status")
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass
+class LoadSettings:
+    players: int = 10
+    duration: float = 10.0
+    # Mean pause of a player between two requests, in seconds
+    think_time: float = 0.0
+    # Probability of polling /status after a move
+    poll_ratio: float = 0.5
+    board_size: int = 3
+    seed: int | None = None
+
+
+@dataclass
+class EndpointStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+
+    def record(self, started: float, response: httpx.Response) -> None:
+        self.latencies.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors += 1
+
+
+def percentile(latencies: list[float], percent: float) -> float:
+    """Nearest-rank percentile of the given latencies."""
+    if not latencies:
+        return 0.0
+
+    ordered = sorted(latencies)
+    rank = max(1, round(percent / 100 * len(ordered)))
+
+    return ordered[rank - 1]
+
+
+class Player:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        settings: LoadSettings,
+        stats: dict[str, EndpointStats],
+        rng: random.Random,
+    ):
+        self.client = client
+        self.settings = settings
+        self.stats = stats
+        self.rng = rng
+        self.games = 0
+
+    async def _think(self) -> None:
+        if self.settings.think_time > 0:
+            await asyncio.sleep(self.rng.expovariate(1 / self.settings.think_time))
+
+    async def _request(self, endpoint: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        self.stats[endpoint].record(started, response)
+
+        return response
+
+    async def play(self, deadline: float) -> None:
+        size = self.settings.board_size
+        while time.perf_counter() < deadline:
+            response = await self._request(
+                "/create", "GET", "/create", params={"boardSize": size}
+            )
+            if response.status_code != 200:
+                continue
+
+            match_id = response.json()["matchId"]
+            squares = [(x, y) for x in range(size) for y in range(size)]
+            self.rng.shuffle(squares)
+            player = "X"
+            for x, y in squares:
+                if time.perf_counter() >= deadline:
+                    return
+
+                await self._think()
+                response = await self._request(
+                    "/move",
+                    "POST",
+                    "/move",
+                    json={
+                        "matchId": match_id,
+                        "playerId": player,
+                        "square": {"x": x, "y": y},
+                    },
+                )
+                if response.status_code != 200:
+                    break
+
+                if self.rng.random() < self.settings.poll_ratio:
+                    await self._think()
+                    await self._request("/status", "GET", f"/status/{match_id}")
+
+                message = response.json()["message"]
+                if not message.startswith("Movement performed"):
+                    break
+
+                player = "O" if player == "X" else "X"
+
+            self.games += 1
+
+
+async def run(
+    client: httpx.AsyncClient, settings: LoadSettings
+) -> tuple[dict[str, EndpointStats], int, float]:
+    """Returns the stats of each endpoint, the games played and the elapsed
+    seconds."""
+    stats = {endpoint: EndpointStats() for endpoint in ENDPOINTS}
+    rng = random.Random(settings.seed)
+    players = [
+        Player(client, settings, stats, random.Random(rng.random()))
+        for _ in range(settings.players)
+    ]
+
+    started = time.perf_counter()
+    deadline = started + settings.duration
+    await asyncio.gather(*(player.play(deadline) for player in players))
+    elapsed = time.perf_counter() - started
+
+    return stats, sum(player.games for player in players), elapsed
+
+
+def report(stats: dict[str, EndpointStats], games: int, elapsed: float) -> dict:
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "games": games,
+        "endpoints": {
+            endpoint: {
+                "requests": len(endpoint_stats.latencies),
+                "errors": endpoint_stats.errors,
+                "requests_per_second": round(
+                    len(endpoint_stats.latencies) / elapsed, 1
+                ),
+                **{
+                    f"p{percent}_ms": round(
+                        percentile(endpoint_stats.latencies, percent) * 1000, 2
+                    )
+                    for percent in PERCENTILES
+                },
+                "max_ms": round(max(endpoint_stats.latencies, default=0) * 1000, 2),
+            }
+            for endpoint, endpoint_stats in stats.items()
+        },
+    }
+
+
+def print_report(result: dict) -> None:
+    print(f"{result['games']} games in {result['elapsed_seconds']}s")
+    print(
+        f"{'endpoint':<10}{'requests':>10}{'errors':>8}{'req/s':>10}"
+        + "".join(f"{f'p{percent} (ms)':>11}" for percent in PERCENTILES)
+        + f"{'max (ms)':>11}"
+    )
+    for endpoint, values in result["endpoints"].items():
+        print(
+            f"{endpoint:<10}{values['requests']:>10}{values['errors']:>8}"
+            + f"{values['requests_per_second']:>10}"
+            + "".join(f"{values[f'p{percent}_ms']:>11}" for percent in PERCENTILES)
+            + f"{values['max_ms']:>11}"
+        )
+
+
+async def main_async(args: argparse.Namespace) -> dict:
+    settings = LoadSettings(
+        players=args.players,
+        duration=args.duration,
+        think_time=args.think_time,
+        poll_ratio=args.poll_ratio,
+        board_size=args.board_size,
+        seed=args.seed,
+    )
+    limits = httpx.Limits(max_connections=args.players)
+
+    async with AsyncExitStack() as stack:
+        if args.url:
+            client = httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30)
+        else:
+            if args.repository:
+                os.environ["MATCH_REPOSITORY"] = args.repository
+
+            from main import app
+
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            client = httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://app"
+            )
+
+        await stack.enter_async_context(client)
+        stats, games, elapsed = await run(client, settings)
+
+    return report(stats, games, elapsed)
+
+
+def main(arguments: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load")
+    parser.add_argument("--url", help="server to load, in process when not set")
+    parser.add_argument(
+        "--repository",
+        choices=("memory", "postgresql"),
+        help="MATCH_REPOSITORY of the in-process app",
+    )
+    parser.add_argument("--players", type=int, default=LoadSettings.players)
+    parser.add_argument(
+        "--duration", type=float, default=LoadSettings.duration, help="seconds"
+    )
+    parser.add_argument(
+        "--think-time",
+        type=float,
+        default=LoadSettings.think_time,
+        help="mean seconds between the requests of a player",
+    )
+    parser.add_argument(
+        "--poll-ratio",
+        type=float,
+        default=LoadSettings.poll_ratio,
+        help="probability of polling /status after a move",
+    )
+    parser.add_argument("--board-size", type=int, default=LoadSettings.board_size)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+
+    args = parser.parse_args(arguments)
+    result = asyncio.run(main_async(args))
+    if args.json:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(result)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""Microbenchmarks of the domain and mapping hot paths.
+
+Each benchmark reports the best time per call out of several rounds, which
+is the most stable figure between runs on the same machine. Results are saved as
+JSON baselines that later runs are compared against:
+
+    python -m benchmarks.suite run --output baseline.json
+    python -m benchmarks.suite compare baseline.json --threshold 10
+
+`compare` exits with status 1 when any benchmark is slower than its baseline
+by more than the threshold percentage. Baselines depend on the machine, so
+only compare runs made on the same one, ideally an idle one. On noisy
+machines, more `--rounds` make the best times more stable.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+from typing import Callable
+from uuid import uuid4
+
+from src.domain.models.match import Match
+from src.domain.models.movement import Movement
+from src.domain.models.status import Status
+from src.domain.services.match_service import MatchService
+from src.domain.services.state_table import STATE_TABLE
+from src.infra.api.models import MovementRequest
+from src.infra.entities.match_db import MatchDB
+from src.infra.repositories.in_memory_repository import InMemoryRepository
+from src.infra.repositories.sharded_memory_repository import ShardedInMemoryRepository
+from src.logging.logging_service import LoggingService, LoggingSettings
+
+DEFAULT_THRESHOLD = 10.0
+ROUNDS = 20
+ROUND_TIME = 0.02
+
+
+def _match(board: list[list[str | None]], turn: str, win_length: int = 3) -> Match:
+    return Match(
+        id=uuid4(),
+        board=board,
+        turn=turn,
+        status=Status.PLAYING,
+        board_size=len(board),
+        win_length=win_length,
+        move_count=sum(square is not None for row in board for square in row),
+    )
+
+
+def _gomoku_board() -> list[list[str | None]]:
+    board: list[list[str | None]] = [[None] * 15 for _ in range(15)]
+    for i, (x, y) in enumerate([(7, 7), (7, 8), (8, 7), (6, 6), (8, 8), (9, 9)]):
+        board[x][y] = "X" if i % 2 == 0 else "O"
+
+    return board
+
+
+def _move(
+    service: MatchService,
+    repository: InMemoryRepository,
+    template: Match,
+    movement: Movement,
+) -> Callable[[], object]:
+    # The stored match is reset on every call so the same movement stays valid
+    def move() -> object:
+        repository.cache[template.id] = template.copy()
+        return service.move(movement)
+
+    return move
+
+
+def benchmarks() -> dict[str, Callable[[], object]]:
+    logger = LoggingService(LoggingSettings(level="WARNING"))
+    repository = InMemoryRepository(logger)
+    service = MatchService(repository, logger)
+
+    opening = _match([[None] * 3 for _ in range(3)], "X")
+    winning = _match([["X", "X", None], ["O", "O", None], [None] * 3], "X")
+    gomoku = _match(_gomoku_board(), "O", win_length=5)
+    repository.save_match(opening.copy())
+    sharded = ShardedInMemoryRepository(logger)
+    sharded.save_match(opening)
+
+    opening_db = MatchDB.from_match(opening)
+    gomoku_db = MatchDB.from_match(gomoku)
+    movement = {"matchId": str(opening.id), "playerId": "X", "square": {"x": 1, "y": 1}}
+    movement_json = json.dumps(movement)
+
+    def update_match() -> object:
+        return repository.update_match(opening)
+
+    return {
+        "service.move.opening": _move(
+            service,
+            repository,
+            opening,
+            Movement(matchId=opening.id, playerId="X", square={"x": 1, "y": 1}),
+        ),
+        "service.move.winning": _move(
+            service,
+            repository,
+            winning,
+            Movement(matchId=winning.id, playerId="X", square={"x": 0, "y": 2}),
+        ),
+        "service.move.gomoku": _move(
+            service,
+            repository,
+            gomoku,
+            Movement(matchId=gomoku.id, playerId="O", square={"x": 10, "y": 10}),
+        ),
+        "service.check_movement.winner": lambda: service._check_movement(
+            _match([["X", "X", "X"], ["O", "O", None], [None] * 3], "O"), 0, 2
+        ),
+        "service.check_movement.gomoku": lambda: service._check_movement(gomoku, 8, 8),
+        "state_table.classify": lambda: STATE_TABLE.status(
+            STATE_TABLE.successor(STATE_TABLE.index(winning.board), 2)
+        ),
+        "match_db.from_match": lambda: MatchDB.from_match(opening),
+        "match_db.to_match": opening_db.to_match,
+        "match_db.round_trip.gomoku": lambda: MatchDB.from_match(gomoku_db.to_match()),
+        "match.str": opening.__str__,
+        "movement_request.validate": lambda: MovementRequest.model_validate(movement),
+        "movement_request.validate_json": lambda: MovementRequest.model_validate_json(
+            movement_json
+        ),
+        "in_memory.get_match": lambda: repository.get_match(opening.id),
+        "in_memory.update_match": update_match,
+        "sharded_memory.get_match": lambda: sharded.get_match(opening.id),
+        "sharded_memory.apply_move": lambda: sharded.apply_move(
+            opening.id, lambda match: None
+        ),
+    }
+
+
+def _calibrate(timer: timeit.Timer) -> int:
+    """Number of calls taking about `ROUND_TIME` seconds."""
+    number, elapsed = timer.autorange()
+    return max(1, int(number * ROUND_TIME / elapsed))
+
+
+def run(selected: str | None = None, rounds: int = ROUNDS) -> dict[str, float]:
+    """Best time per call in nanoseconds of each benchmark.
+
+    Benchmarks are run in interleaved rounds, so a burst of noise on the
+    machine slows down one round of every benchmark instead of all the rounds
+    of one of them.
+    """
+    timers = {
+        name: timeit.Timer(function)
+        for name, function in benchmarks().items()
+        if selected is None or selected in name
+    }
+    numbers = {name: _calibrate(timer) for name, timer in timers.items()}
+
+    results = {name: float("inf") for name in timers}
+    for _ in range(rounds):
+        for name, timer in timers.items():
+            elapsed = timer.timeit(numbers[name]) / numbers[name] * 1e9
+            results[name] = min(results[name], elapsed)
+
+    for name, nanoseconds in results.items():
+        print(f"{name:<40}{nanoseconds:>12.0f} ns", file=sys.stderr)
+
+    return results
+
+
+def compare(
+    baseline: dict[str, float], current: dict[str, float], threshold: float
+) -> list[str]:
+    """Prints the change of every benchmark and returns the regressed ones.
+
+    Benchmarks missing from the baseline are reported but never fail.
+    """
+    regressions = []
+    print(f"{'benchmark':<40}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, nanoseconds in current.items():
+        if name not in baseline:
+            print(f"{name:<40}{'-':>12}{nanoseconds:>12.0f}{'new':>10}")
+            continue
+
+        change = (nanoseconds / baseline[name] - 1) * 100
+        regressed = change > threshold
+        if regressed:
+            regressions.append(name)
+
+        print(
+            f"{name:<40}{baseline[name]:>12.0f}{nanoseconds:>12.0f}"
+            + f"{change:>+9.1f}%"
+            + (" REGRESSION" if regressed else "")
+        )
+
+    return regressions
+
+
+def _load(path: str) -> dict[str, float]:
+    with open(path) as file:
+        return {
+            name: result["ns_per_call"]
+            for name, result in json.load(file)["benchmarks"].items()
+        }
+
+
+def _save(path: str, results: dict[str, float]) -> None:
+    with open(path, "w") as file:
+        json.dump(
+            {
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "benchmarks": {
+                    name: {"ns_per_call": round(nanoseconds, 1)}
+                    for name, nanoseconds in results.items()
+                },
+            },
+            file,
+            indent=2,
+        )
+        file.write("\n")
+
+
+def main(arguments: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--output", help="save the results as a JSON baseline")
+    run_parser.add_argument("--filter", help="only run benchmarks containing it")
+    run_parser.add_argument("--rounds", type=int, default=ROUNDS)
+
+    compare_parser = commands.add_parser("compare", help="compare with a baseline")
+    compare_parser.add_argument("baseline", help="JSON baseline to compare with")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="slowdown percentage tolerated (default: %(default)s)",
+    )
+    compare_parser.add_argument("--output", help="also save the new results")
+    compare_parser.add_argument("--filter", help="only run benchmarks containing it")
+    compare_parser.add_argument("--rounds", type=int, default=ROUNDS)
+
+    args = parser.parse_args(arguments)
+    results = run(args.filter, args.rounds)
+    if args.output:
+        _save(args.output, results)
+
+    if args.command == "compare":
+        if regressions := compare(_load(args.baseline), results, args.threshold):
+            print(f"{len(regressions)} benchmarks regressed: {', '.join(regressions)}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
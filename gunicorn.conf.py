@@ -0,0 +1,73 @@
+"""Production serving profile: gunicorn managing uvicorn workers.
+
+    gunicorn main:app -c gunicorn.conf.py
+
+The app is imported once in the master and forked into WEB_CONCURRENCY
+workers (the number of CPUs by default, one with MATCH_REPOSITORY=memory),
+which share its memory pages until they write to them. Each worker still
+opens its own database pool in its lifespan, sized to its share of
+DB_CONNECTION_BUDGET. Threads are not forked: the logging one started on
+import is started again in each worker.
+
+Reloads without dropping requests:
+
+- `kill -HUP <master>` starts new workers with the new configuration and
+  stops the old ones gracefully. The preloaded code is not reloaded.
+- `kill -USR2 <master>` starts a new master running the new code next to the
+  old one, then `kill -TERM <old master>` once it serves.
+
+Neither works with MATCH_REPOSITORY=memory: the new worker starts without
+the matches of the old one, or, with MEMORY_DATA_DIR, fails to lock the
+directory the old one still holds. Restart the server instead.
+"""
+
+import multiprocessing
+import os
+
+from src.domain.services.solver import perfect_play_table
+from src.infra.api.lifespan import MEMORY_REPOSITORY
+from src.infra.metrics.workers import MAX_WORKERS, WORKER_GAUGES
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+# Matches kept in memory only live in the worker holding them, the app does
+# not start with MATCH_REPOSITORY=memory and more than one
+repository = os.getenv("MATCH_REPOSITORY")
+default_workers = 1 if repository == MEMORY_REPOSITORY else multiprocessing.cpu_count()
+workers = int(os.getenv("WEB_CONCURRENCY", default_workers))
+# Read by the workers to size their database pools
+os.environ["WEB_CONCURRENCY"] = str(workers)
+worker_class = "src.infra.api.worker.FastUvicornWorker"
+preload_app = True
+
+# Requests in flight get this long to finish on reload or shutdown
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", 30))
+timeout = 60
+keepalive = 5
+# Workers are replaced after a while, bounding the cost of any leak, at
+# different times so they are not all restarted together. Not with
+# MATCH_REPOSITORY=memory, where replacing the worker loses its matches
+max_requests = int(
+    os.getenv("MAX_REQUESTS", 0 if repository == MEMORY_REPOSITORY else 100_000)
+)
+max_requests_jitter = max_requests // 10
+
+accesslog = None
+
+
+def on_starting(server):
+    # Solved once in the master, every worker inherits it
+    perfect_play_table()
+
+
+def pre_fork(server, worker):
+    """Gives the worker the lowest slot of the gauges not used by another."""
+    taken = {other.slot for other in server.WORKERS.values()}
+    worker.slot = next(slot for slot in range(MAX_WORKERS) if slot not in taken)
+
+
+def post_fork(server, worker):
+    WORKER_GAUGES.claim(worker.slot)
+
+
+def child_exit(server, worker):
+    WORKER_GAUGES.release(worker.slot)
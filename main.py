@@ -1,9 +1,15 @@
 import uvicorn
 from fastapi import FastAPI
 
+from src.infra.api.idempotency_middleware import IdempotencyMiddleware
+from src.infra.api.lifespan import lifespan
+from src.infra.api.metrics_middleware import MetricsMiddleware
 from src.infra.api.routers import router
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+# The last one added runs first, so replays are measured too
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 
 app.include_router(router)
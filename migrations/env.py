@@ -4,7 +4,10 @@ from logging.config import fileConfig
 from alembic import context
 from sqlalchemy import engine_from_config, pool
 
-from src.infra.repositories.postgresql_repository import Base
+# Every entity module, so their tables are in Base.metadata
+import src.infra.entities.idempotency_key_db  # noqa: F401
+import src.infra.entities.move_db  # noqa: F401
+from src.infra.entities.match_db import Base
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,179 @@
+"""Compact board and status storage
+
+Revision ID: 40b0a4fa18d5
+Revises: a91573f0da5f
+Create Date: 2026-10-18 11:26:52.460871
+
+"""
+
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "40b0a4fa18d5"
+down_revision: Union[str, None] = "a91573f0da5f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+# Same codes as `src.infra.entities.match_db`, copied so the migration does not
+# change if the application code does
+STATUSES = ("playing", "winner", "draw")
+TURNS = ("X", "O")
+
+
+def _pack_board(board: str) -> bytes:
+    rows = json.loads(board)
+    x = o = 0
+    bit = 1
+    for row in rows:
+        for square in row:
+            if square == "X":
+                x |= bit
+            elif square == "O":
+                o |= bit
+            bit <<= 1
+
+    length = (len(rows) * len(rows) + 7) // 8
+    return x.to_bytes(length, "little") + o.to_bytes(length, "little")
+
+
+def _unpack_board(board: bytes, board_size: int) -> str:
+    length = len(board) // 2
+    x = int.from_bytes(board[:length], "little")
+    o = int.from_bytes(board[length:], "little")
+
+    rows = []
+    bit = 1
+    for _ in range(board_size):
+        row = []
+        for _ in range(board_size):
+            row.append("X" if x & bit else "O" if o & bit else None)
+            bit <<= 1
+        rows.append(row)
+
+    return json.dumps(rows)
+
+
+def _encode_batch(connection: sa.Connection) -> int:
+    rows = connection.execute(
+        sa.text(
+            "SELECT id, board, status, turn FROM matches "
+            + "WHERE board_bits IS NULL LIMIT :limit"
+        ),
+        {"limit": BATCH_SIZE},
+    ).all()
+    if not rows:
+        return 0
+
+    # A single statement per batch, so each batch is its own short transaction
+    connection.execute(
+        sa.text("""
+            UPDATE matches
+            SET board_bits = batch.board_bits,
+                status_code = batch.status_code,
+                turn_code = batch.turn_code
+            FROM (
+                SELECT
+                    unnest(CAST(:ids AS uuid[])) AS id,
+                    unnest(CAST(:boards AS bytea[])) AS board_bits,
+                    unnest(CAST(:statuses AS smallint[])) AS status_code,
+                    unnest(CAST(:turns AS smallint[])) AS turn_code
+            ) AS batch
+            WHERE matches.id = batch.id
+            """),
+        {
+            "ids": [str(row.id) for row in rows],
+            "boards": [_pack_board(row.board) for row in rows],
+            "statuses": [STATUSES.index(row.status) for row in rows],
+            "turns": [TURNS.index(row.turn) for row in rows],
+        },
+    )
+
+    return len(rows)
+
+
+def _decode_batch(connection: sa.Connection) -> int:
+    rows = connection.execute(
+        sa.text(
+            "SELECT id, board, board_size, status, turn FROM matches "
+            + "WHERE board_json IS NULL LIMIT :limit"
+        ),
+        {"limit": BATCH_SIZE},
+    ).all()
+    if not rows:
+        return 0
+
+    connection.execute(
+        sa.text("""
+            UPDATE matches
+            SET board_json = batch.board_json,
+                status_text = batch.status_text,
+                turn_text = batch.turn_text
+            FROM (
+                SELECT
+                    unnest(CAST(:ids AS uuid[])) AS id,
+                    unnest(CAST(:boards AS varchar[])) AS board_json,
+                    unnest(CAST(:statuses AS varchar[])) AS status_text,
+                    unnest(CAST(:turns AS varchar[])) AS turn_text
+            ) AS batch
+            WHERE matches.id = batch.id
+            """),
+        {
+            "ids": [str(row.id) for row in rows],
+            "boards": [_unpack_board(bytes(row.board), row.board_size) for row in rows],
+            "statuses": [STATUSES[row.status] for row in rows],
+            "turns": [TURNS[row.turn] for row in rows],
+        },
+    )
+
+    return len(rows)
+
+
+def upgrade() -> None:
+    op.add_column("matches", sa.Column("board_bits", sa.LargeBinary(), nullable=True))
+    op.add_column("matches", sa.Column("status_code", sa.SmallInteger(), nullable=True))
+    op.add_column("matches", sa.Column("turn_code", sa.SmallInteger(), nullable=True))
+
+    # Backfills outside of the migration transaction, committing every batch so
+    # row locks are held briefly and the application keeps working meanwhile
+    with op.get_context().autocommit_block():
+        while _encode_batch(op.get_bind()):
+            pass
+
+    # Blocks writes for the swap, converting rows inserted during the backfill
+    op.execute("LOCK TABLE matches IN EXCLUSIVE MODE")
+    while _encode_batch(op.get_bind()):
+        pass
+
+    op.drop_column("matches", "board")
+    op.drop_column("matches", "status")
+    op.drop_column("matches", "turn")
+    op.alter_column("matches", "board_bits", new_column_name="board", nullable=False)
+    op.alter_column("matches", "status_code", new_column_name="status", nullable=False)
+    op.alter_column("matches", "turn_code", new_column_name="turn", nullable=False)
+
+
+def downgrade() -> None:
+    op.add_column("matches", sa.Column("board_json", sa.String(), nullable=True))
+    op.add_column("matches", sa.Column("status_text", sa.String(), nullable=True))
+    op.add_column("matches", sa.Column("turn_text", sa.String(), nullable=True))
+
+    with op.get_context().autocommit_block():
+        while _decode_batch(op.get_bind()):
+            pass
+
+    op.execute("LOCK TABLE matches IN EXCLUSIVE MODE")
+    while _decode_batch(op.get_bind()):
+        pass
+
+    op.drop_column("matches", "board")
+    op.drop_column("matches", "status")
+    op.drop_column("matches", "turn")
+    op.alter_column("matches", "board_json", new_column_name="board", nullable=False)
+    op.alter_column("matches", "status_text", new_column_name="status", nullable=False)
+    op.alter_column("matches", "turn_text", new_column_name="turn", nullable=False)
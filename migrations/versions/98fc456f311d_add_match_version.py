@@ -0,0 +1,30 @@
+"""Add match version
+
+Revision ID: 98fc456f311d
+Revises: b5506a2223c3
+Create Date: 2026-10-18 09:12:41.530219
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "98fc456f311d"
+down_revision: Union[str, None] = "b5506a2223c3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "matches",
+        sa.Column("version", sa.Integer(), server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("matches", "version")
@@ -0,0 +1,86 @@
+"""Add the moves of the matches
+
+Revision ID: a8e5c1d4b273
+Revises: f1c7d3a95b28
+Create Date: 2026-10-18 21:03:41.552190
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "a8e5c1d4b273"
+down_revision: Union[str, None] = "f1c7d3a95b28"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The order of the moves is only known from the board when each player made
+# one at most, X playing first. The rows remain the snapshot of the older
+# matches, their moves are not needed to read them.
+BACKFILL = """
+INSERT INTO moves (match_id, seq, player, x, y, created_at)
+SELECT matches.id, bits.player + 1, bits.player,
+       board.square / matches.board_size, board.square % matches.board_size,
+       matches.updated_at
+FROM matches
+CROSS JOIN LATERAL generate_series(
+    0, matches.board_size * matches.board_size - 1
+) AS board(square)
+CROSS JOIN LATERAL (
+    VALUES (0, board.square),
+           -- The O mask follows the X mask, rounded up to whole bytes
+           (1, (matches.board_size * matches.board_size + 7) / 8 * 8 + board.square)
+) AS bits(player, bit)
+WHERE matches.move_count <= 2 AND get_bit(matches.board, bits.bit) = 1
+"""
+
+# Sets the square of the mover in its mask, see BACKFILL, and passes the turn.
+# Only playing matches have moves after their snapshot, the row is rewritten
+# when a match ends, so the status stays the same.
+FOLD_NEXT_MOVE = """
+UPDATE matches
+SET board = set_bit(
+        matches.board,
+        moves.player * ((matches.board_size * matches.board_size + 7) / 8 * 8)
+        + moves.x * matches.board_size + moves.y,
+        1
+    ),
+    turn = 1 - moves.player,
+    move_count = moves.seq,
+    version = matches.version + 1
+FROM moves
+WHERE moves.match_id = matches.id AND moves.seq = matches.move_count + 1
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "moves",
+        sa.Column("match_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("seq", sa.SmallInteger(), nullable=False),
+        sa.Column("player", sa.SmallInteger(), nullable=False),
+        sa.Column("x", sa.SmallInteger(), nullable=False),
+        sa.Column("y", sa.SmallInteger(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("match_id", "seq"),
+    )
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    # The rows are a snapshot of the first `move_count` moves, the older code
+    # reads them only. The moves after it, a few at most, are played on them
+    # one at a time, the next one of every match by each UPDATE.
+    bind = op.get_bind()
+    while bind.execute(sa.text(FOLD_NEXT_MOVE)).rowcount:
+        pass
+    op.drop_table("moves")
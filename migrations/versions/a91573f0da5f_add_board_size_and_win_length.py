@@ -0,0 +1,51 @@
+"""Add board size, win length and move count
+
+Revision ID: a91573f0da5f
+Revises: 98fc456f311d
+Create Date: 2026-10-18 10:03:17.118402
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a91573f0da5f"
+down_revision: Union[str, None] = "98fc456f311d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "matches",
+        sa.Column("board_size", sa.SmallInteger(), server_default="3", nullable=False),
+    )
+    op.add_column(
+        "matches",
+        sa.Column("win_length", sa.SmallInteger(), server_default="3", nullable=False),
+    )
+    op.add_column(
+        "matches",
+        sa.Column("move_count", sa.SmallInteger(), server_default="0", nullable=False),
+    )
+    # Existing matches are 3x3, their move count is the number of filled squares
+    op.execute(
+        """
+        UPDATE matches SET move_count = (
+            SELECT count(*)
+            FROM json_array_elements(matches.board::json) AS board_row(squares),
+                json_array_elements(board_row.squares) AS board_square(value)
+            WHERE json_typeof(board_square.value) <> 'null'
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("matches", "move_count")
+    op.drop_column("matches", "win_length")
+    op.drop_column("matches", "board_size")
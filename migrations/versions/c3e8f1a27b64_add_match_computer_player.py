@@ -0,0 +1,28 @@
+"""Add the player played by the server
+
+Revision ID: c3e8f1a27b64
+Revises: 40b0a4fa18d5
+Create Date: 2026-10-18 16:42:05.271934
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c3e8f1a27b64"
+down_revision: Union[str, None] = "40b0a4fa18d5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nullable without default, adding it does not rewrite the table
+    op.add_column("matches", sa.Column("computer", sa.SmallInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("matches", "computer")
@@ -0,0 +1,55 @@
+"""Add the archive of the moves of the finished matches
+
+Revision ID: c6f2a9d81e47
+Revises: a8e5c1d4b273
+Create Date: 2026-10-19 09:12:27.418305
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c6f2a9d81e47"
+down_revision: Union[str, None] = "a8e5c1d4b273"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Moves of the matches archived so far, and back on downgrade
+MOVE = """
+WITH moved AS (
+    DELETE FROM {source}
+    USING matches_archive
+    WHERE {source}.match_id = matches_archive.id
+    RETURNING {source}.*
+)
+INSERT INTO {target} SELECT * FROM moved
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "moves_archive",
+        sa.Column("match_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("seq", sa.SmallInteger(), nullable=False),
+        sa.Column("player", sa.SmallInteger(), nullable=False),
+        sa.Column("x", sa.SmallInteger(), nullable=False),
+        sa.Column("y", sa.SmallInteger(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("match_id", "seq"),
+    )
+    op.execute(MOVE.format(source="moves", target="moves_archive"))
+
+
+def downgrade() -> None:
+    op.execute(MOVE.format(source="moves_archive", target="moves"))
+    op.drop_table("moves_archive")
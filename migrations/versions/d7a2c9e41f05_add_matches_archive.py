@@ -0,0 +1,64 @@
+"""Add the archive of the finished matches
+
+Revision ID: d7a2c9e41f05
+Revises: c3e8f1a27b64
+Create Date: 2026-10-18 17:25:41.803512
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d7a2c9e41f05"
+down_revision: Union[str, None] = "c3e8f1a27b64"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "matches_archive",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column(
+            "archived_at", sa.DateTime(), server_default=sa.func.now(), nullable=False
+        ),
+        sa.Column("status", sa.SmallInteger(), nullable=False),
+        sa.Column("turn", sa.SmallInteger(), nullable=False),
+        sa.Column("board", sa.LargeBinary(), nullable=False),
+        sa.Column("board_size", sa.SmallInteger(), server_default="3", nullable=False),
+        sa.Column("win_length", sa.SmallInteger(), server_default="3", nullable=False),
+        sa.Column("move_count", sa.SmallInteger(), server_default="0", nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("computer", sa.SmallInteger(), nullable=True),
+        sa.Column("version", sa.Integer(), server_default="0", nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    # Built without blocking the writes on `matches`, which cannot be done
+    # inside the migration transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_matches_finished",
+            "matches",
+            ["updated_at"],
+            postgresql_where=sa.text("status <> 0"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    # Archived matches go back to the live table first
+    op.execute(
+        "INSERT INTO matches (id, status, turn, board, board_size, win_length, "
+        "move_count, created_at, updated_at, computer, version) "
+        "SELECT id, status, turn, board, board_size, win_length, move_count, "
+        "created_at, updated_at, computer, version FROM matches_archive"
+    )
+    op.drop_index("ix_matches_finished", table_name="matches")
+    op.drop_table("matches_archive")
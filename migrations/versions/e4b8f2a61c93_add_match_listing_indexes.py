@@ -0,0 +1,48 @@
+"""Add the indexes of the match listings
+
+Revision ID: e4b8f2a61c93
+Revises: d7a2c9e41f05
+Create Date: 2026-10-18 18:03:12.460271
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e4b8f2a61c93"
+down_revision: Union[str, None] = "d7a2c9e41f05"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("matches", "matches_archive")
+# In the keyset order of the pages, with and without the status filter
+COLUMNS = (
+    ("updated_at", "id"),
+    ("created_at", "id"),
+    ("status", "updated_at", "id"),
+    ("status", "created_at", "id"),
+)
+
+
+def upgrade() -> None:
+    # Built without blocking the writes, which cannot be done inside the
+    # migration transaction
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            for columns in COLUMNS:
+                op.create_index(
+                    f"ix_{table}_{'_'.join(columns)}",
+                    table,
+                    list(columns),
+                    postgresql_concurrently=True,
+                    if_not_exists=True,
+                )
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        for columns in COLUMNS:
+            op.drop_index(f"ix_{table}_{'_'.join(columns)}", table_name=table)
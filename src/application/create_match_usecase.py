@@ -1,5 +1,8 @@
 from src.domain.logging.logger_interface import LoggerInterface
 from src.domain.models.match import Match
+from src.domain.repositories.async_match_database_repository import (
+    AsyncMatchDatabaseRepository,
+)
 from src.domain.repositories.match_database_repository import MatchDatabaseRepository
 from src.domain.services.match_service import MatchService
 
@@ -7,10 +10,27 @@ from src.domain.services.match_service import MatchService
 class CreateMatchUseCase:
     def __init__(
         self,
-        match_database_repository: MatchDatabaseRepository,
+        match_database_repository: (
+            MatchDatabaseRepository | AsyncMatchDatabaseRepository
+        ),
         logger: LoggerInterface,
     ):
         self.match_service = MatchService(match_database_repository, logger)
 
-    def run(self) -> Match:
-        return self.match_service.create_match()
+    def run(
+        self,
+        board_size: int = MatchService.DEFAULT_BOARD_SIZE,
+        win_length: int | None = None,
+        computer: str | None = None,
+    ) -> Match:
+        return self.match_service.create_match(board_size, win_length, computer)
+
+    async def run_async(
+        self,
+        board_size: int = MatchService.DEFAULT_BOARD_SIZE,
+        win_length: int | None = None,
+        computer: str | None = None,
+    ) -> Match:
+        return await self.match_service.create_match_async(
+            board_size, win_length, computer
+        )
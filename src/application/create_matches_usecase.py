@@ -0,0 +1,36 @@
+from typing import AsyncIterator, Iterator
+
+from src.domain.logging.logger_interface import LoggerInterface
+from src.domain.models.match import Match
+from src.domain.repositories.async_match_database_repository import (
+    AsyncMatchDatabaseRepository,
+)
+from src.domain.repositories.match_database_repository import MatchDatabaseRepository
+from src.domain.services.match_service import MatchService
+
+
+class CreateMatchesUseCase:
+    def __init__(
+        self,
+        match_database_repository: (
+            MatchDatabaseRepository | AsyncMatchDatabaseRepository
+        ),
+        logger: LoggerInterface,
+    ):
+        self.match_service = MatchService(match_database_repository, logger)
+
+    def run(
+        self,
+        count: int,
+        board_size: int = MatchService.DEFAULT_BOARD_SIZE,
+        win_length: int | None = None,
+    ) -> Iterator[list[Match]]:
+        return self.match_service.create_matches(count, board_size, win_length)
+
+    def run_async(
+        self,
+        count: int,
+        board_size: int = MatchService.DEFAULT_BOARD_SIZE,
+        win_length: int | None = None,
+    ) -> AsyncIterator[list[Match]]:
+        return self.match_service.create_matches_async(count, board_size, win_length)
@@ -0,0 +1,25 @@
+from uuid import UUID
+
+from src.domain.logging.logger_interface import LoggerInterface
+from src.domain.repositories.async_match_database_repository import (
+    AsyncMatchDatabaseRepository,
+)
+from src.domain.repositories.match_database_repository import MatchDatabaseRepository
+from src.domain.services.match_service import MatchService
+
+
+class GetHintUseCase:
+    def __init__(
+        self,
+        match_database_repository: (
+            MatchDatabaseRepository | AsyncMatchDatabaseRepository
+        ),
+        logger: LoggerInterface,
+    ):
+        self.match_service = MatchService(match_database_repository, logger)
+
+    def run(self, match_id: UUID) -> tuple[int, int]:
+        return self.match_service.hint(match_id)
+
+    async def run_async(self, match_id: UUID) -> tuple[int, int]:
+        return await self.match_service.hint_async(match_id)
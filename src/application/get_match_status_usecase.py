@@ -2,6 +2,9 @@ from uuid import UUID
 
 from src.domain.logging.logger_interface import LoggerInterface
 from src.domain.models.status import Status
+from src.domain.repositories.async_match_database_repository import (
+    AsyncMatchDatabaseRepository,
+)
 from src.domain.repositories.match_database_repository import MatchDatabaseRepository
 from src.domain.services.match_service import MatchService
 
@@ -9,10 +12,15 @@ from src.domain.services.match_service import MatchService
 class GetMatchStatusUseCase:
     def __init__(
         self,
-        match_database_repository: MatchDatabaseRepository,
+        match_database_repository: (
+            MatchDatabaseRepository | AsyncMatchDatabaseRepository
+        ),
         logger: LoggerInterface,
     ):
         self.match_service = MatchService(match_database_repository, logger)
 
     def run(self, match_id: UUID) -> Status:
         return self.match_service.get_match_status(match_id)
+
+    async def run_async(self, match_id: UUID) -> Status:
+        return await self.match_service.get_match_status_async(match_id)
@@ -0,0 +1,24 @@
+from src.domain.logging.logger_interface import LoggerInterface
+from src.domain.models.match_page import MatchPage, MatchQuery
+from src.domain.repositories.async_match_database_repository import (
+    AsyncMatchDatabaseRepository,
+)
+from src.domain.repositories.match_database_repository import MatchDatabaseRepository
+from src.domain.services.match_service import MatchService
+
+
+class ListMatchesUseCase:
+    def __init__(
+        self,
+        match_database_repository: (
+            MatchDatabaseRepository | AsyncMatchDatabaseRepository
+        ),
+        logger: LoggerInterface,
+    ):
+        self.match_service = MatchService(match_database_repository, logger)
+
+    def run(self, query: MatchQuery) -> MatchPage:
+        return self.match_service.list_matches(query)
+
+    async def run_async(self, query: MatchQuery) -> MatchPage:
+        return await self.match_service.list_matches_async(query)
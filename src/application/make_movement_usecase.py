@@ -1,5 +1,8 @@
 from src.domain.logging.logger_interface import LoggerInterface
 from src.domain.models.movement import Movement
+from src.domain.repositories.async_match_database_repository import (
+    AsyncMatchDatabaseRepository,
+)
 from src.domain.repositories.match_database_repository import MatchDatabaseRepository
 from src.domain.services.match_service import MatchService
 
@@ -7,10 +10,15 @@ from src.domain.services.match_service import MatchService
 class MakeMovementUseCase:
     def __init__(
         self,
-        match_database_repository: MatchDatabaseRepository,
+        match_database_repository: (
+            MatchDatabaseRepository | AsyncMatchDatabaseRepository
+        ),
         logger: LoggerInterface,
     ):
         self.match_service = MatchService(match_database_repository, logger)
 
     def run(self, movement: Movement) -> str:
         return self.match_service.move(movement)
+
+    async def run_async(self, movement: Movement) -> str:
+        return await self.match_service.move_async(movement)
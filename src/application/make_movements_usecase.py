@@ -0,0 +1,24 @@
+from src.domain.logging.logger_interface import LoggerInterface
+from src.domain.models.movement import Movement
+from src.domain.repositories.async_match_database_repository import (
+    AsyncMatchDatabaseRepository,
+)
+from src.domain.repositories.match_database_repository import MatchDatabaseRepository
+from src.domain.services.match_service import MatchService
+
+
+class MakeMovementsUseCase:
+    def __init__(
+        self,
+        match_database_repository: (
+            MatchDatabaseRepository | AsyncMatchDatabaseRepository
+        ),
+        logger: LoggerInterface,
+    ):
+        self.match_service = MatchService(match_database_repository, logger)
+
+    def run(self, movements: list[Movement]) -> list[str | Exception]:
+        return self.match_service.move_many(movements)
+
+    async def run_async(self, movements: list[Movement]) -> list[str | Exception]:
+        return await self.match_service.move_many_async(movements)
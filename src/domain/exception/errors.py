@@ -3,6 +3,11 @@ class PlayerNotValidException(Exception):
         self.message = message
 
 
+class BoardNotValidException(Exception):
+    def __init__(self, message: str):
+        self.message = message
+
+
 class SquareNotValidException(Exception):
     def __init__(self, message: str):
         self.message = message
@@ -56,3 +61,38 @@ class DatabaseUpdateMatchException(Exception):
 class DatabaseGetMatchException(Exception):
     def __init__(self, message: str):
         self.message = message
+
+
+class DatabaseMoveConflictException(Exception):
+    def __init__(self, message: str):
+        self.message = message
+
+
+class PageNotValidException(Exception):
+    def __init__(self, message: str):
+        self.message = message
+
+
+class IdempotencyKeyNotValidException(Exception):
+    def __init__(self, message: str):
+        self.message = message
+
+
+class IdempotencyKeyReusedException(Exception):
+    def __init__(self, message: str):
+        self.message = message
+
+
+class IdempotencyKeyInProgressException(Exception):
+    def __init__(self, message: str):
+        self.message = message
+
+
+class IdempotencyResponseNotKeptException(Exception):
+    def __init__(self, message: str):
+        self.message = message
+
+
+class WorkersNotValidException(Exception):
+    def __init__(self, message: str):
+        self.message = message
@@ -2,18 +2,26 @@ from abc import ABC, abstractmethod
 
 
 class LoggerInterface(ABC):
+    """`message` is a %-style template, only formatted with `args` if the
+    message is actually written. `fields` are structured key/value pairs
+    written along with it.
+
+    Loggers may sample the info and debug messages, grouping them by template,
+    so the template should not embed variable data.
+    """
+
     @abstractmethod
-    def info(self, message: str) -> None:
+    def info(self, message: str, *args: object, **fields: object) -> None:
         pass
 
     @abstractmethod
-    def warning(self, message: str) -> None:
+    def warning(self, message: str, *args: object, **fields: object) -> None:
         pass
 
     @abstractmethod
-    def error(self, message: str) -> None:
+    def error(self, message: str, *args: object, **fields: object) -> None:
         pass
 
     @abstractmethod
-    def debug(self, message: str) -> None:
+    def debug(self, message: str, *args: object, **fields: object) -> None:
         pass
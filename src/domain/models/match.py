@@ -9,19 +9,58 @@ class Match:
     board: list[list[str | None]]
     turn: str
     status: Status
+    board_size: int
+    win_length: int
+    move_count: int
+    version: int
+    # Player played by the server, if any
+    computer: str | None
+    # Moves played on this instance, as (player, x, y), that the repository
+    # has not stored yet. Copies start without any. A tuple, so the matches
+    # without any share the empty one
+    played: tuple[tuple[str, int, int], ...]
 
     def __init__(
-        self, id: UUID, board: list[list[str | None]], turn: str, status: Status
+        self,
+        id: UUID,
+        board: list[list[str | None]],
+        turn: str,
+        status: Status,
+        board_size: int = 3,
+        win_length: int = 3,
+        move_count: int = 0,
+        version: int = 0,
+        computer: str | None = None,
     ):
         self.id = id
         self.board = board
         self.turn = turn
         self.status = status
+        self.board_size = board_size
+        self.win_length = win_length
+        self.move_count = move_count
+        self.version = version
+        self.computer = computer
+        self.played = ()
+
+    def copy(self) -> "Match":
+        return Match(
+            id=self.id,
+            board=[list(row) for row in self.board],
+            turn=self.turn,
+            status=self.status,
+            board_size=self.board_size,
+            win_length=self.win_length,
+            move_count=self.move_count,
+            version=self.version,
+            computer=self.computer,
+        )
 
     def __str__(self):
         return (
             f"Match: {self.id}\n"
             + f"Turn: {self.turn}\n"
             + f"Status: {self.status}\n"
+            + f"Board size: {self.board_size} ({self.win_length} in a row)\n"
             + f"Board: {json.dumps(self.board)}"
         )
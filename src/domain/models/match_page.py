@@ -0,0 +1,101 @@
+from datetime import datetime
+from uuid import UUID
+
+from src.domain.models.status import Status
+
+# Columns matches can be listed by, newest first
+SORT_KEYS = ("updated_at", "created_at")
+
+
+class MatchSummary:
+    """Listed match. The board is only there when it was asked for."""
+
+    id: UUID
+    status: Status
+    turn: str
+    board_size: int
+    win_length: int
+    move_count: int
+    computer: str | None
+    created_at: datetime
+    updated_at: datetime
+    board: list[list[str | None]] | None
+
+    def __init__(
+        self,
+        id: UUID,
+        status: Status,
+        turn: str,
+        board_size: int,
+        win_length: int,
+        move_count: int,
+        computer: str | None,
+        created_at: datetime,
+        updated_at: datetime,
+        board: list[list[str | None]] | None = None,
+    ):
+        self.id = id
+        self.status = status
+        self.turn = turn
+        self.board_size = board_size
+        self.win_length = win_length
+        self.move_count = move_count
+        self.computer = computer
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.board = board
+
+    def key(self, sort: str) -> tuple[datetime, UUID]:
+        """Position of the match in a listing sorted by `sort`."""
+        return getattr(self, sort), self.id
+
+
+class MatchQuery:
+    """Filters of a match listing and the page to return.
+
+    Time ranges include their start and exclude their end. `after` is the key
+    of the last match of the previous page, only older matches are returned.
+    """
+
+    status: Status | None
+    created_from: datetime | None
+    created_to: datetime | None
+    updated_from: datetime | None
+    updated_to: datetime | None
+    sort: str
+    after: tuple[datetime, UUID] | None
+    limit: int
+    include_board: bool
+
+    def __init__(
+        self,
+        status: Status | None = None,
+        created_from: datetime | None = None,
+        created_to: datetime | None = None,
+        updated_from: datetime | None = None,
+        updated_to: datetime | None = None,
+        sort: str = SORT_KEYS[0],
+        after: tuple[datetime, UUID] | None = None,
+        limit: int = 50,
+        include_board: bool = False,
+    ):
+        self.status = status
+        self.created_from = created_from
+        self.created_to = created_to
+        self.updated_from = updated_from
+        self.updated_to = updated_to
+        self.sort = sort
+        self.after = after
+        self.limit = limit
+        self.include_board = include_board
+
+
+class MatchPage:
+    """`next` is the `MatchQuery.after` of the next page, None on the last one."""
+
+    matches: list[MatchSummary]
+    next: tuple[datetime, UUID] | None
+
+    def __init__(self, matches: list[MatchSummary], next: tuple[datetime, UUID] | None):
+        self.matches = matches
+        self.next = next
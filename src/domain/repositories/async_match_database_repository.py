@@ -0,0 +1,46 @@
+from abc import ABC, abstractmethod
+from typing import Callable, Iterable
+from uuid import UUID
+
+from src.domain.models.match import Match
+from src.domain.models.match_page import MatchQuery, MatchSummary
+
+
+class AsyncMatchDatabaseRepository(ABC):
+    @abstractmethod
+    async def get_match(self, match_id: UUID) -> Match | None:
+        pass
+
+    @abstractmethod
+    async def save_match(self, match: Match) -> Match:
+        pass
+
+    @abstractmethod
+    async def save_matches(self, matches: list[Match]) -> list[Match]:
+        """See `MatchDatabaseRepository.save_matches`."""
+        pass
+
+    @abstractmethod
+    async def update_match(self, match: Match) -> Match:
+        pass
+
+    @abstractmethod
+    async def apply_move(
+        self, match_id: UUID, apply: Callable[[Match], None]
+    ) -> Match | None:
+        """See `MatchDatabaseRepository.apply_move`."""
+        pass
+
+    @abstractmethod
+    async def apply_moves(
+        self,
+        match_ids: Iterable[UUID],
+        apply: Callable[[dict[UUID, Match]], None],
+    ) -> dict[UUID, Match]:
+        """See `MatchDatabaseRepository.apply_moves`."""
+        pass
+
+    @abstractmethod
+    async def list_matches(self, query: MatchQuery) -> list[MatchSummary]:
+        """See `MatchDatabaseRepository.list_matches`."""
+        pass
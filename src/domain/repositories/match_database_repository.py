@@ -1,7 +1,9 @@
 from abc import ABC, abstractmethod
+from typing import Callable, Iterable
 from uuid import UUID
 
 from src.domain.models.match import Match
+from src.domain.models.match_page import MatchQuery, MatchSummary
 
 
 class MatchDatabaseRepository(ABC):
@@ -13,6 +15,42 @@ class MatchDatabaseRepository(ABC):
     def save_match(self, match: Match) -> Match:
         pass
 
+    @abstractmethod
+    def save_matches(self, matches: list[Match]) -> list[Match]:
+        """Saves all the given matches in a single transaction."""
+        pass
+
     @abstractmethod
     def update_match(self, match: Match) -> Match:
         pass
+
+    @abstractmethod
+    def apply_move(
+        self, match_id: UUID, apply: Callable[[Match], None]
+    ) -> Match | None:
+        """Atomically applies `apply` to the stored match and persists it.
+
+        Returns None when the match does not exist. If the match is modified
+        concurrently, the latest version is reloaded and `apply` runs again.
+        """
+        pass
+
+    @abstractmethod
+    def apply_moves(
+        self,
+        match_ids: Iterable[UUID],
+        apply: Callable[[dict[UUID, Match]], None],
+    ) -> dict[UUID, Match]:
+        """Applies `apply` to all the given matches in a single transaction.
+
+        Only matches whose move count changed are persisted. Missing matches are
+        left out of the dict passed to `apply`, which is run again on the
+        reloaded matches if any of them is modified concurrently.
+        """
+        pass
+
+    @abstractmethod
+    def list_matches(self, query: MatchQuery) -> list[MatchSummary]:
+        """Up to `query.limit` matches passing the filters, newest first by
+        `query.sort` then by id. Archived matches are included."""
+        pass
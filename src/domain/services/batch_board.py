@@ -0,0 +1,192 @@
+"""MatchService rules applied to many boards at once with NumPy, for analytics,
+training bots or fuzzing the rules.
+
+Boards are (N, size, size) int8 arrays holding EMPTY, X or O in each square.
+The lines checked are the `line_masks` of the bitboards, built from the same
+`DIRECTIONS` and win length MatchService checks every movement with.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Iterable
+
+import numpy as np
+
+from src.domain.exception.errors import (
+    BoardNotValidException,
+    SquareNotAvailableException,
+)
+from src.domain.models.status import Status
+from src.domain.services.bitboard import line_masks
+from src.domain.services.match_service import MatchService
+
+EMPTY, X, O = 0, 1, -1  # noqa: E741
+PLAYERS = {"X": X, "O": O}
+
+# Status codes of the evaluated boards, the position in this tuple
+STATUSES = (Status.PLAYING, Status.WINNER, Status.DRAW)
+PLAYING, WINNER, DRAW = range(len(STATUSES))
+
+# Squares of the lines gathered at once, bounding the memory of big batches
+_GATHER_SQUARES = 1 << 24
+
+# Receives the boards of the games still playing and the player to move, the
+# same in all of them, and returns the square played in each one
+Policy = Callable[[np.ndarray, int, np.random.Generator], np.ndarray]
+
+
+@lru_cache(maxsize=None)
+def line_squares(size: int, win_length: int) -> np.ndarray:
+    """Squares, as `x * size + y`, of each line of `line_masks`."""
+    return np.array(
+        [
+            [square for square in range(size * size) if mask >> square & 1]
+            for mask in line_masks(size, win_length)
+        ],
+        dtype=np.intp,
+    )
+
+
+@lru_cache(maxsize=None)
+def lines_through(size: int, win_length: int) -> np.ndarray:
+    """Indexes in `line_squares` of the lines through each square.
+
+    Squares on fewer lines than others repeat their first one.
+    """
+    lines: list[list[int]] = [[] for _ in range(size * size)]
+    for index, squares in enumerate(line_squares(size, win_length)):
+        for square in squares:
+            lines[square].append(index)
+
+    longest = max(len(indexes) for indexes in lines)
+    return np.array(
+        [indexes + indexes[:1] * (longest - len(indexes)) for indexes in lines],
+        dtype=np.intp,
+    )
+
+
+def _code(square: str | None) -> int:
+    return EMPTY if square is None else PLAYERS[square]
+
+
+def _check_win_length(size: int, win_length: int) -> None:
+    if not MatchService.MIN_WIN_LENGTH <= win_length <= size:
+        raise BoardNotValidException(
+            f"Win length must be between {MatchService.MIN_WIN_LENGTH} and {size}"
+        )
+
+
+def to_array(boards: Iterable[list[list[str | None]]]) -> np.ndarray:
+    return np.array(
+        [[[_code(square) for square in row] for row in board] for board in boards],
+        dtype=np.int8,
+    )
+
+
+def evaluate(boards: np.ndarray, win_length: int) -> tuple[np.ndarray, np.ndarray]:
+    """Status code and winner, X, O or EMPTY, of each board.
+
+    Boards where both players have a line, which no match can reach, are won
+    by X.
+    """
+    count, size = boards.shape[0], boards.shape[1]
+    _check_win_length(size, win_length)
+    squares = boards.reshape(count, size * size)
+    lines = line_squares(size, win_length)
+
+    winner = np.zeros(count, dtype=np.int8)
+    chunk = max(1, _GATHER_SQUARES // lines.size)
+    for start in range(0, count, chunk):
+        # Sum of each line, +-win_length when one player has all its squares
+        sums = squares[start : start + chunk, lines].sum(axis=2, dtype=np.int8)
+        winner[start : start + chunk] = np.where(
+            (sums == win_length).any(axis=1),
+            X,
+            np.where((sums == -win_length).any(axis=1), O, EMPTY),
+        )
+
+    full = (squares != EMPTY).all(axis=1)
+    status = np.where(winner != EMPTY, WINNER, np.where(full, DRAW, PLAYING))
+
+    return status.astype(np.int8), winner
+
+
+@dataclass
+class Simulation:
+    boards: np.ndarray
+    status: np.ndarray
+    winner: np.ndarray
+    # Squares played, as `x * size + y`, in order, -1 after the last one
+    moves: np.ndarray
+
+    @property
+    def move_count(self) -> np.ndarray:
+        return (self.moves >= 0).sum(axis=1)
+
+
+def simulate(
+    games: int,
+    size: int = MatchService.DEFAULT_BOARD_SIZE,
+    win_length: int | None = None,
+    policy: Policy | None = None,
+    rng: np.random.Generator | None = None,
+) -> Simulation:
+    """Plays `games` games to the end, the same move of all of them at a time.
+
+    X plays first in every game, so all the games still playing have the
+    same player to move. Without a `policy`, every game plays the squares in
+    a random order, all drawn at once. As MatchService does, only the lines
+    through the square just played are checked.
+
+    The memory taken grows with `games` times the squares of the board, big
+    runs are better split in several calls.
+    """
+    if win_length is None:
+        win_length = min(size, MatchService.MAX_DEFAULT_WIN_LENGTH)
+    _check_win_length(size, win_length)
+    rng = np.random.default_rng() if rng is None else rng
+
+    squares = size * size
+    order: np.ndarray | None = None
+    if policy is None:
+        order = rng.permuted(
+            np.tile(np.arange(squares, dtype=np.int16), (games, 1)), axis=1
+        )
+    lines = line_squares(size, win_length)
+    through = lines_through(size, win_length)
+    boards = np.zeros((games, squares), dtype=np.int8)
+    moves = np.full((games, squares), -1, dtype=np.int16)
+    status = np.zeros(games, dtype=np.int8)
+    winner = np.zeros(games, dtype=np.int8)
+
+    playing = np.arange(games)
+    player = X
+    for turn in range(squares):
+        if order is not None:
+            played = order[playing, turn]
+        elif policy is not None:
+            played = np.asarray(
+                policy(boards[playing].reshape(-1, size, size), player, rng)
+            )
+            if (boards[playing, played] != EMPTY).any():
+                raise SquareNotAvailableException(
+                    "Policy played a square not available"
+                )
+
+        boards[playing, played] = player
+        moves[playing, turn] = played
+
+        # Nobody can have a line before the win_length-th move of X
+        if turn >= 2 * win_length - 2:
+            squares_played = lines[through[played]] + (playing * squares)[:, None, None]
+            won = (boards.ravel()[squares_played] == player).all(axis=2).any(axis=1)
+            status[playing[won]] = WINNER
+            winner[playing[won]] = player
+            playing = playing[~won]
+            if not playing.size:
+                break
+
+        player = -player
+
+    status[playing] = DRAW
+    return Simulation(boards.reshape(games, size, size), status, winner, moves)
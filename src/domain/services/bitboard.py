@@ -0,0 +1,114 @@
+from functools import lru_cache
+
+from src.domain.models.status import Status
+
+# Row, column, first diagonal and last diagonal steps
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+@lru_cache(maxsize=None)
+def line_masks(size: int, win_length: int) -> tuple[int, ...]:
+    """Masks of every `win_length` squares long line of a `size` x `size` board.
+
+    Square [x][y] of the board is stored in bit `x * size + y`.
+    """
+    masks = []
+    for x in range(size):
+        for y in range(size):
+            for dx, dy in DIRECTIONS:
+                end_x = x + dx * (win_length - 1)
+                end_y = y + dy * (win_length - 1)
+                if 0 <= end_x < size and 0 <= end_y < size:
+                    masks.append(
+                        sum(
+                            1 << ((x + dx * i) * size + y + dy * i)
+                            for i in range(win_length)
+                        )
+                    )
+
+    return tuple(masks)
+
+
+# Boards up to 4x4 have few enough masks to precompute whether each one wins
+_WIN_TABLE_MAX_SQUARES = 16
+
+
+@lru_cache(maxsize=None)
+def win_table(size: int, win_length: int) -> bytes:
+    """Byte per possible player mask, set to 1 when the mask contains a line."""
+    lines = line_masks(size, win_length)
+    return bytes(
+        any(mask & line == line for line in lines) for mask in range(1 << (size * size))
+    )
+
+
+class Bitboard:
+    """Board stored as one integer mask of occupied squares per player."""
+
+    __slots__ = ("size", "win_length", "x", "o")
+
+    def __init__(
+        self, size: int, win_length: int | None = None, x: int = 0, o: int = 0
+    ):
+        self.size = size
+        self.win_length = size if win_length is None else win_length
+        self.x = x
+        self.o = o
+
+    @staticmethod
+    def from_board(
+        board: list[list[str | None]], win_length: int | None = None
+    ) -> "Bitboard":
+        x = o = 0
+        bit = 1
+        for row in board:
+            for square in row:
+                if square is not None:
+                    if square == "X":
+                        x |= bit
+                    else:
+                        o |= bit
+                bit <<= 1
+
+        return Bitboard(len(board), win_length, x, o)
+
+    def to_board(self) -> list[list[str | None]]:
+        board: list[list[str | None]] = []
+        bit = 1
+        for _ in range(self.size):
+            row: list[str | None] = []
+            for _ in range(self.size):
+                row.append("X" if self.x & bit else "O" if self.o & bit else None)
+                bit <<= 1
+            board.append(row)
+
+        return board
+
+    def full_mask(self) -> int:
+        return (1 << (self.size * self.size)) - 1
+
+    def place(self, player: str, x: int, y: int) -> None:
+        bit = 1 << (x * self.size + y)
+        if player == "X":
+            self.x |= bit
+        else:
+            self.o |= bit
+
+    def is_winner(self, mask: int) -> bool:
+        if self.size * self.size <= _WIN_TABLE_MAX_SQUARES:
+            return win_table(self.size, self.win_length)[mask] == 1
+
+        for line in line_masks(self.size, self.win_length):
+            if mask & line == line:
+                return True
+
+        return False
+
+    def status(self) -> Status:
+        if self.is_winner(self.x) or self.is_winner(self.o):
+            return Status.WINNER
+
+        if self.x | self.o == self.full_mask():
+            return Status.DRAW
+
+        return Status.PLAYING
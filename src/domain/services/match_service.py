@@ -1,8 +1,12 @@
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Iterator, TypeVar, cast
 from uuid import UUID, uuid4
 
 from src.domain.exception.errors import (
+    BoardNotValidException,
     MatchAlreadyEndedException,
     MatchNotFoundException,
+    PageNotValidException,
     PlayerNotValidException,
     SquareNotAvailableException,
     SquareNotValidException,
@@ -11,31 +15,109 @@ from src.domain.exception.errors import (
 )
 from src.domain.logging.logger_interface import LoggerInterface
 from src.domain.models.match import Match
+from src.domain.models.match_page import SORT_KEYS, MatchPage, MatchQuery, MatchSummary
 from src.domain.models.movement import Movement
 from src.domain.models.status import Status
+from src.domain.repositories.async_match_database_repository import (
+    AsyncMatchDatabaseRepository,
+)
 from src.domain.repositories.match_database_repository import MatchDatabaseRepository
+from src.domain.services.bitboard import DIRECTIONS, Bitboard
+from src.domain.services.solver import Solver
+from src.domain.services.state_table import NO_STATE, STATE_TABLE
+
+T = TypeVar("T")
+
+
+class _Replies:
+    """Computer replies searched before calling the repository, whose `apply`
+    callbacks run in a transaction or holding a lock and must not search.
+
+    `squares` holds the replies, by position, to the movements played on the
+    `boards` of the matches, which `apply` must find unchanged to use them.
+    """
+
+    def __init__(self) -> None:
+        self.boards: dict[UUID, list[list[str | None]]] = {}
+        self.squares: dict[tuple, tuple[int, int]] = {}
+        self.searching = False
+
+    @staticmethod
+    def position(match: Match) -> tuple:
+        return match.win_length, tuple(tuple(row) for row in match.board)
+
+
+class _SearchNeeded(Exception):
+    """Raised by `apply`, before moving, to search the replies on `matches`."""
+
+    def __init__(self, matches: dict[UUID, Match]):
+        self.matches = matches
 
 
 class MatchService:
-    BOARD_SIZE = 3
+    DEFAULT_BOARD_SIZE = 3
+    MIN_BOARD_SIZE = 3
+    MAX_BOARD_SIZE = 19
+    MIN_WIN_LENGTH = 3
+    # Used when no win length is given: the whole row on small boards, five in
+    # a row (Gomoku) on bigger ones
+    MAX_DEFAULT_WIN_LENGTH = 5
+    # Matches saved per transaction when creating them in bulk
+    CREATE_BATCH_SIZE = 1_000
+    # Errors reported per movement when applying a batch of them
+    MOVEMENT_ERRORS = (
+        MatchNotFoundException,
+        PlayerNotValidException,
+        SquareNotValidException,
+        MatchAlreadyEndedException,
+        TurnNotValidException,
+        SquareOutOfBoundsException,
+        SquareNotAvailableException,
+    )
+    # Matches returned per page by the listings
+    MAX_PAGE_SIZE = 1_000
     PLAYER_IDS = ["X", "O"]
     MOVEMENT_POSITIONS = ["X", "x", "Y", "y"]
 
     def __init__(
         self,
-        match_database_repository: MatchDatabaseRepository,
+        match_database_repository: (
+            MatchDatabaseRepository | AsyncMatchDatabaseRepository
+        ),
         logger: LoggerInterface,
     ):
         self.match_database_repository = match_database_repository
         self.logger = logger
 
-    def _init_board(self) -> list[list[str | None]]:
+    # The sync methods expect a MatchDatabaseRepository and the `_async` ones an
+    # AsyncMatchDatabaseRepository, the game rules are shared by both of them.
+    @property
+    def _repository(self) -> MatchDatabaseRepository:
+        return cast(MatchDatabaseRepository, self.match_database_repository)
+
+    @property
+    def _async_repository(self) -> AsyncMatchDatabaseRepository:
+        return cast(AsyncMatchDatabaseRepository, self.match_database_repository)
+
+    def _init_board(self, board_size: int) -> list[list[str | None]]:
         board: list[list[str | None]] = []
-        for _ in range(self.BOARD_SIZE):
-            board.append([None for _ in range(self.BOARD_SIZE)])
+        for _ in range(board_size):
+            board.append([None for _ in range(board_size)])
 
         return board
 
+    def _validate_board(self, board_size: int, win_length: int) -> None:
+        if not self.MIN_BOARD_SIZE <= board_size <= self.MAX_BOARD_SIZE:
+            raise BoardNotValidException(
+                f"Board size must be between {self.MIN_BOARD_SIZE} "
+                + f"and {self.MAX_BOARD_SIZE}"
+            )
+
+        if not self.MIN_WIN_LENGTH <= win_length <= board_size:
+            raise BoardNotValidException(
+                f"Win length must be between {self.MIN_WIN_LENGTH} and {board_size}"
+            )
+
     def _get_x(self, square: dict[str, int]) -> int:
         return square["x"] if square.get("x") is not None else square["X"]
 
@@ -45,7 +127,7 @@ class MatchService:
     def _validate_movement(self, movement: Movement, match: Match) -> None:
         if movement.playerId.upper() not in self.PLAYER_IDS:
             player_list = [f"{player}" for player in self.PLAYER_IDS]
-            self.logger.info(f"Player is not valid: {movement.playerId}")
+            self.logger.info("Player is not valid: %r", movement.playerId)
             raise PlayerNotValidException(
                 f"Player is not valid, must be one of: {player_list}"
             )
@@ -56,7 +138,7 @@ class MatchService:
             "y" in movement.square or "Y" in movement.square
         ):
             squares_list = [f"{squares}" for squares in self.MOVEMENT_POSITIONS]
-            self.logger.info(f"Square is not valid: {movement.square}")
+            self.logger.info("Square is not valid: %s", movement.square)
             raise SquareNotValidException(
                 f"Square is not valid, must be one of: {squares_list}",
             )
@@ -74,118 +156,430 @@ class MatchService:
         x = self._get_x(movement.square)
         y = self._get_y(movement.square)
 
-        if x >= self.BOARD_SIZE or y >= self.BOARD_SIZE:
-            self.logger.info(f"Square [{x}, {y}] is out of the board")
+        if not (0 <= x < match.board_size and 0 <= y < match.board_size):
+            self.logger.info("Square [%s, %s] is out of the board", x, y)
             raise SquareOutOfBoundsException(f"Square [{x}, {y}] is out of the board")
 
         if match.board[x][y] is not None:
             raise SquareNotAvailableException(f"Square [{x}, {y}] is not available")
 
-    def _check_same_row(self, board: list[list[str | None]]) -> bool:
-        for row in board:
-            value = row[0]
-            if value is not None and all(square == value for square in row):
-                return True
-
-        return False
-
-    def _check_same_col(self, board: list[list[str | None]]) -> bool:
-        for i in range(0, self.BOARD_SIZE):
-            value = board[0][i]
-            if value is not None and all(row[i] == value for row in board):
-                return True
-
-        return False
-
-    def _check_first_diagonal(self, board: list[list[str | None]]) -> bool:
-        value = board[0][0]
-        if value is not None and all(
-            board[i][i] == value for i in range(self.BOARD_SIZE)
+    def _count_in_direction(
+        self, match: Match, x: int, y: int, dx: int, dy: int, limit: int
+    ) -> int:
+        player = match.board[x][y]
+        count = 0
+        x, y = x + dx, y + dy
+        while (
+            count < limit
+            and 0 <= x < match.board_size
+            and 0 <= y < match.board_size
+            and match.board[x][y] == player
         ):
-            return True
+            count += 1
+            x, y = x + dx, y + dy
 
-        return False
+        return count
 
-    def _check_last_diagonal(self, board: list[list[str | None]]) -> bool:
-        j = self.BOARD_SIZE - 1
-        value = board[0][j]
-        if value is None:
-            return False
+    def _check_movement(self, match: Match, x: int, y: int) -> Status:
+        # Only the lines going through the last placed square can have changed
+        limit = match.win_length - 1
+        for dx, dy in DIRECTIONS:
+            count = self._count_in_direction(match, x, y, dx, dy, limit)
+            if count < limit:
+                count += self._count_in_direction(match, x, y, -dx, -dy, limit - count)
 
-        for row in board:
-            if row[j] != value:
-                return False
-            j -= 1
+            if count >= limit:
+                return Status.WINNER
 
-        return True
+        if match.move_count == match.board_size * match.board_size:
+            return Status.DRAW
 
-    def _check_draw(self, board: list[list[str | None]]) -> bool:
-        if all(
-            board[x][y] is not None
-            for x in range(self.BOARD_SIZE)
-            for y in range(self.BOARD_SIZE)
-        ):
-            return True
+        return Status.PLAYING
 
-        return False
+    def _win_length(self, board_size: int, win_length: int | None) -> int:
+        if win_length is None:
+            win_length = min(board_size, self.MAX_DEFAULT_WIN_LENGTH)
 
-    def _check_movement(self, board: list[list[str | None]]) -> Status:
-        if (
-            self._check_same_row(board)
-            or self._check_same_col(board)
-            or self._check_first_diagonal(board)
-            or self._check_last_diagonal(board)
-        ):
-            return Status.WINNER
+        self._validate_board(board_size, win_length)
 
-        if self._check_draw(board):
-            return Status.DRAW
+        return win_length
 
-        return Status.PLAYING
+    def _new_match(
+        self, board_size: int, win_length: int | None, computer: str | None = None
+    ) -> Match:
+        win_length = self._win_length(board_size, win_length)
+
+        if computer is not None:
+            if computer.upper() not in self.PLAYER_IDS:
+                raise PlayerNotValidException(
+                    f"Computer player is not valid, must be one of: {self.PLAYER_IDS}"
+                )
+            computer = computer.upper()
 
-    def create_match(self) -> Match:
         match = Match(
             id=uuid4(),
-            board=self._init_board(),
+            board=self._init_board(board_size),
             turn="X",  # Convention that X plays first
             status=Status.PLAYING,
+            board_size=board_size,
+            win_length=win_length,
+            computer=computer,
         )
-        self.match_database_repository.save_match(match)
-        self.logger.info(f"Match created: {match.id}")
+        self._play_computer(match)
 
         return match
 
-    def move(self, movement: Movement) -> str:
-        message = ""
-        if match := self.match_database_repository.get_match(movement.matchId):
-            self._validate_movement(movement, match)
-
-            x = self._get_x(movement.square)
-            y = self._get_y(movement.square)
-            match.board[x][y] = movement.playerId
-
-            match.status = self._check_movement(match.board)
-            match.turn = "O" if match.turn == "X" else "X"
-            match match.status:
-                case Status.WINNER:
-                    message = f"Player '{movement.playerId}' Wins!!!!"
-                case Status.DRAW:
-                    message = "Draw!!!"
-                case Status.PLAYING:
-                    message = f"Movement performed. Next turn: {match.turn}"
-
-            self.match_database_repository.update_match(match)
+    def _best_square(self, match: Match) -> tuple[int, int]:
+        bitboard = Bitboard.from_board(match.board, match.win_length)
+        return divmod(Solver().best_move(bitboard, match.turn), match.board_size)
+
+    def _solved(self, match: Match) -> bool:
+        """3x3 squares are looked up in the perfect play table, others are
+        searched for the whole time budget of the Solver."""
+        return match.board_size == 3 and match.win_length == 3
+
+    async def _best_square_async(self, match: Match) -> tuple[int, int]:
+        if self._solved(match):
+            return self._best_square(match)
+
+        # A search would block the event loop, and every request of the worker
+        return await asyncio.to_thread(self._best_square, match)
+
+    def _searches(self, match: Match) -> bool:
+        return (
+            match.computer is not None
+            and match.status == Status.PLAYING
+            and not self._solved(match)
+        )
+
+    def _check_replies(self, matches: dict[UUID, Match], replies: _Replies) -> None:
+        """Raises _SearchNeeded, before any movement is applied, unless the
+        replies were searched on the boards of the matches."""
+        boards = {
+            match_id: match.board
+            for match_id, match in matches.items()
+            if self._searches(match)
+        }
+        if boards != replies.boards:
+            raise _SearchNeeded(
+                {match_id: matches[match_id].copy() for match_id in boards}
+            )
+
+    def _search_replies(
+        self, movements: list[Movement], matches: dict[UUID, Match], replies: _Replies
+    ) -> None:
+        """Plays the movements on the matches, copies, keeping the computer
+        replies searched. The movements of other matches are not found."""
+        replies.boards = {
+            match_id: [list(row) for row in match.board]
+            for match_id, match in matches.items()
+        }
+        replies.squares = {}
+        replies.searching = True
+        try:
+            self._apply_movements(movements, matches, replies)
+        finally:
+            replies.searching = False
+
+    async def _apply_async(
+        self,
+        movements: list[Movement],
+        replies: _Replies,
+        attempt: Callable[[], Awaitable[T]],
+    ) -> T:
+        """Runs `attempt` until its `apply` has the replies it needs, searching
+        them in a thread in between."""
+        while True:
+            try:
+                return await attempt()
+            except _SearchNeeded as needed:
+                await asyncio.to_thread(
+                    self._search_replies, movements, needed.matches, replies
+                )
+
+    def _computer_square(
+        self, match: Match, replies: _Replies | None
+    ) -> tuple[int, int]:
+        if replies is None or not self._searches(match):
+            return self._best_square(match)
+
+        if replies.searching:
+            replies.squares[replies.position(match)] = self._best_square(match)
+
+        return replies.squares[replies.position(match)]
+
+    def _play_computer(
+        self, match: Match, replies: _Replies | None = None
+    ) -> Movement | None:
+        """Plays the computer movement if it is its turn."""
+        if match.status != Status.PLAYING or match.turn != match.computer:
+            return None
+
+        x, y = self._computer_square(match, replies)
+        movement = Movement(
+            matchId=match.id, playerId=match.turn, square={"x": x, "y": y}
+        )
+        self._apply_movement(movement, match)
+
+        return movement
+
+    def _apply_movement(self, movement: Movement, match: Match) -> None:
+        self._validate_movement(movement, match)
+
+        x = self._get_x(movement.square)
+        y = self._get_y(movement.square)
+        state = NO_STATE
+        if match.board_size == 3 and match.win_length == 3:
+            state = STATE_TABLE.index(match.board)
+
+        match.board[x][y] = movement.playerId
+        match.move_count += 1
+        match.played += ((movement.playerId, x, y),)
+
+        if state != NO_STATE:
+            match.status = STATE_TABLE.status(STATE_TABLE.successor(state, x * 3 + y))
+        else:
+            match.status = self._check_movement(match, x, y)
+        match.turn = "O" if match.turn == "X" else "X"
+
+    def _movement_message(self, movement: Movement, match: Match) -> str:
+        match match.status:
+            case Status.WINNER:
+                return f"Player '{movement.playerId}' Wins!!!!"
+            case Status.DRAW:
+                return "Draw!!!"
+            case _:
+                return f"Movement performed. Next turn: {match.turn}"
+
+    def _apply_turn(
+        self, movement: Movement, match: Match, replies: _Replies | None = None
+    ) -> str:
+        """Applies the movement and the computer reply, returning the message."""
+        self._apply_movement(movement, match)
+        if (reply := self._play_computer(match, replies)) is None:
+            return self._movement_message(movement, match)
+
+        x, y = self._get_x(reply.square), self._get_y(reply.square)
+        return f"Computer played [{x}, {y}]. " + self._movement_message(reply, match)
+
+    def _apply_movements(
+        self,
+        movements: list[Movement],
+        matches: dict[UUID, Match],
+        replies: _Replies | None = None,
+    ) -> list[str | Exception]:
+        results: list[str | Exception] = []
+        for movement in movements:
+            try:
+                if (match := matches.get(movement.matchId)) is None:
+                    raise MatchNotFoundException(f"Match {movement.matchId} not found")
+
+                results.append(self._apply_turn(movement, match, replies))
+            except self.MOVEMENT_ERRORS as e:
+                results.append(e)
+
+        return results
+
+    def create_match(
+        self,
+        board_size: int = DEFAULT_BOARD_SIZE,
+        win_length: int | None = None,
+        computer: str | None = None,
+    ) -> Match:
+        match = self._new_match(board_size, win_length, computer)
+        self._repository.save_match(match)
+        self.logger.info("Match created", match_id=match.id)
+
+        return match
 
+    async def create_match_async(
+        self,
+        board_size: int = DEFAULT_BOARD_SIZE,
+        win_length: int | None = None,
+        computer: str | None = None,
+    ) -> Match:
+        if computer is None:
+            match = self._new_match(board_size, win_length)
         else:
+            # The first movement of the computer may take a search
+            match = await asyncio.to_thread(
+                self._new_match, board_size, win_length, computer
+            )
+        await self._async_repository.save_match(match)
+        self.logger.info("Match created", match_id=match.id)
+
+        return match
+
+    def _new_matches(self, count: int, board_size: int, win_length: int) -> list[Match]:
+        return [self._new_match(board_size, win_length) for _ in range(count)]
+
+    def create_matches(
+        self,
+        count: int,
+        board_size: int = DEFAULT_BOARD_SIZE,
+        win_length: int | None = None,
+    ) -> Iterator[list[Match]]:
+        """Creates `count` matches, yielding them in batches of
+        `CREATE_BATCH_SIZE` as each batch is saved in its own transaction.
+
+        The board is validated before returning, not on the first iteration.
+        """
+        win_length = self._win_length(board_size, win_length)
+
+        def batches() -> Iterator[list[Match]]:
+            for created in range(0, count, self.CREATE_BATCH_SIZE):
+                batch_size = min(self.CREATE_BATCH_SIZE, count - created)
+                matches = self._new_matches(batch_size, board_size, win_length)
+                self._repository.save_matches(matches)
+                self.logger.info(
+                    "Matches created", created=created + batch_size, count=count
+                )
+
+                yield matches
+
+        return batches()
+
+    def create_matches_async(
+        self,
+        count: int,
+        board_size: int = DEFAULT_BOARD_SIZE,
+        win_length: int | None = None,
+    ) -> AsyncIterator[list[Match]]:
+        win_length = self._win_length(board_size, win_length)
+
+        async def batches() -> AsyncIterator[list[Match]]:
+            for created in range(0, count, self.CREATE_BATCH_SIZE):
+                batch_size = min(self.CREATE_BATCH_SIZE, count - created)
+                matches = self._new_matches(batch_size, board_size, win_length)
+                await self._async_repository.save_matches(matches)
+                self.logger.info(
+                    "Matches created", created=created + batch_size, count=count
+                )
+
+                yield matches
+
+        return batches()
+
+    def move(self, movement: Movement) -> str:
+        messages: list[str] = []
+
+        def apply(match: Match) -> None:
+            messages[:] = [self._apply_turn(movement, match)]
+
+        if self._repository.apply_move(movement.matchId, apply) is None:
+            raise MatchNotFoundException(f"Match {movement.matchId} not found")
+
+        self.logger.info("Movement performed", match_id=movement.matchId)
+
+        return messages[0]
+
+    async def move_async(self, movement: Movement) -> str:
+        messages: list[str] = []
+        replies = _Replies()
+
+        def apply(match: Match) -> None:
+            self._check_replies({match.id: match}, replies)
+            messages[:] = [self._apply_turn(movement, match, replies)]
+
+        found = await self._apply_async(
+            [movement],
+            replies,
+            lambda: self._async_repository.apply_move(movement.matchId, apply),
+        )
+        if found is None:
             raise MatchNotFoundException(f"Match {movement.matchId} not found")
 
-        self.logger.info("Movement performed")
+        self.logger.info("Movement performed", match_id=movement.matchId)
+
+        return messages[0]
+
+    def move_many(self, movements: list[Movement]) -> list[str | Exception]:
+        """Applies the movements in order, returning a message or the error
+        raised by each one of them."""
+        results: list[str | Exception] = []
+
+        def apply(matches: dict[UUID, Match]) -> None:
+            # Runs again from scratch if the matches were modified concurrently
+            results[:] = self._apply_movements(movements, matches)
 
-        return message
+        self._repository.apply_moves({m.matchId for m in movements}, apply)
+        self.logger.info("Movements performed", count=len(movements))
+
+        return results
+
+    async def move_many_async(self, movements: list[Movement]) -> list[str | Exception]:
+        results: list[str | Exception] = []
+        replies = _Replies()
+
+        def apply(matches: dict[UUID, Match]) -> None:
+            self._check_replies(matches, replies)
+            results[:] = self._apply_movements(movements, matches, replies)
+
+        await self._apply_async(
+            movements,
+            replies,
+            lambda: self._async_repository.apply_moves(
+                {m.matchId for m in movements}, apply
+            ),
+        )
+        self.logger.info("Movements performed", count=len(movements))
+
+        return results
 
     def get_match_status(self, match_id: UUID) -> Status:
-        if match := self.match_database_repository.get_match(match_id):
+        if match := self._repository.get_match(match_id):
             return match.status
         else:
-            self.logger.info(f"Match not found: {match_id}")
+            self.logger.info("Match not found", match_id=match_id)
             raise MatchNotFoundException(f"Match {match_id} not found")
+
+    async def get_match_status_async(self, match_id: UUID) -> Status:
+        if match := await self._async_repository.get_match(match_id):
+            return match.status
+        else:
+            self.logger.info("Match not found", match_id=match_id)
+            raise MatchNotFoundException(f"Match {match_id} not found")
+
+    def _hinted_match(self, match: Match | None, match_id: UUID) -> Match:
+        if match is None:
+            self.logger.info("Match not found", match_id=match_id)
+            raise MatchNotFoundException(f"Match {match_id} not found")
+
+        if match.status != Status.PLAYING:
+            raise MatchAlreadyEndedException(f"Match {match_id} has already ended")
+
+        return match
+
+    def hint(self, match_id: UUID) -> tuple[int, int]:
+        """Best square for the player whose turn it is."""
+        match = self._repository.get_match(match_id)
+        return self._best_square(self._hinted_match(match, match_id))
+
+    async def hint_async(self, match_id: UUID) -> tuple[int, int]:
+        match = await self._async_repository.get_match(match_id)
+        return await self._best_square_async(self._hinted_match(match, match_id))
+
+    def _validate_query(self, query: MatchQuery) -> None:
+        if not 1 <= query.limit <= self.MAX_PAGE_SIZE:
+            raise PageNotValidException(
+                f"Limit must be between 1 and {self.MAX_PAGE_SIZE}"
+            )
+
+        if query.sort not in SORT_KEYS:
+            raise PageNotValidException(f"Sort must be one of: {list(SORT_KEYS)}")
+
+    def _page(self, query: MatchQuery, matches: list[MatchSummary]) -> MatchPage:
+        # A full page may be followed by an empty one, which is cheaper than
+        # reading one more match on every page to find out
+        if len(matches) < query.limit:
+            return MatchPage(matches, None)
+
+        return MatchPage(matches, matches[-1].key(query.sort))
+
+    def list_matches(self, query: MatchQuery) -> MatchPage:
+        self._validate_query(query)
+        return self._page(query, self._repository.list_matches(query))
+
+    async def list_matches_async(self, query: MatchQuery) -> MatchPage:
+        self._validate_query(query)
+        return self._page(query, await self._async_repository.list_matches(query))
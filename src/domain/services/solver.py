@@ -0,0 +1,309 @@
+"""Best move search over bitboards.
+
+Scores are from the point of view of the player to move (negamax): a win is
+positive, sooner wins score higher, and positions equal under one of the 8
+board symmetries share their transposition table entry.
+
+The 3x3 game is solved once, the best move of every reachable position is
+kept in a table indexed by position, so hints never search. Other boards are
+searched with iterative deepening alpha-beta until a time budget runs out.
+"""
+
+import math
+import time
+from functools import lru_cache
+from typing import Iterator
+
+from src.domain.services.bitboard import Bitboard, line_masks
+
+NO_MOVE = 255
+WIN_SCORE = 1_000_000
+
+
+def _squares(mask: int) -> Iterator[int]:
+    """Indexes of the set bits of `mask`."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+@lru_cache(maxsize=None)
+def symmetries(size: int) -> tuple[tuple[int, ...], ...]:
+    """The square each square moves to with every rotation and reflection."""
+    last = size - 1
+    transforms = (
+        lambda x, y: (x, y),
+        lambda x, y: (y, last - x),
+        lambda x, y: (last - x, last - y),
+        lambda x, y: (last - y, x),
+        lambda x, y: (x, last - y),
+        lambda x, y: (last - x, y),
+        lambda x, y: (y, x),
+        lambda x, y: (last - y, last - x),
+    )
+    permutations = []
+    for transform in transforms:
+        permutation = []
+        for square in range(size * size):
+            x, y = transform(*divmod(square, size))
+            permutation.append(x * size + y)
+        permutations.append(tuple(permutation))
+
+    return tuple(permutations)
+
+
+def _transform(mask: int, permutation: tuple[int, ...]) -> int:
+    result = 0
+    for square in _squares(mask):
+        result |= 1 << permutation[square]
+
+    return result
+
+
+def canonical(me: int, opponent: int, size: int) -> tuple[int, int]:
+    """Smallest of the 8 symmetric versions of the position."""
+    return min(
+        (_transform(me, permutation), _transform(opponent, permutation))
+        for permutation in symmetries(size)
+    )
+
+
+@lru_cache(maxsize=None)
+def _lines_through(size: int, win_length: int) -> tuple[tuple[int, ...], ...]:
+    lines = line_masks(size, win_length)
+    return tuple(
+        tuple(line for line in lines if line >> square & 1)
+        for square in range(size * size)
+    )
+
+
+@lru_cache(maxsize=None)
+def _neighbours(size: int) -> tuple[int, ...]:
+    masks = []
+    for x in range(size):
+        for y in range(size):
+            mask = 0
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    if (dx or dy) and 0 <= x + dx < size and 0 <= y + dy < size:
+                        mask |= 1 << ((x + dx) * size + y + dy)
+            masks.append(mask)
+
+    return tuple(masks)
+
+
+def _wins(mask: int, square: int, lines_through: tuple[tuple[int, ...], ...]) -> bool:
+    return any(mask & line == line for line in lines_through[square])
+
+
+# Base 3 digits of every 3x3 mask, so a position index is two lookups
+_TERNARY = tuple(sum(3**square for square in _squares(mask)) for mask in range(512))
+
+
+def position_index(x: int, o: int) -> int:
+    """Index of a 3x3 position, reading each square as a base 3 digit."""
+    return _TERNARY[x] + 2 * _TERNARY[o]
+
+
+@lru_cache(maxsize=1)
+def perfect_play_table() -> bytes:
+    """Best square of every reachable 3x3 position by `position_index`,
+    `NO_MOVE` for the finished and unreachable ones."""
+    lines_through = _lines_through(3, 3)
+    full = 0b111111111
+    scores: dict[tuple[int, int], int] = {}
+
+    def score(me: int, opponent: int) -> int:
+        key = canonical(me, opponent, 3)
+        if (cached := scores.get(key)) is not None:
+            return cached
+
+        empty = full & ~(me | opponent)
+        best = 0 if not empty else -WIN_SCORE
+        for square in _squares(empty):
+            bit = 1 << square
+            if _wins(me | bit, square, lines_through):
+                # Winning with more empty squares left is a sooner win
+                value = empty.bit_count()
+            else:
+                value = -score(opponent, me | bit)
+            best = max(best, value)
+
+        scores[key] = best
+        return best
+
+    table = bytearray([NO_MOVE]) * 3**9
+    pending = [(0, 0)]
+    while pending:
+        x, o = pending.pop()
+        index = position_index(x, o)
+        if table[index] != NO_MOVE:
+            continue
+
+        me, opponent = (x, o) if x.bit_count() == o.bit_count() else (o, x)
+        best_value, best_square = -math.inf, NO_MOVE
+        for square in _squares(full & ~(x | o)):
+            bit = 1 << square
+            if _wins(me | bit, square, lines_through):
+                value = WIN_SCORE
+            else:
+                value = -score(opponent, me | bit)
+                if (x | o | bit) != full:
+                    pending.append((x | bit, o) if me == x else (x, o | bit))
+            if value > best_value:
+                best_value, best_square = value, square
+
+        table[index] = best_square
+
+    return bytes(table)
+
+
+class _Timeout(Exception):
+    pass
+
+
+class _Search:
+    """Depth-limited alpha-beta search, only trying the empty squares next to
+    the stones already on the board."""
+
+    def __init__(self, size: int, win_length: int, deadline: float):
+        self.size = size
+        self.full = (1 << (size * size)) - 1
+        self.lines = line_masks(size, win_length)
+        self.lines_through = _lines_through(size, win_length)
+        self.neighbours = _neighbours(size)
+        # Value of a line only held by one player, by number of stones in it
+        self.weights = (0,) + tuple(10**count for count in range(1, win_length))
+        self.deadline = deadline
+        self.current_deadline = math.inf
+        # Canonical position -> (depth, score, bound)
+        self.table: dict[tuple[int, int], tuple[int, int, int]] = {}
+
+    def candidates(self, me: int, opponent: int) -> list[int]:
+        occupied = me | opponent
+        if not occupied:
+            return [(self.size // 2) * self.size + self.size // 2]
+
+        mask = 0
+        for square in _squares(occupied):
+            mask |= self.neighbours[square]
+
+        return list(_squares(mask & ~occupied))
+
+    def evaluate(self, me: int, opponent: int) -> int:
+        score = 0
+        for line in self.lines:
+            if not line & opponent:
+                score += self.weights[(line & me).bit_count()]
+            elif not line & me:
+                score -= self.weights[(line & opponent).bit_count()]
+
+        return score
+
+    def negamax(
+        self, me: int, opponent: int, depth: int, alpha: float, beta: float
+    ) -> int:
+        if time.perf_counter() > self.current_deadline:
+            raise _Timeout()
+
+        if me | opponent == self.full:
+            return 0
+
+        if depth == 0:
+            return self.evaluate(me, opponent)
+
+        # Bounds: 0 exact, -1 upper (failed low), 1 lower (failed high)
+        key = canonical(me, opponent, self.size)
+        if (entry := self.table.get(key)) is not None and entry[0] >= depth:
+            _, score, bound = entry
+            if (
+                bound == 0
+                or (bound == 1 and score >= beta)
+                or (bound == -1 and score <= alpha)
+            ):
+                return score
+
+        original_alpha = alpha
+        best = -math.inf
+        for square in self.candidates(me, opponent):
+            bit = 1 << square
+            if _wins(me | bit, square, self.lines_through):
+                value = WIN_SCORE + depth
+            else:
+                value = -self.negamax(opponent, me | bit, depth - 1, -beta, -alpha)
+
+            best = max(best, value)
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        score = int(best)
+        bound = -1 if score <= original_alpha else 1 if score >= beta else 0
+        self.table[key] = (depth, score, bound)
+
+        return score
+
+    def best_move(self, me: int, opponent: int) -> int:
+        moves = self.candidates(me, opponent)
+        if len(moves) == 1:
+            return moves[0]
+
+        for square in moves:
+            if _wins(me | 1 << square, square, self.lines_through):
+                return square
+
+        best_square = moves[0]
+        empty = (self.full & ~(me | opponent)).bit_count()
+        for depth in range(1, empty + 1):
+            # The first depth always completes, so there is always an answer
+            self.current_deadline = math.inf if depth == 1 else self.deadline
+            try:
+                alpha = -math.inf
+                depth_best = best_square
+                for square in moves:
+                    value = -self.negamax(
+                        opponent, me | 1 << square, depth - 1, -WIN_SCORE * 2, -alpha
+                    )
+                    if value > alpha:
+                        alpha, depth_best = value, square
+            except _Timeout:
+                break
+
+            best_square = depth_best
+            # The best move of the last depth is searched first on the next one
+            moves.remove(best_square)
+            moves.insert(0, best_square)
+            if alpha >= WIN_SCORE:
+                break
+
+        return best_square
+
+
+class Solver:
+    """Finds the best square for the player whose turn it is.
+
+    `time_budget` is the seconds a search may take on boards other than 3x3.
+    """
+
+    TIME_BUDGET = 0.05
+
+    def __init__(self, time_budget: float = TIME_BUDGET):
+        self.time_budget = time_budget
+
+    def best_move(self, bitboard: Bitboard, turn: str) -> int:
+        if bitboard.size == 3 and bitboard.win_length == 3:
+            square = perfect_play_table()[position_index(bitboard.x, bitboard.o)]
+            if square != NO_MOVE:
+                return square
+
+        me, opponent = (
+            (bitboard.x, bitboard.o) if turn == "X" else (bitboard.o, bitboard.x)
+        )
+        search = _Search(
+            bitboard.size,
+            bitboard.win_length,
+            time.perf_counter() + self.time_budget,
+        )
+
+        return search.best_move(me, opponent)
@@ -0,0 +1,146 @@
+"""Table of every reachable 3x3 position and the position each move leads to.
+
+The 3x3 game only has 5,478 reachable positions, so the outcome of every
+legal move is precomputed: a move is classified with a few array lookups
+instead of scanning the board. The table is generated from the `Bitboard`
+rules and shipped as `state_table.bin`, regenerate it after changing them:
+
+    python -m src.domain.services.state_table
+
+The file is memory-mapped at import, so worker processes share its pages.
+Layout, little-endian:
+
+    header       magic b"TTT1", uint16 version, uint16 number of states
+    index        uint16 state of every base 3 position index, NO_STATE when
+                 the position is not reachable
+    successors   uint16 state reached by playing each of the 9 squares of
+                 every state, NO_STATE when the square is taken or the
+                 position is finished
+    statuses     uint8 position in STATUSES of the status of every state
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import deque
+
+from src.domain.models.status import Status
+from src.domain.services.bitboard import Bitboard
+from src.domain.services.solver import position_index
+
+PATH = os.path.join(os.path.dirname(__file__), "state_table.bin")
+MAGIC = b"TTT1"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")
+SQUARES = 9
+POSITIONS = 3**SQUARES
+NO_STATE = 0xFFFF
+STATUSES = (Status.PLAYING, Status.WINNER, Status.DRAW)
+
+# Base 3 digit of each square, as in `position_index`
+_DIGITS = {None: 0, "X": 1, "O": 2}
+
+
+def generate() -> bytes:
+    """Builds the table, numbering the states in breadth-first order."""
+    states = {(0, 0): 0}
+    pending = deque([(0, 0)])
+    successors: list[list[int]] = []
+    statuses: list[Status] = []
+    while pending:
+        x, o = pending.popleft()
+        status = Bitboard(3, 3, x, o).status()
+        moves = [NO_STATE] * SQUARES
+        if status == Status.PLAYING:
+            x_turn = x.bit_count() == o.bit_count()
+            for square in range(SQUARES):
+                bit = 1 << square
+                if (x | o) & bit:
+                    continue
+
+                successor = (x | bit, o) if x_turn else (x, o | bit)
+                if successor not in states:
+                    states[successor] = len(states)
+                    pending.append(successor)
+                moves[square] = states[successor]
+
+        successors.append(moves)
+        statuses.append(status)
+
+    index = array("H", [NO_STATE]) * POSITIONS
+    for (x, o), state in states.items():
+        index[position_index(x, o)] = state
+
+    flat = array("H", (state for moves in successors for state in moves))
+    if sys.byteorder != "little":
+        index.byteswap()
+        flat.byteswap()
+
+    return (
+        HEADER.pack(MAGIC, VERSION, len(states))
+        + index.tobytes()
+        + flat.tobytes()
+        + bytes(STATUSES.index(status) for status in statuses)
+    )
+
+
+class StateTable:
+    def __init__(self, data: bytes | mmap.mmap):
+        magic, version, count = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("State table file is not valid, regenerate it")
+
+        view = memoryview(data)
+        index_end = HEADER.size + 2 * POSITIONS
+        successors_end = index_end + 2 * SQUARES * count
+        self.count = count
+        self.index_of = self._uint16(view[HEADER.size : index_end])
+        self.successors = self._uint16(view[index_end:successors_end])
+        self.statuses = view[successors_end : successors_end + count]
+
+    @staticmethod
+    def _uint16(view: memoryview) -> memoryview | array:
+        if sys.byteorder == "little":
+            return view.cast("H")
+
+        # Big-endian machines get a private copy instead of the shared pages
+        values = array("H", view.tobytes())
+        values.byteswap()
+        return values
+
+    @staticmethod
+    def load(path: str = PATH) -> "StateTable":
+        with open(path, "rb") as file:
+            return StateTable(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def index(self, board: list[list[str | None]]) -> int:
+        """State of a 3x3 board, NO_STATE when it is not reachable."""
+        # Unrolled, this runs on every 3x3 movement
+        first, second, third = board
+        digits = _DIGITS
+        return self.index_of[
+            digits[first[0]]
+            + 3 * digits[first[1]]
+            + 9 * digits[first[2]]
+            + 27 * digits[second[0]]
+            + 81 * digits[second[1]]
+            + 243 * digits[second[2]]
+            + 729 * digits[third[0]]
+            + 2187 * digits[third[1]]
+            + 6561 * digits[third[2]]
+        ]
+
+    def successor(self, state: int, square: int) -> int:
+        return self.successors[state * SQUARES + square]
+
+    def status(self, state: int) -> Status:
+        return STATUSES[self.statuses[state]]
+
+
+if __name__ == "__main__":
+    with open(PATH, "wb") as file:
+        file.write(generate())
+else:
+    STATE_TABLE = StateTable.load()
@@ -0,0 +1,42 @@
+"""Opaque cursors of the match listings.
+
+A cursor holds the sort column and the key of the last match of a page, the
+next page starts right after it. Clients must not build or parse them.
+"""
+
+import base64
+import binascii
+import struct
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from src.domain.exception.errors import PageNotValidException
+from src.domain.models.match_page import SORT_KEYS
+
+# Sort column position in SORT_KEYS, microseconds since the epoch, match id
+_CURSOR = struct.Struct(">Bq16s")
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def encode_cursor(sort: str, key: tuple[datetime, UUID]) -> str:
+    timestamp, match_id = key
+    data = _CURSOR.pack(
+        SORT_KEYS.index(sort), (timestamp - _EPOCH) // _MICROSECOND, match_id.bytes
+    )
+
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple[datetime, UUID]:
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_index, microseconds, match_id = _CURSOR.unpack(data)
+        key = _EPOCH + microseconds * _MICROSECOND, UUID(bytes=match_id)
+    except (binascii.Error, struct.error, ValueError, OverflowError):
+        raise PageNotValidException("Cursor is not valid")
+
+    if sort_index >= len(SORT_KEYS) or SORT_KEYS[sort_index] != sort:
+        raise PageNotValidException("Cursor was made for another sort")
+
+    return key
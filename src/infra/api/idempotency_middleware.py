@@ -0,0 +1,207 @@
+import hashlib
+import json
+
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.domain.exception.errors import (
+    IdempotencyKeyInProgressException,
+    IdempotencyKeyNotValidException,
+    IdempotencyKeyReusedException,
+    IdempotencyResponseNotKeptException,
+)
+from src.infra.api.routers import to_http_exception
+from src.infra.entities.idempotency_key_db import MAX_KEY_LENGTH
+from src.infra.metrics.metrics import IDEMPOTENT_REQUESTS
+from src.infra.repositories.idempotency_store import IdempotencyStore, StoredResponse
+
+HEADER = b"idempotency-key"
+# Requests changing matches, the others can be retried as they are
+ROUTES = {
+    ("GET", "/create"),
+    ("POST", "/create"),
+    ("POST", "/move"),
+    ("POST", "/moves"),
+}
+# Move conflicts, besides server errors, are worth running again
+RETRYABLE_STATUS = 409
+
+
+def _key(value: bytes) -> str:
+    try:
+        key = value.decode("ascii")
+    except UnicodeDecodeError:
+        key = ""
+
+    if not 0 < len(key) <= MAX_KEY_LENGTH or not key.isprintable():
+        raise IdempotencyKeyNotValidException(
+            f"Idempotency-Key must have 1 to {MAX_KEY_LENGTH} printable ASCII characters"
+        )
+
+    return key
+
+
+def _fingerprint(scope: Scope, body: bytes) -> bytes:
+    return hashlib.sha256(
+        b"\0".join(
+            (
+                scope["method"].encode(),
+                scope["path"].encode(),
+                scope["query_string"],
+                body,
+            )
+        )
+    ).digest()
+
+
+async def _read_body(receive: Receive) -> bytes | None:
+    """Whole request body, None if the client went away before sending it."""
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+def _not_kept(fingerprint: bytes) -> StoredResponse:
+    http_exception = to_http_exception(
+        IdempotencyResponseNotKeptException(
+            "The request with this idempotency key was already run, its "
+            + "response is too large to be replayed"
+        )
+    )
+    return StoredResponse(
+        fingerprint,
+        http_exception.status_code,
+        "application/json",
+        json.dumps({"detail": http_exception.detail}).encode(),
+    )
+
+
+def _set_route(scope: Scope) -> None:
+    # Replays and rejections do not reach the router, MetricsMiddleware labels
+    # them with the route found here
+    for route in scope["app"].router.routes:
+        if route.matches(scope)[0] == Match.FULL:
+            scope["route"] = route
+            return
+
+
+class IdempotencyMiddleware:
+    """Honors the Idempotency-Key header of the requests changing matches.
+
+    The first request with a key runs, its response is stored and replayed to
+    the later requests with the same key, with an Idempotent-Replayed header.
+    Server errors and move conflicts are not stored, the key is released so
+    the request can be retried. Responses too large to be kept, like those of
+    big bulk creations, are replaced by an error for their retries, which
+    must not create the matches again. See `IdempotencyStore`.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or (scope["method"], scope["path"]) not in ROUTES:
+            await self.app(scope, receive, send)
+            return
+
+        value = dict(scope["headers"]).get(HEADER)
+        # None with IDEMPOTENCY_CACHE_SIZE=0, or before the lifespan ran
+        store: IdempotencyStore | None = getattr(
+            scope["app"].state, "idempotency", None
+        )
+        if value is None or store is None:
+            await self.app(scope, receive, send)
+            return
+
+        if (body := await _read_body(receive)) is None:
+            return
+
+        _set_route(scope)
+        fingerprint = _fingerprint(scope, body)
+        try:
+            key = _key(value)
+            response = await store.begin(key, fingerprint)
+        except (
+            IdempotencyKeyNotValidException,
+            IdempotencyKeyReusedException,
+            IdempotencyKeyInProgressException,
+        ) as e:
+            IDEMPOTENT_REQUESTS.labels("rejected").inc()
+            http_exception = to_http_exception(e)
+            await JSONResponse(
+                {"detail": http_exception.detail}, http_exception.status_code
+            )(scope, receive, send)
+            return
+
+        if response is not None:
+            IDEMPOTENT_REQUESTS.labels("replayed").inc()
+            headers = {"idempotent-replayed": "true"}
+            if response.content_type is not None:
+                headers["content-type"] = response.content_type
+            await Response(response.body, response.status_code, headers)(
+                scope, receive, send
+            )
+            return
+
+        IDEMPOTENT_REQUESTS.labels("executed").inc()
+        await self._run(store, key, fingerprint, body, scope, receive, send)
+
+    async def _run(
+        self,
+        store: IdempotencyStore,
+        key: str,
+        fingerprint: bytes,
+        body: bytes,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        """Runs the request and stores its response, sent to the client as
+        it is produced."""
+        body_sent = False
+        status = 500
+        content_type: str | None = None
+        chunks: list[bytes] = []
+        size = 0
+
+        async def receive_body() -> Message:
+            nonlocal body_sent
+            if body_sent:
+                return await receive()
+
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send_and_keep(message: Message) -> None:
+            nonlocal status, content_type, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if (value := dict(message["headers"]).get(b"content-type")) is not None:
+                    content_type = value.decode("latin-1")
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+                if size <= store.settings.max_body:
+                    chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_body, send_and_keep)
+        except BaseException:
+            await store.release(key)
+            raise
+
+        if status >= 500 or status == RETRYABLE_STATUS:
+            await store.release(key)
+        elif size > store.settings.max_body:
+            await store.complete(key, _not_kept(fingerprint))
+        else:
+            await store.complete(
+                key, StoredResponse(fingerprint, status, content_type, b"".join(chunks))
+            )
@@ -0,0 +1,161 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from fastapi import FastAPI
+
+from src.domain.exception.errors import WorkersNotValidException
+from src.domain.services.solver import perfect_play_table
+from src.infra.database.archiver import ArchiveSettings, MatchArchiver
+from src.infra.database.engine import (
+    PoolSettings,
+    create_async_database_engine,
+    create_async_session_factory,
+    get_database_url,
+    warm_up_async,
+)
+from src.infra.metrics.metrics import watch_cache
+from src.infra.metrics.workers import WORKER_GAUGES
+from src.infra.repositories.cached_repository import CacheSettings, MatchCache
+from src.infra.repositories.idempotency_store import (
+    MEMORY_STORE,
+    POSTGRESQL_STORE,
+    IdempotencySettings,
+    IdempotencyStore,
+    PostgreSQLKeys,
+)
+from src.infra.repositories.match_log import DurabilitySettings
+from src.infra.repositories.sharded_memory_repository import (
+    AsyncShardedInMemoryRepository,
+    MemorySettings,
+    ShardedInMemoryRepository,
+)
+from src.infra.settings import env_int
+from src.logging.logging_service import LoggingService
+
+MEMORY_REPOSITORY = "memory"
+
+
+async def take_snapshots(
+    repository: ShardedInMemoryRepository, interval: float
+) -> None:
+    """Snapshots the matches every `interval` seconds until cancelled, so the
+    log replayed on start stays short."""
+    logger = LoggingService()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            # Encoding every match takes a while, not on the event loop
+            await asyncio.to_thread(repository.snapshot)
+        except OSError as e:
+            # The log keeps growing until the next one succeeds
+            logger.warning("Error writing the matches snapshot: %s", e)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Creates the engine and connection pool once per worker process.
+
+    The schema is not created here, it is managed by the Alembic migrations.
+    With MATCH_REPOSITORY=memory no database is used at all, matches only live
+    in the worker process, so it must be the only one: it does not start with
+    WEB_CONCURRENCY over 1. With MEMORY_DATA_DIR they are also logged there,
+    and recovered on start.
+    """
+    # Solved before serving so 3x3 hints never search, gunicorn solves it in
+    # the master once for all the workers
+    perfect_play_table()
+    # Gunicorn already gave the worker its slot, a lone process uses the first
+    WORKER_GAUGES.claim()
+
+    idempotency_settings = IdempotencySettings.from_env()
+    app.state.idempotency = None
+
+    if os.getenv("MATCH_REPOSITORY") == MEMORY_REPOSITORY:
+        if (workers := env_int("WEB_CONCURRENCY", 1)) > 1:
+            # Each worker would have its own matches, not found by the others
+            raise WorkersNotValidException(
+                f"MATCH_REPOSITORY={MEMORY_REPOSITORY} needs a single worker, "
+                + f"not WEB_CONCURRENCY={workers}"
+            )
+
+        app.state.session_factory = None
+        app.state.match_cache = None
+        durability = DurabilitySettings.from_env()
+        repository = (
+            ShardedInMemoryRepository.open(
+                LoggingService(), MemorySettings.from_env(), durability
+            )
+            if durability.directory
+            else ShardedInMemoryRepository(LoggingService(), MemorySettings.from_env())
+        )
+        app.state.memory_repository = AsyncShardedInMemoryRepository(repository)
+        if idempotency_settings.size:
+            app.state.idempotency = IdempotencyStore(
+                idempotency_settings, LoggingService()
+            )
+
+        snapshots = None
+        if repository.log is not None and durability.snapshot_interval > 0:
+            snapshots = asyncio.create_task(
+                take_snapshots(repository, durability.snapshot_interval)
+            )
+
+        yield
+
+        if snapshots is not None:
+            snapshots.cancel()
+        await asyncio.to_thread(repository.close)
+        return
+
+    settings = PoolSettings.from_env()
+    engine = create_async_database_engine(get_database_url(), settings)
+
+    if settings.warmup > 0:
+        await warm_up_async(engine, min(settings.warmup, settings.size))
+
+    app.state.session_factory = create_async_session_factory(engine)
+
+    cache_settings = CacheSettings.from_env()
+    app.state.match_cache = MatchCache(cache_settings) if cache_settings.size else None
+    if app.state.match_cache is not None:
+        watch_cache("match", app.state.match_cache)
+        if cache_settings.playing and env_int("WEB_CONCURRENCY", 1) > 1:
+            LoggingService().warning(
+                "Playing matches are cached in each worker process, the others "
+                + "may read them up to MATCH_CACHE_TTL seconds stale"
+            )
+
+    if idempotency_settings.size:
+        if (
+            idempotency_settings.store == MEMORY_STORE
+            and env_int("WEB_CONCURRENCY", 1) > 1
+        ):
+            LoggingService().warning(
+                "Idempotent responses are only kept in each worker process, "
+                + "retries reaching another worker run again"
+            )
+        keys = (
+            PostgreSQLKeys(app.state.session_factory, idempotency_settings)
+            if idempotency_settings.store == POSTGRESQL_STORE
+            else None
+        )
+        app.state.idempotency = IdempotencyStore(
+            idempotency_settings, LoggingService(), keys
+        )
+
+    archive_settings = ArchiveSettings.from_env()
+    archiver = None
+    if archive_settings.interval > 0:
+        archiver = asyncio.create_task(
+            MatchArchiver(
+                app.state.session_factory, LoggingService(), archive_settings
+            ).run()
+        )
+
+    yield
+
+    if archiver is not None:
+        archiver.cancel()
+    await engine.dispose()
@@ -0,0 +1,42 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.infra.metrics.metrics import REQUEST_LATENCY
+from src.infra.metrics.workers import WORKER_GAUGES
+
+
+class MetricsMiddleware:
+    """Records the latency of every HTTP request, labelled with the route
+    template (e.g. /status/{matchId}) so match ids do not become labels, and
+    the requests in flight of the worker."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        WORKER_GAUGES.add("in_flight", 1)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            WORKER_GAUGES.add("in_flight", -1)
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                str(status),
+            ).observe(time.perf_counter() - started)
@@ -1,6 +1,10 @@
 from typing import Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from src.domain.services.match_service import MatchService
+
+MAX_BULK_MATCHES = 100_000
 
 
 class Square(BaseModel):
@@ -12,3 +16,9 @@ class MovementRequest(BaseModel):
     matchId: str
     playerId: Literal["X", "O", "x", "o"]
     square: Square
+
+
+class CreateMatchesRequest(BaseModel):
+    count: int = Field(gt=0, le=MAX_BULK_MATCHES)
+    boardSize: int = MatchService.DEFAULT_BOARD_SIZE
+    winLength: int | None = None
@@ -1,46 +1,91 @@
-import logging
-import sys
+import json
+from datetime import datetime, timezone
+from typing import Annotated, AsyncIterator, Literal
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
 from src.application.create_match_usecase import CreateMatchUseCase
+from src.application.create_matches_usecase import CreateMatchesUseCase
+from src.application.get_hint_usecase import GetHintUseCase
 from src.application.get_match_status_usecase import GetMatchStatusUseCase
+from src.application.list_matches_usecase import ListMatchesUseCase
 from src.application.make_movement_usecase import MakeMovementUseCase
+from src.application.make_movements_usecase import MakeMovementsUseCase
 from src.domain.exception.errors import (
+    BoardNotValidException,
     DatabaseEnvVarNotSetException,
     DatabaseGetMatchException,
     DatabaseMatchNotFoundException,
+    DatabaseMoveConflictException,
     DatabaseSaveMatchException,
     DatabaseUpdateMatchException,
+    IdempotencyKeyInProgressException,
+    IdempotencyKeyNotValidException,
+    IdempotencyKeyReusedException,
+    IdempotencyResponseNotKeptException,
     MatchAlreadyEndedException,
     MatchNotFoundException,
+    PageNotValidException,
     PlayerNotValidException,
     SquareNotAvailableException,
     SquareNotValidException,
     SquareOutOfBoundsException,
     TurnNotValidException,
 )
+from src.domain.models.match_page import MatchQuery, MatchSummary
 from src.domain.models.movement import Movement
-from src.infra.api.models import MovementRequest
-from src.infra.repositories.postgresql_repository import PostgreSQLRepository
+from src.domain.models.status import Status
+from src.domain.repositories.async_match_database_repository import (
+    AsyncMatchDatabaseRepository,
+)
+from src.domain.services.match_service import MatchService
+from src.infra.api.cursors import decode_cursor, encode_cursor
+from src.infra.api.models import CreateMatchesRequest, MovementRequest
+from src.infra.repositories.async_postgresql_repository import (
+    AsyncPostgreSQLRepository,
+)
+from src.infra.metrics.metrics import REGISTRY, count_exception
+from src.infra.repositories.cached_repository import AsyncCachedMatchRepository
+from src.infra.repositories.instrumented_repository import (
+    AsyncInstrumentedMatchRepository,
+)
 from src.logging.logging_service import LoggingService
 
 router = APIRouter()
 
+MAX_BATCH_MOVEMENTS = 10_000
+DEFAULT_PAGE_SIZE = 50
+# Sort parameter of GET /matches to MatchQuery.sort
+SORTS = {"updatedAt": "updated_at", "createdAt": "created_at"}
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.StreamHandler(sys.stderr)],
-)
 
 logger = LoggingService()
 
 
+async def get_match_repository(request: Request) -> AsyncMatchDatabaseRepository:
+    # No session factory when running with MATCH_REPOSITORY=memory
+    if request.app.state.session_factory is None:
+        return AsyncInstrumentedMatchRepository(request.app.state.memory_repository)
+
+    repository: AsyncMatchDatabaseRepository = AsyncInstrumentedMatchRepository(
+        AsyncPostgreSQLRepository(
+            logger=logger, session_factory=request.app.state.session_factory
+        )
+    )
+    if (match_cache := request.app.state.match_cache) is not None:
+        repository = AsyncCachedMatchRepository(repository, match_cache)
+
+    return repository
+
+
 def to_http_exception(exception: Exception) -> HTTPException:
+    count_exception(exception)
+
     if (
         isinstance(exception, PlayerNotValidException)
+        or isinstance(exception, BoardNotValidException)
         or isinstance(exception, SquareNotValidException)
         or isinstance(exception, MatchAlreadyEndedException)
         or isinstance(exception, TurnNotValidException)
@@ -49,6 +94,8 @@ def to_http_exception(exception: Exception) -> HTTPException:
         or isinstance(exception, DatabaseSaveMatchException)
         or isinstance(exception, DatabaseUpdateMatchException)
         or isinstance(exception, DatabaseGetMatchException)
+        or isinstance(exception, PageNotValidException)
+        or isinstance(exception, IdempotencyKeyNotValidException)
     ):
         return HTTPException(status_code=400, detail=exception.message)
 
@@ -59,58 +106,269 @@ def to_http_exception(exception: Exception) -> HTTPException:
     ):
         return HTTPException(status_code=404, detail=exception.message)
 
+    if isinstance(exception, DatabaseMoveConflictException) or isinstance(
+        exception, IdempotencyKeyInProgressException
+    ):
+        return HTTPException(status_code=409, detail=exception.message)
+
+    if isinstance(exception, IdempotencyKeyReusedException) or isinstance(
+        exception, IdempotencyResponseNotKeptException
+    ):
+        return HTTPException(status_code=422, detail=exception.message)
+
     return HTTPException(status_code=500, detail="Internal server error")
 
 
+def to_movement(movement: MovementRequest) -> Movement:
+    return Movement(
+        matchId=UUID(movement.matchId),
+        playerId=movement.playerId,
+        square={"x": movement.square.x, "y": movement.square.y},
+    )
+
+
+def to_utc(value: datetime | None) -> datetime | None:
+    """Naive UTC, like the stored timestamps. Naive values are taken as UTC."""
+    if value is None or value.tzinfo is None:
+        return value
+
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def to_match_item(match: MatchSummary) -> dict:
+    item = {
+        "matchId": match.id,
+        "status": match.status,
+        "turn": match.turn,
+        "boardSize": match.board_size,
+        "winLength": match.win_length,
+        "moveCount": match.move_count,
+        "computer": match.computer,
+        "createdAt": match.created_at,
+        "updatedAt": match.updated_at,
+    }
+    if match.board is not None:
+        item["board"] = match.board
+
+    return item
+
+
+def to_error_result(exception: Exception) -> dict:
+    http_exception = to_http_exception(exception)
+    return {"status_code": http_exception.status_code, "detail": http_exception.detail}
+
+
 @router.get("/create")
-def create_match() -> dict:
+async def create_match(
+    boardSize: int = MatchService.DEFAULT_BOARD_SIZE,
+    winLength: int | None = None,
+    computer: str | None = None,
+    match_database_repository: AsyncMatchDatabaseRepository = Depends(
+        get_match_repository
+    ),
+) -> dict:
     logger.info("Create match request received")
 
     try:
-        match = CreateMatchUseCase(
-            match_database_repository=PostgreSQLRepository(logger=logger),
+        match = await CreateMatchUseCase(
+            match_database_repository=match_database_repository,
             logger=logger,
-        ).run()
+        ).run_async(board_size=boardSize, win_length=winLength, computer=computer)
     except Exception as e:
         raise to_http_exception(e)
 
-    return {
+    response = {
         "matchId": match.id,
         "turn": match.turn,
     }
+    # The computer may have played first
+    if match.computer is not None:
+        response["board"] = match.board
 
+    return response
 
-@router.post("/move")
-def move(movement: MovementRequest) -> dict:
-    logger.info(f"New movement request received: {movement}")
+
+@router.post("/create")
+async def create_matches(
+    request: CreateMatchesRequest,
+    match_database_repository: AsyncMatchDatabaseRepository = Depends(
+        get_match_repository
+    ),
+) -> StreamingResponse:
+    logger.info("Create matches request received", count=request.count)
 
     try:
-        message = MakeMovementUseCase(
-            match_database_repository=PostgreSQLRepository(logger=logger),
+        batches = CreateMatchesUseCase(
+            match_database_repository=match_database_repository,
             logger=logger,
-        ).run(
-            movement=Movement(
-                matchId=UUID(movement.matchId),
-                playerId=movement.playerId,
-                square={"x": movement.square.x, "y": movement.square.y},
-            )
+        ).run_async(
+            count=request.count,
+            board_size=request.boardSize,
+            win_length=request.winLength,
         )
     except Exception as e:
         raise to_http_exception(e)
 
+    # One JSON object per line, sent as soon as each batch is committed. If a
+    # batch fails, the last line is the error and the rest are not created.
+    async def ndjson() -> AsyncIterator[str]:
+        try:
+            async for matches in batches:
+                yield "".join(
+                    json.dumps({"matchId": str(match.id), "turn": match.turn}) + "\n"
+                    for match in matches
+                )
+        except Exception as e:
+            yield json.dumps(to_error_result(e)) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@router.post("/move")
+async def move(
+    movement: MovementRequest,
+    match_database_repository: AsyncMatchDatabaseRepository = Depends(
+        get_match_repository
+    ),
+) -> dict:
+    logger.info("New movement request received", match_id=movement.matchId)
+
+    try:
+        message = await MakeMovementUseCase(
+            match_database_repository=match_database_repository,
+            logger=logger,
+        ).run_async(movement=to_movement(movement))
+    except Exception as e:
+        raise to_http_exception(e)
+
     return {"message": message}
 
 
+@router.post("/moves")
+async def moves(
+    movements: Annotated[list[MovementRequest], Body(max_length=MAX_BATCH_MOVEMENTS)],
+    match_database_repository: AsyncMatchDatabaseRepository = Depends(
+        get_match_repository
+    ),
+) -> dict:
+    logger.info("Movement requests received", count=len(movements))
+
+    # Each item gets either {"message": ...} or the error /move would respond
+    results: list[dict] = [{} for _ in movements]
+    indexes: list[int] = []
+    domain_movements: list[Movement] = []
+    for index, movement in enumerate(movements):
+        try:
+            domain_movements.append(to_movement(movement))
+            indexes.append(index)
+        except Exception as e:
+            results[index] = to_error_result(e)
+
+    try:
+        outcomes = await MakeMovementsUseCase(
+            match_database_repository=match_database_repository,
+            logger=logger,
+        ).run_async(movements=domain_movements)
+    except Exception as e:
+        raise to_http_exception(e)
+
+    for index, outcome in zip(indexes, outcomes):
+        results[index] = (
+            {"message": outcome}
+            if isinstance(outcome, str)
+            else to_error_result(outcome)
+        )
+
+    return {"results": results}
+
+
+@router.get("/matches")
+async def list_matches(
+    status: Status | None = None,
+    createdFrom: datetime | None = None,
+    createdTo: datetime | None = None,
+    updatedFrom: datetime | None = None,
+    updatedTo: datetime | None = None,
+    sort: Literal["updatedAt", "createdAt"] = "updatedAt",
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    includeBoard: bool = False,
+    match_database_repository: AsyncMatchDatabaseRepository = Depends(
+        get_match_repository
+    ),
+) -> dict:
+    logger.info("List matches request received", limit=limit)
+
+    try:
+        query = MatchQuery(
+            status=status,
+            created_from=to_utc(createdFrom),
+            created_to=to_utc(createdTo),
+            updated_from=to_utc(updatedFrom),
+            updated_to=to_utc(updatedTo),
+            sort=SORTS[sort],
+            after=None if cursor is None else decode_cursor(cursor, SORTS[sort]),
+            limit=limit,
+            include_board=includeBoard,
+        )
+        page = await ListMatchesUseCase(
+            match_database_repository=match_database_repository,
+            logger=logger,
+        ).run_async(query=query)
+    except Exception as e:
+        raise to_http_exception(e)
+
+    # Newest first, the next page holds older matches
+    return {
+        "matches": [to_match_item(match) for match in page.matches],
+        "nextCursor": (
+            None if page.next is None else encode_cursor(query.sort, page.next)
+        ),
+    }
+
+
 @router.get("/status/{matchId}")
-def match_status(matchId: UUID) -> dict:
-    logger.info(f"Get match status request received: {matchId}")
+async def match_status(
+    matchId: UUID,
+    match_database_repository: AsyncMatchDatabaseRepository = Depends(
+        get_match_repository
+    ),
+) -> dict:
+    logger.info("Get match status request received", match_id=matchId)
 
     try:
-        status = GetMatchStatusUseCase(
-            match_database_repository=PostgreSQLRepository(logger=logger),
+        status = await GetMatchStatusUseCase(
+            match_database_repository=match_database_repository,
             logger=logger,
-        ).run(match_id=matchId)
+        ).run_async(match_id=matchId)
     except Exception as e:
         raise to_http_exception(e)
 
     return {"status": status}
+
+
+@router.get("/hint/{matchId}")
+async def hint(
+    matchId: UUID,
+    match_database_repository: AsyncMatchDatabaseRepository = Depends(
+        get_match_repository
+    ),
+) -> dict:
+    logger.info("Hint request received", match_id=matchId)
+
+    try:
+        x, y = await GetHintUseCase(
+            match_database_repository=match_database_repository,
+            logger=logger,
+        ).run_async(match_id=matchId)
+    except Exception as e:
+        raise to_http_exception(e)
+
+    return {"square": {"x": x, "y": y}}
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
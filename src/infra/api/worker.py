@@ -0,0 +1,8 @@
+from uvicorn_worker import UvicornWorker
+
+
+class FastUvicornWorker(UvicornWorker):
+    """Uvicorn worker for gunicorn running the uvloop event loop and the
+    httptools HTTP parser, both C implementations."""
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools", "lifespan": "on"}
@@ -0,0 +1,280 @@
+"""Statistics of every match, live and archived, read from the database.
+
+Win rates, draw ratio, first-move advantage, game length and openings, for
+each board size and win length and for each kind of opponent:
+
+    python -m src.infra.database.analytics --output analytics.json
+
+Matches are read in id order through a server-side cursor, `chunk_size` rows
+at a time, and only their counts are kept, so the memory used does not depend
+on the number of matches. Each cursor is closed after `cursor_rows` rows,
+ending its transaction so no snapshot is held for the whole run, and the next
+one starts after the last id read.
+
+The counts and the last id read are written to the output file after every
+chunk, `--resume` carries on from there after an interruption. Matches
+archived during a run may be counted twice or missed, and playing matches are
+counted as of their last snapshot.
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+from operator import itemgetter
+from pathlib import Path
+from typing import Iterator, Sequence
+from uuid import UUID
+
+from sqlalchemy import Engine, Row
+
+from src.domain.logging.logger_interface import LoggerInterface
+from src.domain.models.status import Status
+from src.infra.database.engine import (
+    PoolSettings,
+    create_database_engine,
+    get_database_url,
+)
+from src.infra.entities.match_db import (
+    TURNS,
+    ArchivedMatchDB,
+    MatchColumns,
+    MatchDB,
+)
+from src.infra.repositories.match_statements import statistics_statement
+from src.logging.logging_service import LoggingService
+
+TABLES: dict[str, type[MatchColumns]] = {
+    "matches": MatchDB,
+    "matches_archive": ArchivedMatchDB,
+}
+
+# Positions in the `statistics_statement` rows. Counted as they are read, the
+# codes are only named in the summary
+OUTCOME_KEY = itemgetter(1, 2, 3, 4, 5, 6)
+OPENING_KEY = itemgetter(1, 2, 7, 8, 4, 5, 6)
+
+PLAYING = MatchColumns.status_to_code(Status.PLAYING)
+WINNER = MatchColumns.status_to_code(Status.WINNER)
+
+
+def _outcome(status: int, turn: int) -> str:
+    """ "X" or "O" for the winner, "draw" or "playing"."""
+    if status == WINNER:
+        # The turn passes to the other player after the winning move
+        return TURNS[1 - turn]
+
+    return "playing" if status == PLAYING else "draw"
+
+
+def _opponent(computer: int | None) -> str:
+    return "human" if computer is None else f"computer {TURNS[computer]}"
+
+
+def _rates(counts: Counter) -> dict:
+    finished = counts["X"] + counts["O"] + counts["draw"]
+    rates: dict = {
+        "matches": finished + counts["playing"],
+        "playing": counts["playing"],
+        "finished": finished,
+        "x_wins": counts["X"],
+        "o_wins": counts["O"],
+        "draws": counts["draw"],
+    }
+    if finished:
+        rates.update(
+            x_win_rate=round(counts["X"] / finished, 4),
+            o_win_rate=round(counts["O"] / finished, 4),
+            draw_ratio=round(counts["draw"] / finished, 4),
+            # X always plays first
+            first_move_advantage=round((counts["X"] - counts["O"]) / finished, 4),
+            average_moves=round(counts["moves"] / finished, 2),
+        )
+
+    return rates
+
+
+class MatchStatistics:
+    """Counts of the matches read so far and where each table was left."""
+
+    def __init__(self) -> None:
+        # Last id read of each table, or True once it was read to the end
+        self.progress: dict[str, str | bool | None] = {table: None for table in TABLES}
+        self.rows = 0
+        # Matches by board size, win length, computer, status, turn and moves
+        self.outcomes: Counter[tuple] = Counter()
+        # Matches by board size, win length, first square, status, turn and
+        # moves
+        self.openings: Counter[tuple] = Counter()
+
+    def after(self, table: str) -> UUID | None:
+        after = self.progress[table]
+        return UUID(after) if isinstance(after, str) else None
+
+    def done(self, table: str) -> bool:
+        return self.progress[table] is True
+
+    def add(self, table: str, rows: Sequence[Row]) -> None:
+        self.rows += len(rows)
+        self.outcomes.update(map(OUTCOME_KEY, rows))
+        # Matches started before the moves were stored have no opening
+        self.openings.update(OPENING_KEY(row) for row in rows if row[7] is not None)
+        self.progress[table] = rows[-1][0]
+
+    def finish(self, table: str) -> None:
+        self.progress[table] = True
+
+    def summary(self) -> dict:
+        variants: dict[tuple[int, int], dict[str, Counter]] = {}
+        for key, count in self.outcomes.items():
+            size, win_length, computer, status, turn, moves = key
+            outcome = _outcome(status, turn)
+            opponents = variants.setdefault((size, win_length), {})
+            for name in ("all", _opponent(computer)):
+                counts = opponents.setdefault(name, Counter())
+                counts[outcome] += count
+                if outcome != "playing":
+                    counts["moves"] += moves * count
+
+        openings: dict[tuple[int, int], dict[tuple[int, int], Counter]] = {}
+        for key, count in self.openings.items():
+            size, win_length, x, y, status, turn, moves = key
+            outcome = _outcome(status, turn)
+            squares = openings.setdefault((size, win_length), {})
+            counts = squares.setdefault((x, y), Counter())
+            counts[outcome] += count
+            if outcome != "playing":
+                counts["moves"] += moves * count
+
+        summary = {}
+        for (size, win_length), opponents in sorted(variants.items()):
+            squares = openings.get((size, win_length), {})
+            summary[f"{size}x{size}, {win_length} in a row"] = {
+                **_rates(opponents.pop("all")),
+                "opponents": {
+                    name: _rates(counts) for name, counts in sorted(opponents.items())
+                },
+                "openings": [
+                    {"square": [x, y], **_rates(counts)}
+                    for (x, y), counts in sorted(
+                        squares.items(), key=lambda item: -item[1].total()
+                    )
+                ],
+            }
+
+        return summary
+
+    def to_dict(self) -> dict:
+        return {
+            "progress": self.progress,
+            "rows": self.rows,
+            "outcomes": [[*key, count] for key, count in self.outcomes.items()],
+            "openings": [[*key, count] for key, count in self.openings.items()],
+            "summary": self.summary(),
+        }
+
+    @staticmethod
+    def from_dict(data: dict) -> "MatchStatistics":
+        statistics = MatchStatistics()
+        statistics.progress.update(data["progress"])
+        statistics.rows = data["rows"]
+        statistics.outcomes.update(
+            {tuple(entry[:-1]): entry[-1] for entry in data["outcomes"]}
+        )
+        statistics.openings.update(
+            {tuple(entry[:-1]): entry[-1] for entry in data["openings"]}
+        )
+        return statistics
+
+
+def write_atomically(path: Path, data: dict) -> None:
+    """Replaces the file at once, an interruption leaves the previous one."""
+    partial = path.with_name(path.name + ".partial")
+    partial.write_text(json.dumps(data, indent=2))
+    os.replace(partial, path)
+
+
+def read_table(
+    engine: Engine,
+    table: str,
+    statistics: MatchStatistics,
+    logger: LoggerInterface,
+    chunk_size: int,
+    cursor_rows: int,
+) -> Iterator[None]:
+    """Counts the rest of `table`, yielding after every chunk."""
+    while not statistics.done(table):
+        read = 0
+        with engine.connect() as connection:
+            result = connection.execution_options(yield_per=chunk_size).execute(
+                statistics_statement(
+                    TABLES[table], statistics.after(table), cursor_rows
+                )
+            )
+            for rows in result.partitions():
+                statistics.add(table, rows)
+                read += len(rows)
+                yield
+
+        if read < cursor_rows:
+            statistics.finish(table)
+            yield
+
+        logger.info("Matches counted", table=table, rows=statistics.rows)
+
+
+def collect(
+    engine: Engine,
+    statistics: MatchStatistics,
+    output: Path,
+    logger: LoggerInterface,
+    chunk_size: int = 10_000,
+    cursor_rows: int = 1_000_000,
+) -> MatchStatistics:
+    """Counts the matches not counted yet, saving them to `output` after
+    every chunk."""
+    for table in TABLES:
+        for _ in read_table(engine, table, statistics, logger, chunk_size, cursor_rows):
+            write_atomically(output, statistics.to_dict())
+
+    return statistics
+
+
+def main(arguments: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.infra.database.analytics")
+    parser.add_argument("--output", type=Path, default=Path("analytics.json"))
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="carry on from the progress saved in the output file",
+    )
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument(
+        "--cursor-rows", type=int, default=1_000_000, help="rows read per transaction"
+    )
+    args = parser.parse_args(arguments)
+
+    statistics = MatchStatistics()
+    if args.resume and args.output.exists():
+        statistics = MatchStatistics.from_dict(json.loads(args.output.read_text()))
+
+    engine = create_database_engine(get_database_url(), PoolSettings(size=1))
+    try:
+        collect(
+            engine,
+            statistics,
+            args.output,
+            LoggingService(),
+            args.chunk_size,
+            args.cursor_rows,
+        )
+    finally:
+        engine.dispose()
+
+    print(json.dumps(statistics.summary(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""Moves the finished matches from `matches` to `matches_archive`, and their
+moves from `moves` to `moves_archive`.
+
+Only playing and recently finished matches stay in `matches`, so its heap and
+indexes stay small enough to be kept in memory whatever the history size.
+The repositories look up `matches_archive` when a match is not in `matches`.
+
+Matches are moved in small batches, one short transaction each, so the row
+locks are only held for a few milliseconds. The API runs it in the background
+every ARCHIVE_INTERVAL seconds, it can also be run from a scheduled job:
+
+    python -m src.infra.database.archiver
+"""
+
+import asyncio
+import sys
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import cast
+
+from sqlalchemy import CursorResult, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.domain.logging.logger_interface import LoggerInterface
+from src.infra.database.engine import (
+    PoolSettings,
+    create_async_database_engine,
+    create_async_session_factory,
+    get_database_url,
+)
+from src.infra.repositories.match_statements import archive_matches_statement
+from src.infra.settings import env_float, env_int
+from src.logging.logging_service import LoggingService
+
+
+@dataclass(frozen=True)
+class ArchiveSettings:
+    """`interval` 0 disables the background archiver. Matches finished less
+    than `min_age` seconds ago are kept, their players may still read them."""
+
+    interval: float = 0.0
+    batch_size: int = 1_000
+    min_age: float = 300.0
+    # Longest wait for a lock before giving up on a batch
+    lock_timeout_ms: int = 100
+    # Pause between two batches, leaving room for the other transactions
+    pause: float = 0.05
+
+    @staticmethod
+    def from_env() -> "ArchiveSettings":
+        return ArchiveSettings(
+            interval=env_float("ARCHIVE_INTERVAL", ArchiveSettings.interval),
+            batch_size=env_int("ARCHIVE_BATCH_SIZE", ArchiveSettings.batch_size),
+            min_age=env_float("ARCHIVE_MIN_AGE", ArchiveSettings.min_age),
+            lock_timeout_ms=env_int(
+                "ARCHIVE_LOCK_TIMEOUT_MS", ArchiveSettings.lock_timeout_ms
+            ),
+            pause=env_float("ARCHIVE_PAUSE", ArchiveSettings.pause),
+        )
+
+
+class MatchArchiver:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        logger: LoggerInterface,
+        settings: ArchiveSettings = ArchiveSettings(),
+    ):
+        self.session_factory = session_factory
+        self.logger = logger
+        self.settings = settings
+
+    async def archive_batch(self) -> int:
+        """Moves one batch of finished matches, returns how many were moved."""
+        statement = archive_matches_statement(
+            self.settings.batch_size, timedelta(seconds=self.settings.min_age)
+        )
+        async with self.session_factory() as session:
+            await session.execute(
+                text(f"SET LOCAL lock_timeout = {int(self.settings.lock_timeout_ms)}")
+            )
+            result = cast(CursorResult, await session.execute(statement))
+            await session.commit()
+
+            return result.rowcount
+
+    async def archive(self) -> int:
+        """Moves every finished match old enough, returns how many were moved."""
+        archived = 0
+        while True:
+            moved = await self.archive_batch()
+            archived += moved
+            if moved < self.settings.batch_size:
+                break
+
+            await asyncio.sleep(self.settings.pause)
+
+        if archived:
+            self.logger.info("Matches ARCHIVED!", count=archived)
+
+        return archived
+
+    async def run(self) -> None:
+        """Archives every `interval` seconds until cancelled."""
+        while True:
+            try:
+                await self.archive()
+            except SQLAlchemyError as e:
+                # Lock timeouts included, the next run tries again
+                self.logger.warning("Error archiving matches: %s", e)
+
+            await asyncio.sleep(self.settings.interval)
+
+
+async def main() -> int:
+    engine = create_async_database_engine(get_database_url(), PoolSettings.from_env())
+    try:
+        archiver = MatchArchiver(
+            create_async_session_factory(engine),
+            LoggingService(),
+            ArchiveSettings.from_env(),
+        )
+        print(f"{await archiver.archive()} matches archived")
+    finally:
+        await engine.dispose()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
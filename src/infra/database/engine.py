@@ -0,0 +1,188 @@
+import os
+import time
+from dataclasses import dataclass, replace
+
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from src.domain.exception.errors import DatabaseEnvVarNotSetException
+from src.infra.metrics.metrics import POOL_CHECKOUT_WAIT, watch_pool
+from src.infra.metrics.workers import WORKER_GAUGES
+from src.infra.settings import env_bool, env_int
+
+
+@dataclass(frozen=True)
+class PoolSettings:
+    """Connection pool options shared by every engine of a worker process.
+
+    `warmup` is the number of connections opened at startup so the first
+    requests do not pay for the TCP and authentication handshake.
+    """
+
+    size: int = 5
+    max_overflow: int = 10
+    timeout: int = 30
+    recycle: int = 1800
+    pre_ping: bool = True
+    warmup: int = 0
+
+    def within_budget(
+        self, budget: int, workers: int, size: int | None = None
+    ) -> "PoolSettings":
+        """Pool of one of `workers` processes sharing `budget` connections.
+
+        Each pool may open its share of the budget and no more. `size` of them
+        are kept open, the whole share by default, the rest are overflow.
+        """
+        share = budget // workers
+        if share < 1:
+            raise ValueError(
+                f"A budget of {budget} connections is too low for {workers} workers"
+            )
+
+        size = share if size is None else min(size, share)
+        return replace(
+            self,
+            size=size,
+            max_overflow=share - size,
+            warmup=min(self.warmup, size),
+        )
+
+    @staticmethod
+    def from_env() -> "PoolSettings":
+        """DB_CONNECTION_BUDGET, when set, is the total number of connections
+        of all the WEB_CONCURRENCY workers and overrides DB_POOL_MAX_OVERFLOW."""
+        settings = PoolSettings(
+            size=env_int("DB_POOL_SIZE", PoolSettings.size),
+            max_overflow=env_int("DB_POOL_MAX_OVERFLOW", PoolSettings.max_overflow),
+            timeout=env_int("DB_POOL_TIMEOUT", PoolSettings.timeout),
+            recycle=env_int("DB_POOL_RECYCLE", PoolSettings.recycle),
+            pre_ping=env_bool("DB_POOL_PRE_PING", PoolSettings.pre_ping),
+            warmup=env_int("DB_POOL_WARMUP", PoolSettings.warmup),
+        )
+        if budget := env_int("DB_CONNECTION_BUDGET", 0):
+            size = settings.size if os.getenv("DB_POOL_SIZE") else None
+            settings = settings.within_budget(
+                budget, env_int("WEB_CONCURRENCY", 1), size
+            )
+
+        return settings
+
+
+def get_database_url() -> str:
+    if (database_url := os.getenv("DATABASE_URL")) is None:
+        raise DatabaseEnvVarNotSetException("DATABASE_URL env variable is not set")
+
+    return database_url
+
+
+class TimedQueuePool(QueuePool):
+    """Queue pool reporting its checkout wait and size to the metrics, and
+    its connections to the gauges of the worker.
+
+    Pools are recreated when the engine is disposed, the newest one of each
+    `metrics_name` is the one reported.
+    """
+
+    metrics_name = "sync"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_wait = POOL_CHECKOUT_WAIT.labels(self.metrics_name)
+        watch_pool(self.metrics_name, self)
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.checkout_wait.observe(time.perf_counter() - started)
+            WORKER_GAUGES.publish_pool(self)
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        WORKER_GAUGES.publish_pool(self)
+
+
+class TimedAsyncAdaptedQueuePool(TimedQueuePool, AsyncAdaptedQueuePool):
+    metrics_name = "async"
+
+
+def _pool_options(
+    database_url: str | URL, settings: PoolSettings, poolclass: type[Pool]
+) -> dict:
+    # SQLite (used by the tests) runs on a single-connection pool that does not
+    # accept the queue pool sizing options
+    if make_url(database_url).get_backend_name() == "sqlite":
+        return {}
+
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.size,
+        "max_overflow": settings.max_overflow,
+        "pool_timeout": settings.timeout,
+        "pool_recycle": settings.recycle,
+        "pool_pre_ping": settings.pre_ping,
+    }
+
+
+def to_async_url(database_url: str) -> URL:
+    """Replaces the sync driver of a DATABASE_URL by its asyncio counterpart."""
+    url = make_url(database_url)
+    match url.get_backend_name():
+        case "postgresql":
+            url = url.set(drivername="postgresql+asyncpg")
+        case "sqlite":
+            url = url.set(drivername="sqlite+aiosqlite")
+
+    return url
+
+
+def create_database_engine(database_url: str, settings: PoolSettings) -> Engine:
+    return create_engine(
+        database_url, **_pool_options(database_url, settings, TimedQueuePool)
+    )
+
+
+def create_session_factory(engine: Engine) -> sessionmaker[Session]:
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def create_async_database_engine(
+    database_url: str, settings: PoolSettings
+) -> AsyncEngine:
+    async_url = to_async_url(database_url)
+    return create_async_engine(
+        async_url,
+        **_pool_options(async_url, settings, TimedAsyncAdaptedQueuePool),
+    )
+
+
+def create_async_session_factory(
+    engine: AsyncEngine,
+) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
+        autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+    )
+
+
+def warm_up(engine: Engine, connections: int) -> None:
+    # Connections must be held at the same time, otherwise the pool would hand
+    # back the same one on every checkout
+    opened = [engine.connect() for _ in range(connections)]
+    for connection in opened:
+        connection.close()
+
+
+async def warm_up_async(engine: AsyncEngine, connections: int) -> None:
+    opened = [await engine.connect() for _ in range(connections)]
+    for connection in opened:
+        await connection.close()
@@ -0,0 +1,425 @@
+"""Bulk export and import of the matches and archived matches, with their moves.
+
+    python -m src.infra.database.transfer export DIRECTORY --format parquet
+    python -m src.infra.database.transfer import DIRECTORY --commit-size 10000
+
+Export writes a file per table, named after it, as NDJSON or as a zstd
+compressed Parquet file. Rows are copied out with `COPY (SELECT ...) TO
+STDOUT` in chunks of `chunk_size` rows in primary key order, each one its own
+short transaction starting after the last key of the previous one, so the
+export never holds a snapshot for long. It can be pointed at a replica with
+--database-url.
+
+Import reads the files found in the directory back, `commit_size` rows per
+transaction. Each batch is copied with `COPY FROM STDIN` into a temporary table
+and inserted from there, skipping the rows already present, so an interrupted
+import can be run again.
+
+Boards are written as hex. The database encodes and decodes them, and NumPy
+converts whole Parquet columns from and to binary at once, so rows are never
+turned into Python objects one by one. Both directions need the psycopg2
+driver, the default one of a `postgresql://` DATABASE_URL.
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+from itertools import chain, islice
+from pathlib import Path
+from typing import BinaryIO, Iterator
+from uuid import UUID
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Engine,
+    LargeBinary,
+    Select,
+    SmallInteger,
+    Table,
+    Uuid,
+    func,
+    literal,
+    select,
+    tuple_,
+)
+from sqlalchemy.dialects import postgresql
+
+from src.domain.logging.logger_interface import LoggerInterface
+from src.infra.database.engine import (
+    PoolSettings,
+    create_database_engine,
+    get_database_url,
+)
+from src.infra.entities.match_db import ArchivedMatchDB, Base, MatchDB
+from src.infra.entities.move_db import ArchivedMoveDB, MoveDB
+from src.logging.logging_service import LoggingService
+
+# In the order they are imported
+TABLES: dict[str, Table] = {
+    name: Base.metadata.tables[name]
+    for name in (
+        MatchDB.__tablename__,
+        ArchivedMatchDB.__tablename__,
+        MoveDB.__tablename__,
+        ArchivedMoveDB.__tablename__,
+    )
+}
+FORMATS = ("ndjson", "parquet")
+
+_HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+_HEX_VALUES = np.zeros(256, dtype=np.uint8)
+_HEX_VALUES[_HEX_DIGITS] = np.arange(16)
+
+
+def _is_binary(column: Column) -> bool:
+    return isinstance(column.type, LargeBinary)
+
+
+def _arrow_type(column: Column) -> pa.DataType:
+    # UUIDs are kept as their text, as they are written
+    if isinstance(column.type, Uuid):
+        return pa.string()
+    if isinstance(column.type, SmallInteger):
+        return pa.int16()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us")
+    if _is_binary(column):
+        return pa.binary()
+
+    return pa.int64()
+
+
+def arrow_schema(table: Table) -> pa.Schema:
+    return pa.schema(
+        [
+            pa.field(column.name, _arrow_type(column), nullable=bool(column.nullable))
+            for column in table.columns
+        ]
+    )
+
+
+def _buffers(column: pa.Array) -> tuple[np.ndarray, np.ndarray]:
+    """Offsets, from 0, and bytes of the values of a string or binary column."""
+    offsets = np.frombuffer(column.buffers()[1], dtype=np.int32)[
+        column.offset : column.offset + len(column) + 1
+    ]
+    data = np.frombuffer(column.buffers()[2], dtype=np.uint8)
+    return offsets - offsets[0], data[offsets[0] : offsets[-1]]
+
+
+def hex_to_binary(column: pa.Array) -> pa.Array:
+    """Column of hex strings, without nulls, decoded to binary."""
+    offsets, digits = _buffers(column)
+    values = _HEX_VALUES[digits]
+    data = values[0::2] << 4 | values[1::2]
+
+    return pa.Array.from_buffers(
+        pa.binary(),
+        len(column),
+        [None, pa.py_buffer(offsets // 2), pa.py_buffer(data)],
+    )
+
+
+def binary_to_hex(column: pa.Array) -> pa.Array:
+    """Column of binary values, without nulls, encoded as hex strings."""
+    offsets, data = _buffers(column)
+    digits = np.empty(len(data) * 2, dtype=np.uint8)
+    digits[0::2] = _HEX_DIGITS[data >> 4]
+    digits[1::2] = _HEX_DIGITS[data & 15]
+
+    return pa.Array.from_buffers(
+        pa.string(),
+        len(column),
+        [None, pa.py_buffer(offsets * 2), pa.py_buffer(digits)],
+    )
+
+
+def export_statement(
+    table: Table, format: str, after: tuple | None, limit: int
+) -> Select:
+    """Next `limit` rows after the `after` primary key, in primary key order.
+
+    NDJSON rows are a single JSON object built by the database. Binary
+    columns are encoded as hex in both formats.
+    """
+    values = [
+        func.encode(column, "hex") if _is_binary(column) else column
+        for column in table.columns
+    ]
+    if format == "ndjson":
+        statement = select(
+            func.json_build_object(
+                *chain.from_iterable(
+                    (literal(column.name), value)
+                    for column, value in zip(table.columns, values)
+                )
+            )
+        )
+    else:
+        statement = select(*values)
+
+    key = list(table.primary_key.columns)
+    if after is not None:
+        statement = statement.where(
+            tuple_(*key)
+            > tuple_(
+                *(literal(value, column.type) for column, value in zip(key, after))
+            )
+        )
+
+    return statement.select_from(table).order_by(*key).limit(limit)
+
+
+def _sql(statement: Select) -> str:
+    return str(
+        statement.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+
+
+def _key(table: Table, row: dict) -> tuple:
+    return tuple(
+        UUID(row[column.name]) if isinstance(column.type, Uuid) else row[column.name]
+        for column in table.primary_key.columns
+    )
+
+
+def _read_csv(table: Table, data: bytes) -> pa.Table:
+    schema = arrow_schema(table)
+    read = pacsv.read_csv(
+        io.BytesIO(data),
+        read_options=pacsv.ReadOptions(column_names=schema.names),
+        convert_options=pacsv.ConvertOptions(
+            column_types={
+                field.name: pa.string() if field.type == pa.binary() else field.type
+                for field in schema
+            }
+        ),
+    )
+
+    return pa.Table.from_arrays(
+        [
+            (
+                hex_to_binary(read.column(field.name).combine_chunks())
+                if field.type == pa.binary()
+                else read.column(field.name)
+            )
+            for field in schema
+        ],
+        schema=schema,
+    )
+
+
+def export_table(
+    engine: Engine,
+    table: Table,
+    directory: Path,
+    format: str,
+    logger: LoggerInterface,
+    chunk_size: int = 100_000,
+) -> int:
+    """Writes every row of `table` to its file, returns how many."""
+    path = directory / f"{table.name}.{format}"
+    connection = engine.raw_connection()
+    cursor = connection.cursor()
+    output: BinaryIO | pq.ParquetWriter = (
+        path.open("wb")
+        if format == "ndjson"
+        else pq.ParquetWriter(path, arrow_schema(table), compression="zstd")
+    )
+    exported = 0
+    after = None
+    try:
+        while True:
+            data = io.BytesIO()
+            cursor.copy_expert(
+                f"COPY ({_sql(export_statement(table, format, after, chunk_size))}) "
+                + ("TO STDOUT" if format == "ndjson" else "TO STDOUT (FORMAT csv)"),
+                data,
+            )
+            # Ends the transaction of the chunk
+            connection.commit()
+            if not (chunk := data.getvalue()):
+                break
+
+            if isinstance(output, pq.ParquetWriter):
+                rows = _read_csv(table, chunk)
+                output.write_table(rows)
+                count = rows.num_rows
+                last = {
+                    name: rows.column(name)[-1].as_py() for name in rows.column_names
+                }
+            else:
+                # COPY escapes backslashes in text, the JSON built has none
+                output.write(chunk)
+                count = chunk.count(b"\n")
+                last = json.loads(chunk[chunk.rfind(b"\n", 0, -1) + 1 :])
+
+            exported += count
+            after = _key(table, last)
+            logger.info("Rows exported", table=table.name, rows=exported)
+            if count < chunk_size:
+                break
+    finally:
+        output.close()
+        cursor.close()
+        connection.close()
+
+    return exported
+
+
+def _insert_sql(table: Table, staging: str, format: str) -> str:
+    names = ", ".join(column.name for column in table.columns)
+    if format == "ndjson":
+        values = ", ".join(
+            (
+                f"decode(doc->>'{column.name}', 'hex')"
+                if _is_binary(column)
+                else f"parsed.{column.name}"
+            )
+            for column in table.columns
+        )
+        source = f"{staging}, json_populate_record(null::{table.name}, doc) AS parsed"
+    else:
+        values = ", ".join(
+            f"decode({column.name}, 'hex')" if _is_binary(column) else column.name
+            for column in table.columns
+        )
+        source = staging
+
+    return (
+        f"INSERT INTO {table.name} ({names}) SELECT {values} FROM {source} "
+        + "ON CONFLICT DO NOTHING"
+    )
+
+
+def _ndjson_batches(path: Path, commit_size: int) -> Iterator[tuple[int, bytes]]:
+    with path.open("rb") as file:
+        while lines := list(islice(file, commit_size)):
+            if batch := [line for line in lines if line.strip()]:
+                # Read by COPY as text, where backslashes are escapes
+                yield len(batch), b"".join(batch).replace(b"\\", b"\\\\")
+
+
+def _parquet_batches(path: Path, commit_size: int) -> Iterator[tuple[int, bytes]]:
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=commit_size):
+        batch = pa.RecordBatch.from_arrays(
+            [
+                binary_to_hex(column) if column.type == pa.binary() else column
+                for column in batch.columns
+            ],
+            names=batch.schema.names,
+        )
+        data = io.BytesIO()
+        pacsv.write_csv(batch, data, pacsv.WriteOptions(include_header=False))
+        yield batch.num_rows, data.getvalue()
+
+
+def import_table(
+    engine: Engine,
+    table: Table,
+    path: Path,
+    logger: LoggerInterface,
+    commit_size: int = 10_000,
+) -> tuple[int, int]:
+    """Inserts the rows of the file missing from `table`, returns how many
+    rows were read and how many inserted."""
+    format = path.suffix[1:]
+    staging = f"import_{table.name}"
+    connection = engine.raw_connection()
+    cursor = connection.cursor()
+    read = inserted = 0
+    try:
+        if format == "ndjson":
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE {staging} (doc json) ON COMMIT DELETE ROWS"
+            )
+            copy = f"COPY {staging} (doc) FROM STDIN"
+            batches = _ndjson_batches(path, commit_size)
+        else:
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE {staging} (LIKE {table.name}) "
+                + "ON COMMIT DELETE ROWS"
+            )
+            for column in filter(_is_binary, table.columns):
+                cursor.execute(
+                    f"ALTER TABLE {staging} ALTER COLUMN {column.name} TYPE text"
+                )
+            names = ", ".join(column.name for column in table.columns)
+            copy = f"COPY {staging} ({names}) FROM STDIN (FORMAT csv)"
+            batches = _parquet_batches(path, commit_size)
+        connection.commit()
+
+        insert = _insert_sql(table, staging, format)
+        for count, data in batches:
+            cursor.copy_expert(copy, io.BytesIO(data))
+            cursor.execute(insert)
+            connection.commit()
+
+            read += count
+            inserted += cursor.rowcount
+            logger.info("Rows imported", table=table.name, rows=read, inserted=inserted)
+
+        cursor.execute(f"DROP TABLE {staging}")
+        connection.commit()
+    finally:
+        cursor.close()
+        connection.close()
+
+    return read, inserted
+
+
+def main(arguments: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.infra.database.transfer")
+    parser.add_argument(
+        "--database-url", default=os.getenv("DATABASE_URL"), help="DATABASE_URL"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="write every table to DIRECTORY")
+    export.add_argument("directory", type=Path)
+    export.add_argument("--format", choices=FORMATS, default="parquet")
+    export.add_argument("--chunk-size", type=int, default=100_000)
+
+    load = commands.add_parser("import", help="load the files of DIRECTORY")
+    load.add_argument("directory", type=Path)
+    load.add_argument("--commit-size", type=int, default=10_000)
+
+    args = parser.parse_args(arguments)
+
+    logger = LoggingService()
+    engine = create_database_engine(
+        args.database_url or get_database_url(), PoolSettings(size=1)
+    )
+    try:
+        for table in TABLES.values():
+            if args.command == "export":
+                args.directory.mkdir(parents=True, exist_ok=True)
+                rows = export_table(
+                    engine, table, args.directory, args.format, logger, args.chunk_size
+                )
+                print(f"{table.name}: {rows} rows exported")
+                continue
+
+            for path in (args.directory / f"{table.name}.{f}" for f in FORMATS):
+                if path.exists():
+                    read, inserted = import_table(
+                        engine, table, path, logger, args.commit_size
+                    )
+                    print(f"{table.name}: {read} rows read, {inserted} inserted")
+    finally:
+        engine.dispose()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
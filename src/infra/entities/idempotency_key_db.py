@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from sqlalchemy import Index, LargeBinary, SmallInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.infra.entities.match_db import Base
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyKeyDB(Base):
+    """Response to the first request sent with an Idempotency-Key, see
+    `IdempotencyStore`. It has no status code while that request runs."""
+
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (Index("ix_idempotency_keys_expires_at", "expires_at"),)
+
+    key: Mapped[str] = mapped_column(String(MAX_KEY_LENGTH), primary_key=True)
+    # Hash of the request, a key cannot be reused for another one
+    fingerprint: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    status_code: Mapped[int | None] = mapped_column(SmallInteger, nullable=True)
+    content_type: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    body: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    expires_at: Mapped[datetime] = mapped_column(nullable=False)
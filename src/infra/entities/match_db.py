@@ -1,21 +1,39 @@
-import json
 from datetime import datetime
 from uuid import UUID, uuid4
 
-from sqlalchemy import func
+from sqlalchemy import Index, LargeBinary, SmallInteger, func, text
 from sqlalchemy.dialects.postgresql import UUID as UUID_PG
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 from src.domain.models.match import Match
 from src.domain.models.status import Status
+from src.domain.services.bitboard import Bitboard
+
+# Status and turn are stored as small integers, the position in these tuples
+STATUSES = (Status.PLAYING, Status.WINNER, Status.DRAW)
+TURNS = ("X", "O")
 
 
 class Base(DeclarativeBase):
     pass
 
 
-class MatchDB(Base):
-    __tablename__ = "matches"
+def _listing_indexes(table: str) -> tuple[Index, ...]:
+    """Indexes in the keyset order of the listings, with or without a status
+    filter, so every page is an index range scan however deep it is."""
+    return tuple(
+        Index(f"ix_{table}_{'_'.join(columns)}", *columns)
+        for columns in (
+            ("updated_at", "id"),
+            ("created_at", "id"),
+            ("status", "updated_at", "id"),
+            ("status", "created_at", "id"),
+        )
+    )
+
+
+class MatchColumns:
+    """Columns and conversions shared by the live and the archived matches."""
 
     # I found that mypy type errors would be fixed declaring fields this way
     # From https://docs.pydantic.dev/latest/concepts/models/#arbitrary-class-instances
@@ -23,35 +41,109 @@ class MatchDB(Base):
     id: Mapped[str] = mapped_column(
         UUID_PG(as_uuid=True), primary_key=True, default=uuid4, index=True
     )
-    status: Mapped[str] = mapped_column(nullable=False)
-    turn: Mapped[str] = mapped_column(nullable=False)
-    board: Mapped[str] = mapped_column(nullable=False)
+    status: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+    turn: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+    # X squares mask followed by the O squares mask, see `board_to_bytes`
+    board: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    board_size: Mapped[int] = mapped_column(
+        SmallInteger, nullable=False, default=3, server_default="3"
+    )
+    win_length: Mapped[int] = mapped_column(
+        SmallInteger, nullable=False, default=3, server_default="3"
+    )
+    move_count: Mapped[int] = mapped_column(
+        SmallInteger, nullable=False, default=0, server_default="0"
+    )
     created_at: Mapped[datetime] = mapped_column(nullable=False, default=func.now())
     updated_at: Mapped[datetime] = mapped_column(
         nullable=False, default=func.now(), onupdate=func.now()
     )
+    # TURNS code of the player played by the server, if any
+    computer: Mapped[int | None] = mapped_column(SmallInteger, nullable=True)
+    # Incremented on every update, used to detect concurrent modifications
+    version: Mapped[int] = mapped_column(nullable=False, default=0, server_default="0")
 
     @staticmethod
-    def board_to_string(board: list[list[str | None]]) -> str:
-        return json.dumps(board)
+    def status_to_code(status: Status) -> int:
+        return STATUSES.index(status)
 
     @staticmethod
-    def string_to_board(board: str) -> list[list[str | None]]:
-        return json.loads(board)
+    def turn_to_code(turn: str) -> int:
+        return TURNS.index(turn)
 
     @staticmethod
-    def from_match(match: Match) -> "MatchDB":
-        return MatchDB(
-            id=str(match.id),
-            status=match.status.value,
-            turn=match.turn,
-            board=MatchDB.board_to_string(match.board),
+    def board_to_bytes(board: list[list[str | None]]) -> bytes:
+        """Packs the board as the little endian X and O bitboard masks.
+
+        Each mask takes one bit per square, rounded up to whole bytes, so a 3x3
+        board is stored in 4 bytes.
+        """
+        bitboard = Bitboard.from_board(board)
+        length = (bitboard.size * bitboard.size + 7) // 8
+
+        return bitboard.x.to_bytes(length, "little") + bitboard.o.to_bytes(
+            length, "little"
         )
 
+    @staticmethod
+    def bytes_to_board(board: bytes, board_size: int) -> list[list[str | None]]:
+        length = len(board) // 2
+
+        return Bitboard(
+            board_size,
+            x=int.from_bytes(board[:length], "little"),
+            o=int.from_bytes(board[length:], "little"),
+        ).to_board()
+
     def to_match(self) -> Match:
         return Match(
             id=UUID(str(self.id)),
-            status=Status(self.status),
-            turn=str(self.turn),
-            board=MatchDB.string_to_board(str(self.board)),
+            status=STATUSES[self.status],
+            turn=TURNS[self.turn],
+            board=self.bytes_to_board(self.board, self.board_size),
+            board_size=int(self.board_size),
+            win_length=int(self.win_length),
+            move_count=int(self.move_count),
+            version=int(self.version),
+            computer=None if self.computer is None else TURNS[self.computer],
+        )
+
+
+class MatchDB(MatchColumns, Base):
+    __tablename__ = "matches"
+    __table_args__ = (
+        # Lets the archiver find the finished matches without a full scan
+        Index(
+            "ix_matches_finished",
+            "updated_at",
+            postgresql_where=text(f"status <> {STATUSES.index(Status.PLAYING)}"),
+        ),
+        *_listing_indexes("matches"),
+    )
+
+    @staticmethod
+    def from_match(match: Match) -> "MatchDB":
+        return MatchDB(
+            id=str(match.id),
+            status=MatchDB.status_to_code(match.status),
+            turn=MatchDB.turn_to_code(match.turn),
+            board=MatchDB.board_to_bytes(match.board),
+            board_size=match.board_size,
+            win_length=match.win_length,
+            move_count=match.move_count,
+            version=match.version,
+            computer=None if match.computer is None else TURNS.index(match.computer),
         )
+
+
+class ArchivedMatchDB(MatchColumns, Base):
+    """Finished match moved out of `matches`, see `MatchArchiver`."""
+
+    __tablename__ = "matches_archive"
+    __table_args__ = _listing_indexes("matches_archive")
+
+    # The primary key index is enough here
+    id: Mapped[str] = mapped_column(UUID_PG(as_uuid=True), primary_key=True)
+    archived_at: Mapped[datetime] = mapped_column(
+        nullable=False, default=func.now(), server_default=func.now()
+    )
@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from sqlalchemy import SmallInteger, func
+from sqlalchemy.dialects.postgresql import UUID as UUID_PG
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.infra.entities.match_db import Base
+
+
+class MoveColumns:
+    """Columns shared by the moves of the live and the archived matches."""
+
+    match_id: Mapped[str] = mapped_column(UUID_PG(as_uuid=True), primary_key=True)
+    # Move count of the match after the move, from 1. Two concurrent moves on
+    # a match take the same number, so only one of them is stored
+    seq: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    # TURNS code of the player
+    player: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+    x: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+    y: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, default=func.now(), server_default=func.now()
+    )
+
+
+class MoveDB(MoveColumns, Base):
+    """Move of a match, only ever inserted. The match row is a snapshot of
+    its first `move_count` moves, see `match_statements`.
+
+    There is no foreign key to `matches`, the moves of finished matches are
+    archived to `moves_archive` together with them.
+    """
+
+    __tablename__ = "moves"
+
+
+class ArchivedMoveDB(MoveColumns, Base):
+    """Move of an archived match, see `MatchArchiver`."""
+
+    __tablename__ = "moves_archive"
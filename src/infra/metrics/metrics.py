@@ -0,0 +1,167 @@
+import inspect
+from typing import Iterable
+
+from sqlalchemy.pool import Pool, QueuePool
+
+from src.domain.exception import errors
+from src.infra.metrics.registry import (
+    CallbackMetric,
+    Counter,
+    Histogram,
+    Registry,
+)
+from src.infra.metrics.workers import WORKER_GAUGES
+from src.infra.repositories.cached_repository import MatchCache
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Time to handle a request, by route template",
+        ("method", "route", "status"),
+    )
+)
+REPOSITORY_LATENCY = REGISTRY.register(
+    Histogram(
+        "repository_operation_duration_seconds",
+        "Time spent in each repository method",
+        ("repository", "operation"),
+    )
+)
+POOL_CHECKOUT_WAIT = REGISTRY.register(
+    Histogram(
+        "db_pool_checkout_wait_seconds",
+        "Time waited to get a connection from the pool, including connecting",
+        ("pool",),
+    )
+)
+DOMAIN_EXCEPTIONS = REGISTRY.register(
+    Counter(
+        "domain_exceptions_total",
+        "Exceptions turned into error responses, by domain type or unexpected",
+        ("exception",),
+    )
+)
+IDEMPOTENT_REQUESTS = REGISTRY.register(
+    Counter(
+        "idempotent_requests_total",
+        "Requests sent with an Idempotency-Key, by outcome",
+        ("outcome",),
+    )
+)
+
+# Label of the exceptions not defined in the domain, so their names do not
+# add labels without bound
+UNEXPECTED_EXCEPTION = "unexpected"
+
+_domain_exceptions = {
+    exception
+    for _, exception in inspect.getmembers(errors, inspect.isclass)
+    if issubclass(exception, Exception)
+}
+
+# Every exception type is exposed from the start, even before it happens
+for exception in _domain_exceptions:
+    DOMAIN_EXCEPTIONS.labels(exception.__name__)
+DOMAIN_EXCEPTIONS.labels(UNEXPECTED_EXCEPTION)
+
+
+def count_exception(exception: Exception) -> None:
+    """Counts the exception under its type, if a domain one."""
+    kind = type(exception)
+    DOMAIN_EXCEPTIONS.labels(
+        kind.__name__ if kind in _domain_exceptions else UNEXPECTED_EXCEPTION
+    ).inc()
+
+
+# Objects whose state is read on every scrape, by name
+_pools: dict[str, Pool] = {}
+_caches: dict[str, MatchCache] = {}
+
+
+def watch_pool(name: str, pool: Pool) -> None:
+    _pools[name] = pool
+
+
+def watch_cache(name: str, cache: MatchCache) -> None:
+    _caches[name] = cache
+
+
+def _pool_connections() -> Iterable[tuple[tuple[str, ...], float]]:
+    for name, pool in list(_pools.items()):
+        if isinstance(pool, QueuePool):
+            yield (name, "size"), pool.size()
+            yield (name, "checked_out"), pool.checkedout()
+            yield (name, "checked_in"), pool.checkedin()
+            yield (name, "overflow"), max(pool.overflow(), 0)
+
+
+def _cache_events() -> Iterable[tuple[tuple[str, ...], float]]:
+    for name, cache in list(_caches.items()):
+        for event in ("hits", "misses", "evictions", "expirations"):
+            yield (name, event), getattr(cache, event)
+
+
+REGISTRY.register(
+    CallbackMetric(
+        "db_pool_connections",
+        "Connections of each pool, by state",
+        ("pool", "state"),
+        _pool_connections,
+    )
+)
+REGISTRY.register(
+    CallbackMetric(
+        "match_cache_entries",
+        "Matches held by the cache",
+        ("cache",),
+        lambda: (
+            ((name,), len(cache.entries)) for name, cache in list(_caches.items())
+        ),
+    )
+)
+REGISTRY.register(
+    CallbackMetric(
+        "match_cache_hit_ratio",
+        "Share of the cache lookups that found the match",
+        ("cache",),
+        lambda: (((name,), cache.hit_ratio()) for name, cache in list(_caches.items())),
+    )
+)
+REGISTRY.register(
+    CallbackMetric(
+        "match_cache_events_total",
+        "Cache lookups and removals, by event",
+        ("cache", "event"),
+        _cache_events,
+        type="counter",
+    )
+)
+
+REGISTRY.register(
+    CallbackMetric(
+        "worker_requests_in_flight",
+        "Requests being handled by each worker process",
+        ("worker",),
+        lambda: (
+            ((str(slot),), gauges["in_flight"]) for slot, gauges in WORKER_GAUGES.read()
+        ),
+    )
+)
+
+
+def _worker_pool_connections() -> Iterable[tuple[tuple[str, ...], float]]:
+    for slot, gauges in WORKER_GAUGES.read():
+        for state in ("size", "checked_out", "checked_in", "overflow"):
+            yield (str(slot), state), gauges[f"pool_{state}"]
+
+
+REGISTRY.register(
+    CallbackMetric(
+        "worker_db_pool_connections",
+        "Connections of the database pool of each worker process, by state",
+        ("worker", "state"),
+        _worker_pool_connections,
+    )
+)
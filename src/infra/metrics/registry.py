@@ -0,0 +1,186 @@
+"""Minimal in-process metrics rendered in the Prometheus text format.
+
+See https://prometheus.io/docs/instrumenting/exposition_formats/
+
+Updates take no lock, they are plain attribute increments under the GIL. A
+racing update may very rarely be lost, which is fine for monitoring and keeps
+the hot path cheap.
+"""
+
+from bisect import bisect_left
+from typing import Callable, Generic, Iterable, TypeVar
+
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+Child = TypeVar("Child")
+AnyMetric = TypeVar("AnyMetric", bound="Metric")
+
+
+def _format_labels(labels: Iterable[tuple[str, str]]) -> str:
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name,
+            value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in labels
+    )
+    return "{" + pairs + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(Generic[Child]):
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.children: dict[tuple[str, ...], Child] = {}
+
+    def _new_child(self) -> Child:
+        raise NotImplementedError
+
+    def labels(self, *values: str) -> Child:
+        """Returns the child holding the values for these label values, in
+        `labelnames` order. Keep a reference to it on hot paths."""
+        if (child := self.children.get(values)) is None:
+            # setdefault keeps the first child if two threads race to add it
+            child = self.children.setdefault(values, self._new_child())
+
+        return child
+
+    def samples(self) -> Iterable[tuple[str, tuple[tuple[str, str], ...], float]]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(
+            f"{name}{_format_labels(labels)} {_format_value(value)}"
+            for name, labels, value in self.samples()
+        )
+        return "\n".join(lines)
+
+
+class CounterValue:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class Counter(Metric[CounterValue]):
+    type = "counter"
+
+    def _new_child(self) -> CounterValue:
+        return CounterValue()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def samples(self) -> Iterable[tuple[str, tuple[tuple[str, str], ...], float]]:
+        for values, child in list(self.children.items()):
+            yield self.name, tuple(zip(self.labelnames, values)), child.value
+
+
+class HistogramValue:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        # One count per bucket, the last one for the values above every bound
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(Metric[HistogramValue]):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> HistogramValue:
+        return HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def samples(self) -> Iterable[tuple[str, tuple[tuple[str, str], ...], float]]:
+        for values, child in list(self.children.items()):
+            labels = tuple(zip(self.labelnames, values))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                le = (("le", _format_value(bound)),)
+                yield f"{self.name}_bucket", labels + le, cumulative
+            yield f"{self.name}_sum", labels, child.sum
+            yield f"{self.name}_count", labels, child.count
+
+
+class CallbackMetric(Metric[None]):
+    """Values read at scrape time, for state owned by other objects such as
+    connection pools. `collect` yields (label values, value) pairs."""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...],
+        collect: Callable[[], Iterable[tuple[tuple[str, ...], float]]],
+        type: str = "gauge",
+    ):
+        super().__init__(name, help, labelnames)
+        self.collect = collect
+        self.type = type
+
+    def samples(self) -> Iterable[tuple[str, tuple[tuple[str, str], ...], float]]:
+        for values, value in self.collect():
+            yield self.name, tuple(zip(self.labelnames, values)), value
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.metrics: list[Metric] = []
+
+    def register(self, metric: AnyMetric) -> AnyMetric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
@@ -0,0 +1,75 @@
+"""Gauges of every worker process, readable from any of them.
+
+With several workers, a scrape of /metrics only reaches one of them. Each
+worker writes its gauges to its own slot of an array in shared memory, which
+the gunicorn master creates before forking them when the app is preloaded
+(see gunicorn.conf.py), so any worker renders the gauges of all of them.
+Without a preloading master every process only sees its own slot.
+"""
+
+import ctypes
+import multiprocessing
+import os
+from typing import Iterator
+
+from sqlalchemy.pool import QueuePool
+
+FIELDS = (
+    "pid",
+    "in_flight",
+    "pool_size",
+    "pool_checked_out",
+    "pool_checked_in",
+    "pool_overflow",
+)
+MAX_WORKERS = 256
+
+
+class WorkerGauges:
+    """One slot of `FIELDS` per worker, a slot with pid 0 is free.
+
+    A slot is only written by its worker, and by the master once the worker
+    is gone, so there is no need for a lock.
+    """
+
+    def __init__(self, slots: int = MAX_WORKERS):
+        self.slots = slots
+        self.values = multiprocessing.RawArray(ctypes.c_int64, slots * len(FIELDS))
+        self.offsets = {field: index for index, field in enumerate(FIELDS)}
+        self.slot = 0
+
+    def _index(self, field: str, slot: int | None = None) -> int:
+        slot = self.slot if slot is None else slot
+        return slot * len(FIELDS) + self.offsets[field]
+
+    def claim(self, slot: int | None = None) -> None:
+        """Makes the current process the owner of `slot`, the current slot by
+        default, and resets its gauges."""
+        if slot is not None:
+            self.slot = slot
+        for field in FIELDS:
+            self.values[self._index(field)] = 0
+        self.values[self._index("pid")] = os.getpid()
+
+    def release(self, slot: int) -> None:
+        self.values[self._index("pid", slot)] = 0
+
+    def add(self, field: str, delta: int) -> None:
+        self.values[self._index(field)] += delta
+
+    def publish_pool(self, pool: QueuePool) -> None:
+        self.values[self._index("pool_size")] = pool.size()
+        self.values[self._index("pool_checked_out")] = pool.checkedout()
+        self.values[self._index("pool_checked_in")] = pool.checkedin()
+        self.values[self._index("pool_overflow")] = max(pool.overflow(), 0)
+
+    def read(self) -> Iterator[tuple[int, dict[str, int]]]:
+        """Gauges of every claimed slot, by slot."""
+        for slot in range(self.slots):
+            start = slot * len(FIELDS)
+            values = self.values[start : start + len(FIELDS)]
+            if values[0]:
+                yield slot, dict(zip(FIELDS, values))
+
+
+WORKER_GAUGES = WorkerGauges()
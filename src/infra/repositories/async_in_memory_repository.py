@@ -0,0 +1,48 @@
+from typing import Callable, Iterable
+from uuid import UUID
+
+from src.domain.logging.logger_interface import LoggerInterface
+from src.domain.models.match import Match
+from src.domain.models.match_page import MatchQuery, MatchSummary
+from src.domain.repositories.async_match_database_repository import (
+    AsyncMatchDatabaseRepository,
+)
+from src.infra.repositories.in_memory_repository import InMemoryRepository
+
+
+class AsyncInMemoryRepository(AsyncMatchDatabaseRepository):
+    """Async facade over `InMemoryRepository`, sharing its storage.
+
+    Dict operations never block, so they are run straight on the event loop.
+    """
+
+    def __init__(self, logger: LoggerInterface):
+        self.logger = logger
+        self.repository = InMemoryRepository(logger)
+
+    async def get_match(self, match_id: UUID) -> Match | None:
+        return self.repository.get_match(match_id)
+
+    async def save_match(self, match: Match) -> Match:
+        return self.repository.save_match(match)
+
+    async def save_matches(self, matches: list[Match]) -> list[Match]:
+        return self.repository.save_matches(matches)
+
+    async def update_match(self, match: Match) -> Match:
+        return self.repository.update_match(match)
+
+    async def apply_move(
+        self, match_id: UUID, apply: Callable[[Match], None]
+    ) -> Match | None:
+        return self.repository.apply_move(match_id, apply)
+
+    async def apply_moves(
+        self,
+        match_ids: Iterable[UUID],
+        apply: Callable[[dict[UUID, Match]], None],
+    ) -> dict[UUID, Match]:
+        return self.repository.apply_moves(match_ids, apply)
+
+    async def list_matches(self, query: MatchQuery) -> list[MatchSummary]:
+        return self.repository.list_matches(query)
@@ -0,0 +1,295 @@
+from typing import Callable, Iterable
+from uuid import UUID
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.domain.exception.errors import (
+    DatabaseGetMatchException,
+    DatabaseMatchNotFoundException,
+    DatabaseMoveConflictException,
+    DatabaseSaveMatchException,
+    DatabaseUpdateMatchException,
+)
+from src.domain.logging.logger_interface import LoggerInterface
+from src.domain.models.match import Match
+from src.domain.models.match_page import MatchQuery, MatchSummary
+from src.domain.repositories.async_match_database_repository import (
+    AsyncMatchDatabaseRepository,
+)
+from src.infra.entities.match_db import ArchivedMatchDB, MatchDB
+from src.infra.entities.move_db import MoveDB
+from src.infra.repositories.match_statements import (
+    list_matches_statement,
+    match_rows,
+    match_summary,
+    move_rows,
+    needs_snapshot,
+    replay,
+    select_matches_statement,
+    snapshot_matches_statement,
+)
+
+
+class AsyncPostgreSQLRepository(AsyncMatchDatabaseRepository):
+    MAX_MOVE_ATTEMPTS = 3
+
+    def __init__(
+        self,
+        logger: LoggerInterface,
+        session_factory: async_sessionmaker[AsyncSession],
+    ):
+        self.logger = logger
+        self.SessionLocal = session_factory
+
+    async def save_match(self, match: Match) -> Match:
+        self.logger.debug("Saving match:\n%s", match)
+
+        try:
+            async with self.SessionLocal() as session:
+                match_db = MatchDB.from_match(match)
+
+                stmt = insert(MatchDB).values(
+                    id=match_db.id,
+                    status=match_db.status,
+                    turn=match_db.turn,
+                    board=match_db.board,
+                    board_size=match_db.board_size,
+                    win_length=match_db.win_length,
+                    move_count=match_db.move_count,
+                    computer=match_db.computer,
+                )
+                await session.execute(stmt)
+                if match.played:
+                    # The computer may have played first
+                    await session.execute(insert(MoveDB), move_rows(match))
+                await session.commit()
+                match.played = ()
+
+                self.logger.info("Match SAVED!", match_id=match.id)
+
+                return match_db.to_match()
+        except Exception as e:
+            self.logger.error("Error saving match: %s", e, match_id=match.id)
+            raise DatabaseSaveMatchException(f"Error saving match: {e}")
+
+    async def save_matches(self, matches: list[Match]) -> list[Match]:
+        self.logger.info("Saving matches", count=len(matches))
+
+        try:
+            async with self.SessionLocal() as session:
+                await session.execute(insert(MatchDB), match_rows(matches))
+                if rows := [row for match in matches for row in move_rows(match)]:
+                    await session.execute(insert(MoveDB), rows)
+                await session.commit()
+                for match in matches:
+                    match.played = ()
+
+                self.logger.info("Matches SAVED!", count=len(matches))
+
+                return matches
+        except Exception as e:
+            self.logger.error("Error saving matches: %s", e, count=len(matches))
+            raise DatabaseSaveMatchException(f"Error saving matches: {e}")
+
+    async def update_match(self, match: Match) -> Match:
+        """Writes the match over the stored one, as a move would: only if no
+        move was stored since it was read, bumping its version."""
+        self.logger.debug("Updating match:\n%s", match)
+
+        try:
+            async with self.SessionLocal() as session:
+                statement = select_matches_statement([match.id])
+                row = (await session.execute(statement)).one_or_none()
+                if row is None:
+                    raise DatabaseMatchNotFoundException("Match not found")
+
+                match_db, pending = row
+                if replay(match_db, pending).version != match.version or not (
+                    await self._store_moves(session, [(match, match_db)])
+                ):
+                    raise DatabaseMoveConflictException(
+                        f"Match {match.id} was updated since it was read, try again"
+                    )
+
+                self.logger.info("Match UPDATED!", match_id=match.id)
+
+                return match
+        except (DatabaseMatchNotFoundException, DatabaseMoveConflictException) as e:
+            raise e
+        except Exception as e:
+            self.logger.error("Error updating match: %s", e, match_id=match.id)
+            raise DatabaseUpdateMatchException(f"Error updating match: {e}")
+
+    async def _archived_matches(
+        self, session: AsyncSession, match_ids: Iterable[UUID]
+    ) -> dict[UUID, Match]:
+        """Finished matches moved out of `matches` by the `MatchArchiver`."""
+        statement = select(ArchivedMatchDB).filter(ArchivedMatchDB.id.in_(match_ids))
+        result = await session.execute(statement)
+
+        return {
+            match.id: match
+            for match in (
+                match_instance.to_match() for match_instance in result.scalars()
+            )
+        }
+
+    async def get_match(self, match_id: UUID) -> Match | None:
+        self.logger.debug("Retrieving match", match_id=match_id)
+
+        try:
+            async with self.SessionLocal() as session:
+                result = await session.execute(select_matches_statement([match_id]))
+                if row := result.one_or_none():
+                    match = replay(*row)
+                    self.logger.info("Match RETRIEVED!", match_id=match_id)
+
+                    return match
+
+                archived = await self._archived_matches(session, [match_id])
+                if match_id in archived:
+                    self.logger.info("Archived match RETRIEVED!", match_id=match_id)
+
+                return archived.get(match_id)
+        except Exception as e:
+            self.logger.error("Error getting match: %s", e, match_id=match_id)
+            raise DatabaseGetMatchException(f"Error getting match: {e}")
+
+    async def _store_moves(
+        self, session: AsyncSession, changed: list[tuple[Match, MatchDB]]
+    ) -> bool:
+        """Appends the moves played on the changed matches, and rewrites the
+        rows needing a snapshot. False, with nothing written, if some match
+        was updated concurrently since it was read."""
+        for match, _ in changed:
+            match.version += len(match.played) or 1
+        snapshots = [
+            (match, match_db)
+            for match, match_db in changed
+            if needs_snapshot(match, match_db)
+        ]
+
+        # The transaction is ended on conflicts, so the next attempt reads the
+        # new moves
+        try:
+            if rows := [row for match, _ in changed for row in move_rows(match)]:
+                await session.execute(insert(MoveDB), rows)
+            if snapshots:
+                result = await session.execute(snapshot_matches_statement(snapshots))
+                if len(result.scalars().all()) != len(snapshots):
+                    # Rewritten by someone else since it was read
+                    await session.rollback()
+                    return False
+        except IntegrityError:
+            # Another move took the same seq
+            await session.rollback()
+            return False
+
+        await session.commit()
+        for match, _ in changed:
+            match.played = ()
+
+        return True
+
+    async def apply_move(
+        self, match_id: UUID, apply: Callable[[Match], None]
+    ) -> Match | None:
+        self.logger.debug("Applying move", match_id=match_id)
+
+        try:
+            async with self.SessionLocal() as session:
+                for _ in range(self.MAX_MOVE_ATTEMPTS):
+                    result = await session.execute(select_matches_statement([match_id]))
+                    row = result.one_or_none()
+                    if row is None:
+                        archived = await self._archived_matches(session, [match_id])
+                        if (match := archived.get(match_id)) is None:
+                            return None
+
+                        # Archived matches are finished, so the move is rejected
+                        apply(match)
+                        raise DatabaseUpdateMatchException(
+                            f"Match {match_id} is archived and cannot be updated"
+                        )
+
+                    match_db, pending = row
+                    match = replay(match_db, pending)
+                    apply(match)
+
+                    if await self._store_moves(session, [(match, match_db)]):
+                        self.logger.info("Match UPDATED!", match_id=match.id)
+
+                        return match
+
+                    self.logger.warning("Concurrent update on match", match_id=match_id)
+
+            raise DatabaseMoveConflictException(
+                f"Match {match_id} is being updated concurrently, try again"
+            )
+        except SQLAlchemyError as e:
+            self.logger.error("Error applying move: %s", e, match_id=match_id)
+            raise DatabaseUpdateMatchException(f"Error updating match: {e}")
+
+    async def apply_moves(
+        self,
+        match_ids: Iterable[UUID],
+        apply: Callable[[dict[UUID, Match]], None],
+    ) -> dict[UUID, Match]:
+        match_ids = set(match_ids)
+        self.logger.debug("Applying moves", matches=len(match_ids))
+
+        try:
+            async with self.SessionLocal() as session:
+                for _ in range(self.MAX_MOVE_ATTEMPTS):
+                    result = await session.execute(select_matches_statement(match_ids))
+                    matches: dict[UUID, Match] = {}
+                    rows: dict[UUID, MatchDB] = {}
+                    for match_db, pending in result.tuples():
+                        match = replay(match_db, pending)
+                        matches[match.id] = match
+                        rows[match.id] = match_db
+
+                    move_counts = {
+                        match.id: match.move_count for match in matches.values()
+                    }
+                    if missing := match_ids - matches.keys():
+                        # Their movements are rejected, archived matches are finished
+                        matches.update(await self._archived_matches(session, missing))
+                    apply(matches)
+
+                    changed = [
+                        (match, rows[match.id])
+                        for match in matches.values()
+                        if match.move_count
+                        != move_counts.get(match.id, match.move_count)
+                    ]
+                    if not changed:
+                        return matches
+
+                    if await self._store_moves(session, changed):
+                        self.logger.info("Matches UPDATED!", count=len(changed))
+
+                        return matches
+
+                    self.logger.warning("Concurrent update on a batch of matches")
+
+            raise DatabaseMoveConflictException(
+                "Some matches are being updated concurrently, try again"
+            )
+        except SQLAlchemyError as e:
+            self.logger.error("Error applying moves: %s", e)
+            raise DatabaseUpdateMatchException(f"Error updating matches: {e}")
+
+    async def list_matches(self, query: MatchQuery) -> list[MatchSummary]:
+        self.logger.debug("Listing matches", limit=query.limit)
+
+        try:
+            async with self.SessionLocal() as session:
+                result = await session.execute(list_matches_statement(query))
+
+                return [match_summary(row) for row in result]
+        except SQLAlchemyError as e:
+            self.logger.error("Error listing matches: %s", e)
+            raise DatabaseGetMatchException(f"Error listing matches: {e}")
@@ -0,0 +1,275 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Iterable
+from uuid import UUID
+
+from src.domain.models.match import Match
+from src.domain.models.match_page import MatchQuery, MatchSummary
+from src.domain.models.status import Status
+from src.domain.repositories.async_match_database_repository import (
+    AsyncMatchDatabaseRepository,
+)
+from src.domain.repositories.match_database_repository import MatchDatabaseRepository
+from src.infra.settings import env_bool, env_float, env_int
+
+
+@dataclass(frozen=True)
+class CacheSettings:
+    """`size` 0 disables the cache. Finished matches never change again, so
+    they are kept for `finished_ttl` seconds instead of `ttl`.
+
+    Each worker has its own cache, a match played through another worker is
+    only seen once its entry expires. Without `playing`, only finished matches
+    are cached, the default with WEB_CONCURRENCY over 1.
+    """
+
+    size: int = 10_000
+    ttl: float = 5.0
+    finished_ttl: float = 600.0
+    playing: bool = True
+
+    @staticmethod
+    def from_env() -> "CacheSettings":
+        return CacheSettings(
+            size=env_int("MATCH_CACHE_SIZE", CacheSettings.size),
+            ttl=env_float("MATCH_CACHE_TTL", CacheSettings.ttl),
+            finished_ttl=env_float(
+                "MATCH_CACHE_FINISHED_TTL", CacheSettings.finished_ttl
+            ),
+            playing=env_bool("MATCH_CACHE_PLAYING", env_int("WEB_CONCURRENCY", 1) <= 1),
+        )
+
+
+class MatchCache:
+    """Thread-safe LRU of matches with a per-entry expiration time.
+
+    Matches are copied in and out, so callers mutating them never alter the
+    cached state. An entry is never replaced by an older version of its match,
+    read before it was cached.
+    """
+
+    def __init__(self, settings: CacheSettings):
+        self.settings = settings
+        self.entries: OrderedDict[UUID, tuple[Match, float]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, match_id: UUID) -> Match | None:
+        with self.lock:
+            entry = self.entries.get(match_id)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            match, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self.entries[match_id]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(match_id)
+            self.hits += 1
+
+        return match.copy()
+
+    def put(self, match: Match) -> None:
+        playing = match.status == Status.PLAYING
+        ttl = self.settings.ttl if playing else self.settings.finished_ttl
+        entry = (match.copy(), time.monotonic() + ttl)
+
+        with self.lock:
+            current = self.entries.get(match.id)
+            if current is not None and current[0].version > match.version:
+                return
+            if playing and not self.settings.playing:
+                self.entries.pop(match.id, None)
+                return
+
+            self.entries[match.id] = entry
+            self.entries.move_to_end(match.id)
+            while len(self.entries) > self.settings.size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, match_id: UUID) -> None:
+        with self.lock:
+            self.entries.pop(match_id, None)
+
+    def hit_ratio(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def _reject_if_finished(
+    cache: MatchCache, match_id: UUID, apply: Callable[[Match], None]
+) -> None:
+    # Moves on a finished match always fail validation, there is no need to
+    # read it from the database to find out
+    if (match := cache.get(match_id)) and match.status != Status.PLAYING:
+        apply(match)
+
+
+class CachedMatchRepository(MatchDatabaseRepository):
+    """Read-through, write-through cache in front of any repository."""
+
+    def __init__(self, repository: MatchDatabaseRepository, cache: MatchCache):
+        self.repository = repository
+        self.cache = cache
+
+    def get_match(self, match_id: UUID) -> Match | None:
+        if match := self.cache.get(match_id):
+            return match
+
+        if match := self.repository.get_match(match_id):
+            self.cache.put(match)
+
+        return match
+
+    def save_match(self, match: Match) -> Match:
+        saved = self.repository.save_match(match)
+        self.cache.put(saved)
+
+        return saved
+
+    def save_matches(self, matches: list[Match]) -> list[Match]:
+        # Bulk created matches are not cached, they would evict the ones in play
+        return self.repository.save_matches(matches)
+
+    def update_match(self, match: Match) -> Match:
+        try:
+            updated = self.repository.update_match(match)
+        except Exception:
+            self.cache.invalidate(match.id)
+            raise
+
+        self.cache.put(updated)
+
+        return updated
+
+    def apply_move(
+        self, match_id: UUID, apply: Callable[[Match], None]
+    ) -> Match | None:
+        _reject_if_finished(self.cache, match_id, apply)
+
+        try:
+            match = self.repository.apply_move(match_id, apply)
+        except Exception:
+            self.cache.invalidate(match_id)
+            raise
+
+        if match:
+            self.cache.put(match)
+
+        return match
+
+    def apply_moves(
+        self,
+        match_ids: Iterable[UUID],
+        apply: Callable[[dict[UUID, Match]], None],
+    ) -> dict[UUID, Match]:
+        match_ids = list(match_ids)
+        try:
+            matches = self.repository.apply_moves(match_ids, apply)
+        except Exception:
+            for match_id in match_ids:
+                self.cache.invalidate(match_id)
+            raise
+
+        for match in matches.values():
+            self.cache.put(match)
+
+        return matches
+
+    def list_matches(self, query: MatchQuery) -> list[MatchSummary]:
+        # Listings are scans, they are neither served from nor added to the cache
+        return self.repository.list_matches(query)
+
+
+class AsyncCachedMatchRepository(AsyncMatchDatabaseRepository):
+    """Async counterpart of `CachedMatchRepository` sharing the same cache."""
+
+    def __init__(self, repository: AsyncMatchDatabaseRepository, cache: MatchCache):
+        self.repository = repository
+        self.cache = cache
+
+    async def get_match(self, match_id: UUID) -> Match | None:
+        if match := self.cache.get(match_id):
+            return match
+
+        if match := await self.repository.get_match(match_id):
+            self.cache.put(match)
+
+        return match
+
+    async def save_match(self, match: Match) -> Match:
+        saved = await self.repository.save_match(match)
+        self.cache.put(saved)
+
+        return saved
+
+    async def save_matches(self, matches: list[Match]) -> list[Match]:
+        # Bulk created matches are not cached, they would evict the ones in play
+        return await self.repository.save_matches(matches)
+
+    async def update_match(self, match: Match) -> Match:
+        try:
+            updated = await self.repository.update_match(match)
+        except Exception:
+            self.cache.invalidate(match.id)
+            raise
+
+        self.cache.put(updated)
+
+        return updated
+
+    async def apply_move(
+        self, match_id: UUID, apply: Callable[[Match], None]
+    ) -> Match | None:
+        _reject_if_finished(self.cache, match_id, apply)
+
+        try:
+            match = await self.repository.apply_move(match_id, apply)
+        except Exception:
+            self.cache.invalidate(match_id)
+            raise
+
+        if match:
+            self.cache.put(match)
+
+        return match
+
+    async def apply_moves(
+        self,
+        match_ids: Iterable[UUID],
+        apply: Callable[[dict[UUID, Match]], None],
+    ) -> dict[UUID, Match]:
+        match_ids = list(match_ids)
+        try:
+            matches = await self.repository.apply_moves(match_ids, apply)
+        except Exception:
+            for match_id in match_ids:
+                self.cache.invalidate(match_id)
+            raise
+
+        for match in matches.values():
+            self.cache.put(match)
+
+        return matches
+
+    async def list_matches(self, query: MatchQuery) -> list[MatchSummary]:
+        return await self.repository.list_matches(query)
@@ -0,0 +1,311 @@
+"""Responses to the requests sent with an Idempotency-Key header.
+
+Clients retry the requests that timed out, although they may have succeeded.
+The response to the first request with a key is kept and replayed to its
+retries, so a move is not played twice and a retried /create does not leave
+an orphan match behind. Retries arriving while the first request still runs
+wait for its response instead of running it again.
+
+Responses are kept in a bounded LRU of each worker process. With
+IDEMPOTENCY_STORE=postgresql, the default with several workers, they are also
+kept in `idempotency_keys`, so retries reaching another worker or node find
+them as well.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import timedelta
+
+from sqlalchemy import Delete, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.domain.exception.errors import (
+    IdempotencyKeyInProgressException,
+    IdempotencyKeyReusedException,
+)
+from src.domain.logging.logger_interface import LoggerInterface
+from src.infra.entities.idempotency_key_db import IdempotencyKeyDB
+from src.infra.settings import env_float, env_int
+
+MEMORY_STORE = "memory"
+POSTGRESQL_STORE = "postgresql"
+
+
+@dataclass(frozen=True)
+class IdempotencySettings:
+    """`size` 0 disables the idempotency keys.
+
+    Responses are kept for `ttl` seconds. A request holds its key for
+    `lock_timeout` seconds at most, which is also how long its retries wait
+    for its response. Responses over `max_body` bytes are not kept, their
+    retries are rejected instead of running again.
+    """
+
+    size: int = 10_000
+    ttl: float = 86_400.0
+    lock_timeout: float = 60.0
+    max_body: int = 1_048_576
+    # Between two lookups of a key held by another node
+    poll_interval: float = 0.05
+    store: str = MEMORY_STORE
+
+    @staticmethod
+    def from_env() -> "IdempotencySettings":
+        return IdempotencySettings(
+            size=env_int("IDEMPOTENCY_CACHE_SIZE", IdempotencySettings.size),
+            ttl=env_float("IDEMPOTENCY_TTL", IdempotencySettings.ttl),
+            lock_timeout=env_float(
+                "IDEMPOTENCY_LOCK_TIMEOUT", IdempotencySettings.lock_timeout
+            ),
+            max_body=env_int("IDEMPOTENCY_MAX_BODY", IdempotencySettings.max_body),
+            store=os.getenv("IDEMPOTENCY_STORE") or default_store(),
+        )
+
+
+def default_store() -> str:
+    """The memory of a worker process only serves the retries reaching that
+    same worker, with several of them they are shared through the database."""
+    return POSTGRESQL_STORE if env_int("WEB_CONCURRENCY", 1) > 1 else MEMORY_STORE
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    # Hash of the request the response is for
+    fingerprint: bytes
+    status_code: int
+    content_type: str | None
+    body: bytes
+
+
+class ResponseCache:
+    """LRU of the responses of a process, each one expiring `ttl` seconds
+    after it was stored."""
+
+    def __init__(self, settings: IdempotencySettings):
+        self.settings = settings
+        self.entries: OrderedDict[str, tuple[StoredResponse, float]] = OrderedDict()
+
+    def get(self, key: str) -> StoredResponse | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        response, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            return None
+
+        self.entries.move_to_end(key)
+        return response
+
+    def put(self, key: str, response: StoredResponse) -> None:
+        self.entries[key] = (response, time.monotonic() + self.settings.ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.settings.size:
+            self.entries.popitem(last=False)
+
+
+class PostgreSQLKeys:
+    """Keys shared by every node. A row without status code is held by a
+    request in flight. It is taken over once expired, in case the process
+    running that request died."""
+
+    PURGE_BATCH_SIZE = 1_000
+    PURGE_INTERVAL = 60.0
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        settings: IdempotencySettings,
+    ):
+        self.session_factory = session_factory
+        self.settings = settings
+        self.purged_at = time.monotonic()
+
+    async def claim(self, key: str, fingerprint: bytes) -> bool:
+        """Holds `key` for a new request, unless another one holds it or its
+        response has not expired yet."""
+        values = insert(IdempotencyKeyDB).values(
+            key=key,
+            fingerprint=fingerprint,
+            expires_at=func.now() + timedelta(seconds=self.settings.lock_timeout),
+        )
+        statement = values.on_conflict_do_update(
+            index_elements=[IdempotencyKeyDB.key],
+            set_={
+                "fingerprint": values.excluded.fingerprint,
+                "status_code": None,
+                "content_type": None,
+                "body": None,
+                "expires_at": values.excluded.expires_at,
+            },
+            where=IdempotencyKeyDB.expires_at <= func.now(),
+        ).returning(IdempotencyKeyDB.key)
+
+        async with self.session_factory() as session:
+            claimed = (await session.execute(statement)).scalar_one_or_none()
+            await session.commit()
+
+        return claimed is not None
+
+    async def get(self, key: str) -> IdempotencyKeyDB | None:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(IdempotencyKeyDB).where(IdempotencyKeyDB.key == key)
+            )
+            return result.scalar_one_or_none()
+
+    async def complete(self, key: str, response: StoredResponse) -> None:
+        async with self.session_factory() as session:
+            await session.execute(
+                update(IdempotencyKeyDB)
+                .where(IdempotencyKeyDB.key == key)
+                .values(
+                    status_code=response.status_code,
+                    content_type=response.content_type,
+                    body=response.body,
+                    expires_at=func.now() + timedelta(seconds=self.settings.ttl),
+                )
+            )
+            if time.monotonic() - self.purged_at >= self.PURGE_INTERVAL:
+                self.purged_at = time.monotonic()
+                await session.execute(self._purge_statement())
+            await session.commit()
+
+    async def release(self, key: str) -> None:
+        async with self.session_factory() as session:
+            await session.execute(
+                delete(IdempotencyKeyDB).where(
+                    IdempotencyKeyDB.key == key, IdempotencyKeyDB.status_code.is_(None)
+                )
+            )
+            await session.commit()
+
+    def _purge_statement(self) -> Delete:
+        # A batch at a time, the expired keys of a busy day would hold too
+        # many row locks at once
+        expired = (
+            select(IdempotencyKeyDB.key)
+            .where(IdempotencyKeyDB.expires_at < func.now())
+            .limit(self.PURGE_BATCH_SIZE)
+        )
+        return delete(IdempotencyKeyDB).where(IdempotencyKeyDB.key.in_(expired))
+
+
+class IdempotencyStore:
+    """Responses by key, and the requests in flight in this process."""
+
+    def __init__(
+        self,
+        settings: IdempotencySettings,
+        logger: LoggerInterface,
+        keys: PostgreSQLKeys | None = None,
+    ):
+        self.settings = settings
+        self.logger = logger
+        self.keys = keys
+        self.cache = ResponseCache(settings)
+        self.in_flight: dict[str, tuple[bytes, asyncio.Future[None]]] = {}
+
+    async def begin(self, key: str, fingerprint: bytes) -> StoredResponse | None:
+        """Response to replay for `key`, waiting for it if the request holding
+        the key is in flight. None when there is none, the caller then runs
+        the request and must `complete` or `release` the key."""
+        deadline = time.monotonic() + self.settings.lock_timeout
+        while (response := self.cache.get(key)) is None and key in self.in_flight:
+            held_fingerprint, done = self.in_flight[key]
+            self._check(held_fingerprint, fingerprint)
+            try:
+                await asyncio.wait_for(
+                    asyncio.shield(done), deadline - time.monotonic()
+                )
+            except asyncio.TimeoutError:
+                raise self._in_progress()
+
+        if response is not None:
+            self._check(response.fingerprint, fingerprint)
+            return response
+
+        # Retries of this process wait on this request from now on, even
+        # while the key is being claimed from the database
+        self.in_flight[key] = (fingerprint, asyncio.get_running_loop().create_future())
+        if self.keys is None:
+            return None
+
+        try:
+            response = await self._claim(key, fingerprint, deadline)
+        except BaseException:
+            self._finish(key)
+            raise
+
+        if response is not None:
+            self._finish(key)
+
+        return response
+
+    async def complete(self, key: str, response: StoredResponse) -> None:
+        self.cache.put(key, response)
+        try:
+            if self.keys is not None:
+                await self.keys.complete(key, response)
+        except SQLAlchemyError as e:
+            # Only retries reaching another node run the request again
+            self.logger.warning("Error storing idempotent response: %s", e)
+        finally:
+            self._finish(key)
+
+    async def release(self, key: str) -> None:
+        try:
+            if self.keys is not None:
+                await self.keys.release(key)
+        except SQLAlchemyError as e:
+            # The key is taken over once expired
+            self.logger.warning("Error releasing idempotency key: %s", e)
+        finally:
+            self._finish(key)
+
+    async def _claim(
+        self, key: str, fingerprint: bytes, deadline: float
+    ) -> StoredResponse | None:
+        assert self.keys is not None
+        while not await self.keys.claim(key, fingerprint):
+            if (row := await self.keys.get(key)) is not None:
+                self._check(row.fingerprint, fingerprint)
+                if row.status_code is not None:
+                    response = StoredResponse(
+                        row.fingerprint,
+                        row.status_code,
+                        row.content_type,
+                        row.body or b"",
+                    )
+                    self.cache.put(key, response)
+                    return response
+
+            if time.monotonic() >= deadline:
+                raise self._in_progress()
+
+            await asyncio.sleep(self.settings.poll_interval)
+
+        return None
+
+    def _finish(self, key: str) -> None:
+        if (entry := self.in_flight.pop(key, None)) is not None:
+            entry[1].set_result(None)
+
+    @staticmethod
+    def _check(held_fingerprint: bytes, fingerprint: bytes) -> None:
+        if held_fingerprint != fingerprint:
+            raise IdempotencyKeyReusedException(
+                "Idempotency key already used for another request"
+            )
+
+    @staticmethod
+    def _in_progress() -> IdempotencyKeyInProgressException:
+        return IdempotencyKeyInProgressException(
+            "A request with this idempotency key is still in progress"
+        )
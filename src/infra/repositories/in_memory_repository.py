@@ -1,23 +1,118 @@
+from datetime import datetime, timezone
+from typing import Callable, Iterable
 from uuid import UUID
 
 from src.domain.logging.logger_interface import LoggerInterface
 from src.domain.models.match import Match
+from src.domain.models.match_page import MatchQuery, MatchSummary
 from src.domain.repositories.match_database_repository import MatchDatabaseRepository
 
 
+def _now() -> datetime:
+    # Naive UTC, like the timestamps read from the database
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class InMemoryRepository(MatchDatabaseRepository):
     cache: dict[UUID, Match] = {}
+    # Creation and last update times, only used by the listings
+    timestamps: dict[UUID, tuple[datetime, datetime]] = {}
 
     def __init__(self, logger: LoggerInterface):
         self.logger = logger
 
+    def _touch(self, match_id: UUID) -> None:
+        now = _now()
+        created_at, _ = self.timestamps.get(match_id, (now, now))
+        self.timestamps[match_id] = (created_at, now)
+
     def get_match(self, match_id: UUID) -> Match | None:
         return self.cache.get(match_id)
 
     def save_match(self, match: Match) -> Match:
         self.cache[match.id] = match
+        self._touch(match.id)
         return match
 
+    def save_matches(self, matches: list[Match]) -> list[Match]:
+        self.cache.update((match.id, match) for match in matches)
+        now = _now()
+        self.timestamps.update((match.id, (now, now)) for match in matches)
+        return matches
+
     def update_match(self, match: Match) -> Match:
         self.cache[match.id] = match
+        self._touch(match.id)
         return match
+
+    def apply_move(
+        self, match_id: UUID, apply: Callable[[Match], None]
+    ) -> Match | None:
+        if match := self.cache.get(match_id):
+            apply(match)
+            match.version += 1
+            self._touch(match_id)
+
+        return match
+
+    def apply_moves(
+        self,
+        match_ids: Iterable[UUID],
+        apply: Callable[[dict[UUID, Match]], None],
+    ) -> dict[UUID, Match]:
+        matches = {
+            match_id: self.cache[match_id]
+            for match_id in match_ids
+            if match_id in self.cache
+        }
+        move_counts = {match.id: match.move_count for match in matches.values()}
+        apply(matches)
+
+        for match in matches.values():
+            if match.move_count != move_counts[match.id]:
+                match.version += 1
+                self._touch(match.id)
+
+        return matches
+
+    def _summary(self, match: Match, include_board: bool) -> MatchSummary:
+        created_at, updated_at = self.timestamps.get(
+            match.id, (datetime.min, datetime.min)
+        )
+        return MatchSummary(
+            id=match.id,
+            status=match.status,
+            turn=match.turn,
+            board_size=match.board_size,
+            win_length=match.win_length,
+            move_count=match.move_count,
+            computer=match.computer,
+            created_at=created_at,
+            updated_at=updated_at,
+            board=[list(row) for row in match.board] if include_board else None,
+        )
+
+    def list_matches(self, query: MatchQuery) -> list[MatchSummary]:
+        ranges = (
+            ("created_at", query.created_from, query.created_to),
+            ("updated_at", query.updated_from, query.updated_to),
+        )
+        summaries = []
+        for match in self.cache.values():
+            if query.status is not None and match.status != query.status:
+                continue
+
+            summary = self._summary(match, query.include_board)
+            if query.after is not None and summary.key(query.sort) >= query.after:
+                continue
+
+            if all(
+                (start is None or getattr(summary, name) >= start)
+                and (end is None or getattr(summary, name) < end)
+                for name, start, end in ranges
+            ):
+                summaries.append(summary)
+
+        summaries.sort(key=lambda summary: summary.key(query.sort), reverse=True)
+
+        return summaries[: query.limit]
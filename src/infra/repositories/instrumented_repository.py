@@ -0,0 +1,158 @@
+import time
+from typing import Callable, Iterable
+from uuid import UUID
+
+from src.domain.models.match import Match
+from src.domain.models.match_page import MatchQuery, MatchSummary
+from src.domain.repositories.async_match_database_repository import (
+    AsyncMatchDatabaseRepository,
+)
+from src.domain.repositories.match_database_repository import MatchDatabaseRepository
+from src.infra.metrics.metrics import REPOSITORY_LATENCY
+from src.infra.metrics.registry import HistogramValue
+
+OPERATIONS = (
+    "get_match",
+    "save_match",
+    "save_matches",
+    "update_match",
+    "apply_move",
+    "apply_moves",
+    "list_matches",
+)
+
+
+def _timers(
+    repository: MatchDatabaseRepository | AsyncMatchDatabaseRepository,
+) -> dict[str, HistogramValue]:
+    name = type(repository).__name__
+    return {
+        operation: REPOSITORY_LATENCY.labels(name, operation)
+        for operation in OPERATIONS
+    }
+
+
+class InstrumentedMatchRepository(MatchDatabaseRepository):
+    """Times every call to the wrapped repository, failed ones included."""
+
+    def __init__(self, repository: MatchDatabaseRepository):
+        self.repository = repository
+        self.timers = _timers(repository)
+
+    def get_match(self, match_id: UUID) -> Match | None:
+        started = time.perf_counter()
+        try:
+            return self.repository.get_match(match_id)
+        finally:
+            self.timers["get_match"].observe(time.perf_counter() - started)
+
+    def save_match(self, match: Match) -> Match:
+        started = time.perf_counter()
+        try:
+            return self.repository.save_match(match)
+        finally:
+            self.timers["save_match"].observe(time.perf_counter() - started)
+
+    def save_matches(self, matches: list[Match]) -> list[Match]:
+        started = time.perf_counter()
+        try:
+            return self.repository.save_matches(matches)
+        finally:
+            self.timers["save_matches"].observe(time.perf_counter() - started)
+
+    def update_match(self, match: Match) -> Match:
+        started = time.perf_counter()
+        try:
+            return self.repository.update_match(match)
+        finally:
+            self.timers["update_match"].observe(time.perf_counter() - started)
+
+    def apply_move(
+        self, match_id: UUID, apply: Callable[[Match], None]
+    ) -> Match | None:
+        started = time.perf_counter()
+        try:
+            return self.repository.apply_move(match_id, apply)
+        finally:
+            self.timers["apply_move"].observe(time.perf_counter() - started)
+
+    def apply_moves(
+        self,
+        match_ids: Iterable[UUID],
+        apply: Callable[[dict[UUID, Match]], None],
+    ) -> dict[UUID, Match]:
+        started = time.perf_counter()
+        try:
+            return self.repository.apply_moves(match_ids, apply)
+        finally:
+            self.timers["apply_moves"].observe(time.perf_counter() - started)
+
+    def list_matches(self, query: MatchQuery) -> list[MatchSummary]:
+        started = time.perf_counter()
+        try:
+            return self.repository.list_matches(query)
+        finally:
+            self.timers["list_matches"].observe(time.perf_counter() - started)
+
+
+class AsyncInstrumentedMatchRepository(AsyncMatchDatabaseRepository):
+    """Async counterpart of `InstrumentedMatchRepository`."""
+
+    def __init__(self, repository: AsyncMatchDatabaseRepository):
+        self.repository = repository
+        self.timers = _timers(repository)
+
+    async def get_match(self, match_id: UUID) -> Match | None:
+        started = time.perf_counter()
+        try:
+            return await self.repository.get_match(match_id)
+        finally:
+            self.timers["get_match"].observe(time.perf_counter() - started)
+
+    async def save_match(self, match: Match) -> Match:
+        started = time.perf_counter()
+        try:
+            return await self.repository.save_match(match)
+        finally:
+            self.timers["save_match"].observe(time.perf_counter() - started)
+
+    async def save_matches(self, matches: list[Match]) -> list[Match]:
+        started = time.perf_counter()
+        try:
+            return await self.repository.save_matches(matches)
+        finally:
+            self.timers["save_matches"].observe(time.perf_counter() - started)
+
+    async def update_match(self, match: Match) -> Match:
+        started = time.perf_counter()
+        try:
+            return await self.repository.update_match(match)
+        finally:
+            self.timers["update_match"].observe(time.perf_counter() - started)
+
+    async def apply_move(
+        self, match_id: UUID, apply: Callable[[Match], None]
+    ) -> Match | None:
+        started = time.perf_counter()
+        try:
+            return await self.repository.apply_move(match_id, apply)
+        finally:
+            self.timers["apply_move"].observe(time.perf_counter() - started)
+
+    async def apply_moves(
+        self,
+        match_ids: Iterable[UUID],
+        apply: Callable[[dict[UUID, Match]], None],
+    ) -> dict[UUID, Match]:
+        started = time.perf_counter()
+        try:
+            return await self.repository.apply_moves(match_ids, apply)
+        finally:
+            self.timers["apply_moves"].observe(time.perf_counter() - started)
+
+    async def list_matches(self, query: MatchQuery) -> list[MatchSummary]:
+        started = time.perf_counter()
+        try:
+            return await self.repository.list_matches(query)
+        finally:
+            self.timers["list_matches"].observe(time.perf_counter() - started)
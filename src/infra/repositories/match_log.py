@@ -0,0 +1,483 @@
+"""Write-ahead log and snapshots of the in-memory matches.
+
+Every change to the stored matches is appended to the log as the whole new
+state of the match, or as its removal, so replaying a record twice does no
+harm. The log is split in numbered segments. A snapshot holds every match at
+some point and the number of the first segment written after it, the older
+ones are deleted once it is on disk. Recovery loads the snapshot and replays
+the segments left, in order.
+
+Writes are made durable by a background thread calling fsync once for all the
+records appended while the previous fsync ran, plus `group_commit_ms`, the
+callers waiting for it (group commit). With `sync` "async" they do not wait, a
+crash then loses the changes of the last fsync at most. Once an fsync fails
+the log is failed: what reached the disk is unknown, so the waiting callers
+and every later append get an OSError.
+
+Files in the data directory:
+
+    snapshot.bin      every match, see `write_snapshot`
+    wal.<n>.log       changes after the snapshot, in order
+    lock              held by the process using the directory
+"""
+
+import asyncio
+import fcntl
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, TextIO
+from uuid import UUID
+
+from src.domain.models.match import Match
+from src.infra.entities.match_db import STATUSES, TURNS, MatchColumns
+from src.infra.settings import env_float
+
+SNAPSHOT = "snapshot.bin"
+SEGMENT_PREFIX = "wal."
+SEGMENT_SUFFIX = ".log"
+LOCK = "lock"
+
+MAGIC = b"TTTW"
+VERSION = 1
+# Magic, version and first segment not covered by the snapshot
+SNAPSHOT_HEADER = struct.Struct("<4sHQ")
+# Payload length and CRC32, before every record
+FRAME = struct.Struct("<II")
+
+MATCH_RECORD = 0
+DELETE_RECORD = 1
+# Kind, id, status, turn, board size, win length, move count, version,
+# computer (-1 for none), creation and update times, followed by the board
+MATCH = struct.Struct("<B16sBBBBHIbdd")
+DELETE = struct.Struct("<B16s")
+
+SYNC_GROUP = "group"
+SYNC_ASYNC = "async"
+
+
+@dataclass(frozen=True)
+class DurabilitySettings:
+    """`directory` empty keeps the matches in memory only."""
+
+    directory: str = ""
+    sync: str = SYNC_GROUP
+    # Time the log thread waits for more records before an fsync. Records
+    # appended during an fsync are synced together by the next one anyway
+    group_commit_ms: float = 0.0
+    snapshot_interval: float = 300.0
+
+    @staticmethod
+    def from_env() -> "DurabilitySettings":
+        return DurabilitySettings(
+            directory=os.getenv("MEMORY_DATA_DIR") or DurabilitySettings.directory,
+            sync=os.getenv("MEMORY_WAL_SYNC") or DurabilitySettings.sync,
+            group_commit_ms=env_float(
+                "MEMORY_WAL_GROUP_COMMIT_MS", DurabilitySettings.group_commit_ms
+            ),
+            snapshot_interval=env_float(
+                "MEMORY_SNAPSHOT_INTERVAL", DurabilitySettings.snapshot_interval
+            ),
+        )
+
+
+def encode_match(match: Match, created_at: float, updated_at: float) -> bytes:
+    return MATCH.pack(
+        MATCH_RECORD,
+        match.id.bytes,
+        STATUSES.index(match.status),
+        TURNS.index(match.turn),
+        match.board_size,
+        match.win_length,
+        match.move_count,
+        match.version,
+        -1 if match.computer is None else TURNS.index(match.computer),
+        created_at,
+        updated_at,
+    ) + MatchColumns.board_to_bytes(match.board)
+
+
+def encode_delete(match_id: UUID) -> bytes:
+    return DELETE.pack(DELETE_RECORD, match_id.bytes)
+
+
+def decode(
+    payload: bytes,
+    boards: dict[tuple[int, bytes], list[list[str | None]]] | None = None,
+) -> tuple[UUID, tuple[Match, float, float] | None]:
+    """Id of the match of a record, with its state or None if it was removed.
+
+    Boards are shared by the records with the same `boards` cache, only for
+    matches that are never modified, like the stored ones.
+    """
+    if payload[0] == DELETE_RECORD:
+        return UUID(bytes=DELETE.unpack(payload)[1]), None
+
+    (
+        _,
+        id,
+        status,
+        turn,
+        board_size,
+        win_length,
+        move_count,
+        version,
+        computer,
+        created_at,
+        updated_at,
+    ) = MATCH.unpack_from(payload)
+    # Boards of different sizes may pack to the same bytes
+    packed = (board_size, payload[MATCH.size :])
+    board = None if boards is None else boards.get(packed)
+    if board is None:
+        board = MatchColumns.bytes_to_board(packed[1], board_size)
+        if boards is not None:
+            boards[packed] = board
+
+    match = Match(
+        id=UUID(bytes=id),
+        board=board,
+        turn=TURNS[turn],
+        status=STATUSES[status],
+        board_size=board_size,
+        win_length=win_length,
+        move_count=move_count,
+        version=version,
+        computer=None if computer < 0 else TURNS[computer],
+    )
+    return match.id, (match, created_at, updated_at)
+
+
+def frame(payload: bytes) -> bytes:
+    return FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_frames(
+    data: bytes | mmap.mmap, offset: int = 0
+) -> Iterator[tuple[bytes, int]]:
+    """Payload of every complete record, with the offset after it. Stops at
+    the first torn or corrupted one, the tail of a crashed write."""
+    while offset + FRAME.size <= len(data):
+        length, crc = FRAME.unpack_from(data, offset)
+        end = offset + FRAME.size + length
+        payload = data[offset + FRAME.size : end]
+        if end > len(data) or zlib.crc32(payload) != crc:
+            return
+
+        yield payload, end
+        offset = end
+
+
+def segment_path(directory: Path, number: int) -> Path:
+    return directory / f"{SEGMENT_PREFIX}{number:012d}{SEGMENT_SUFFIX}"
+
+
+def segments(directory: Path) -> list[int]:
+    return sorted(
+        int(path.name[len(SEGMENT_PREFIX) : -len(SEGMENT_SUFFIX)])
+        for path in directory.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}")
+    )
+
+
+def _fsync_directory(directory: Path) -> None:
+    # Makes the creation, renaming and removal of its files durable
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_snapshot(
+    directory: Path, records: Iterable[bytes], next_segment: int
+) -> None:
+    """Replaces the snapshot, atomically, with the given records."""
+    frames = [frame(record) for record in records]
+    size = SNAPSHOT_HEADER.size + sum(len(framed) for framed in frames)
+    temporary = directory / f"{SNAPSHOT}.tmp"
+
+    with open(temporary, "w+b") as file:
+        file.truncate(size)
+        with mmap.mmap(file.fileno(), size) as mapped:
+            SNAPSHOT_HEADER.pack_into(mapped, 0, MAGIC, VERSION, next_segment)
+            offset = SNAPSHOT_HEADER.size
+            for framed in frames:
+                mapped[offset : offset + len(framed)] = framed
+                offset += len(framed)
+            mapped.flush()
+        os.fsync(file.fileno())
+
+    os.replace(temporary, directory / SNAPSHOT)
+    _fsync_directory(directory)
+
+
+def recover(directory: Path) -> tuple[dict[UUID, tuple[Match, float, float]], int]:
+    """Matches of the snapshot and the log, and the number of the segment to
+    write next. Torn records at the end of the log are cut off."""
+    # Last record of each match by id, only decoded once all are read, the
+    # log holds many of the same match
+    records: dict[bytes, bytes] = {}
+    first_segment = 0
+
+    if (snapshot := directory / SNAPSHOT).exists() and snapshot.stat().st_size:
+        with open(snapshot, "rb") as file, mmap.mmap(
+            file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mapped:
+            magic, version, first_segment = SNAPSHOT_HEADER.unpack_from(mapped)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{snapshot} is not a version {VERSION} snapshot")
+
+            for payload, _ in read_frames(mapped, SNAPSHOT_HEADER.size):
+                records[payload[1:17]] = payload
+
+    numbers = segments(directory)
+    for number in numbers:
+        path = segment_path(directory, number)
+        if number < first_segment:
+            # Left by a crash right after the snapshot replacing it
+            path.unlink()
+            continue
+
+        data = path.read_bytes()
+        end = 0
+        for payload, end in read_frames(data):
+            if payload[0] == DELETE_RECORD:
+                records.pop(payload[1:17], None)
+            else:
+                records[payload[1:17]] = payload
+
+        if end < len(data):
+            os.truncate(path, end)
+
+    boards: dict[tuple[int, bytes], list[list[str | None]]] = {}
+    matches: dict[UUID, tuple[Match, float, float]] = {}
+    for payload in records.values():
+        match_id, state = decode(payload, boards)
+        assert state is not None
+        matches[match_id] = state
+
+    next_segment = max([first_segment, *(number + 1 for number in numbers)])
+    return matches, next_segment
+
+
+def lock_directory(directory: Path) -> TextIO:
+    """Lock of the data directory, held until the returned file is closed."""
+    lock_file = open(directory / LOCK, "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        raise RuntimeError(f"{directory} is used by another process")
+
+    return lock_file
+
+
+class MatchLog:
+    """Log segments of a data directory, appended to by any thread. Takes
+    over `lock_file`, from `lock_directory`."""
+
+    def __init__(
+        self,
+        directory: Path,
+        settings: DurabilitySettings,
+        next_segment: int,
+        lock_file: TextIO,
+    ):
+        self.directory = directory
+        self.settings = settings
+        # Appends and segment changes
+        self.lock = threading.Lock()
+        # Held while syncing, so the segment is not closed meanwhile
+        self.sync_lock = threading.Lock()
+        # Wakes the log thread up, and the callers waiting for it
+        self.appended_event = threading.Condition()
+        self.synced = threading.Condition()
+        # Records appended and made durable since the log was opened
+        self.appended = 0
+        self.durable = 0
+        self.syncs = 0
+        self.waiters: list[tuple[int, asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self.closed = False
+        self.failure: OSError | None = None
+        self.lock_file = lock_file
+
+        self.segment = next_segment
+        self.fd = self._open_segment(next_segment)
+        # Bytes of the segment, where the next append starts
+        self.size = os.fstat(self.fd).st_size
+        self.thread = threading.Thread(target=self._sync_loop, daemon=True)
+        self.thread.start()
+
+    def _open_segment(self, number: int) -> int:
+        fd = os.open(
+            segment_path(self.directory, number),
+            os.O_WRONLY | os.O_CREAT | os.O_APPEND,
+            0o644,
+        )
+        _fsync_directory(self.directory)
+        return fd
+
+    def append(self, records: list[bytes]) -> int:
+        """Writes the records, returns the position to wait for. Nothing is
+        written when it raises."""
+        data = memoryview(b"".join(frame(record) for record in records))
+        with self.lock:
+            self._check()
+            written = 0
+            try:
+                # Short writes, like on a full disk, write the rest or raise
+                while written < len(data):
+                    written += os.write(self.fd, data[written:])
+            except OSError:
+                self._cut(self.size)
+                raise
+
+            self.size += len(data)
+            self.appended += 1
+            position = self.appended
+
+        with self.appended_event:
+            self.appended_event.notify()
+
+        return position
+
+    def wait(self, position: int) -> None:
+        """Returns once the record at `position` is on disk."""
+        if self.settings.sync != SYNC_GROUP:
+            return
+
+        with self.synced:
+            self.synced.wait_for(
+                lambda: self.durable >= position or self.failure is not None
+            )
+            if self.durable < position:
+                self._check()
+
+    async def wait_async(self, position: int) -> None:
+        if self.settings.sync != SYNC_GROUP:
+            return
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self.synced:
+            if self.durable >= position:
+                return
+            self._check()
+            self.waiters.append((position, loop, future))
+
+        await future
+
+    def rotate(self) -> int:
+        """Starts a new segment, returns its number."""
+        with self.sync_lock, self.lock:
+            self._check()
+            self._fsync()
+            os.close(self.fd)
+            self.segment += 1
+            self.fd = self._open_segment(self.segment)
+            self.size = 0
+
+            return self.segment
+
+    def remove_segments(self, before: int) -> None:
+        for number in segments(self.directory):
+            if number < before:
+                segment_path(self.directory, number).unlink()
+        _fsync_directory(self.directory)
+
+    def close(self) -> None:
+        with self.appended_event:
+            self.closed = True
+            self.appended_event.notify()
+        self.thread.join()
+
+        try:
+            with self.sync_lock, self.lock:
+                if self.failure is None:
+                    self._fsync()
+                    self._set_durable(self.appended)
+        finally:
+            os.close(self.fd)
+            # Later appends fail, instead of writing to a reused descriptor
+            self.fd = -1
+            self.lock_file.close()
+
+    def _sync_loop(self) -> None:
+        window = self.settings.group_commit_ms / 1000
+        while True:
+            with self.appended_event:
+                self.appended_event.wait_for(
+                    lambda: self.appended > self.durable or self.closed
+                )
+                if self.closed:
+                    return
+
+            if window > 0:
+                # Lets more records join this fsync
+                time.sleep(window)
+
+            with self.sync_lock:
+                with self.lock:
+                    position = self.appended
+                try:
+                    self._fsync()
+                except OSError:
+                    # Nothing more is made durable, the callers were told
+                    return
+                self.syncs += 1
+            self._set_durable(position)
+
+    def _check(self) -> None:
+        if self.failure is not None:
+            raise OSError(
+                self.failure.errno, f"Match log failed: {self.failure}"
+            ) from self.failure
+
+    def _fsync(self) -> None:
+        try:
+            os.fsync(self.fd)
+        except OSError as e:
+            self._fail(e)
+            raise
+
+    def _cut(self, size: int) -> None:
+        """Removes a partial write, so later records are not logged after it
+        and lost with it on recovery."""
+        try:
+            os.ftruncate(self.fd, size)
+        except OSError as e:
+            self._fail(e)
+
+    def _fail(self, error: OSError) -> None:
+        with self.synced:
+            self.failure = error
+            self.synced.notify_all()
+            waiters, self.waiters = self.waiters, []
+
+        for _, loop, future in waiters:
+            loop.call_soon_threadsafe(_reject, future, error)
+
+    def _set_durable(self, position: int) -> None:
+        with self.synced:
+            self.durable = position
+            self.synced.notify_all()
+            ready = [waiter for waiter in self.waiters if waiter[0] <= position]
+            self.waiters = [waiter for waiter in self.waiters if waiter[0] > position]
+
+        for _, loop, future in ready:
+            loop.call_soon_threadsafe(_resolve, future)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def _reject(future: asyncio.Future, error: OSError) -> None:
+    if not future.done():
+        future.set_exception(OSError(error.errno, f"Match log failed: {error}"))
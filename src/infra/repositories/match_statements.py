@@ -0,0 +1,384 @@
+"""Statements on the match tables, shared by the sync and async repositories.
+
+Moves are appended to `moves` rather than rewriting the `matches` row, which
+under MVCC leaves a dead row version behind on every move. The row is a
+snapshot of the match after its first `move_count` moves, rewritten every
+`SNAPSHOT_INTERVAL` moves and when the match ends. Reads play the moves after
+it again, see `select_matches_statement`. Concurrent moves on a match take the
+same `seq`, the primary key of `moves` rejects all of them but one.
+
+Listings read the rows only, playing matches are listed as of their snapshot.
+"""
+
+from datetime import timedelta
+from typing import Iterable
+from uuid import UUID
+
+from sqlalchemy import (
+    Insert,
+    and_,
+    Integer,
+    LargeBinary,
+    Select,
+    SmallInteger,
+    Text,
+    Update,
+    column,
+    delete,
+    func,
+    insert,
+    literal_column,
+    or_,
+    select,
+    union_all,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import UUID as UUID_PG
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.engine import Row
+from sqlalchemy.sql.elements import ColumnClause
+
+from src.domain.models.match import Match
+from src.domain.models.match_page import MatchQuery, MatchSummary
+from src.domain.models.status import Status
+from src.infra.entities.match_db import (
+    STATUSES,
+    TURNS,
+    ArchivedMatchDB,
+    MatchColumns,
+    MatchDB,
+)
+from src.infra.entities.move_db import ArchivedMoveDB, MoveColumns, MoveDB
+
+# Moves after which the match row is rewritten, besides when the match ends
+SNAPSHOT_INTERVAL = 4
+
+# Columns of the listed matches, the board is only read when asked for
+SUMMARY_COLUMNS = (
+    "id",
+    "status",
+    "turn",
+    "board_size",
+    "win_length",
+    "move_count",
+    "computer",
+    "created_at",
+    "updated_at",
+)
+
+# Columns counted by the analytics, see `statistics_statement`
+STATISTICS_COLUMNS = (
+    "board_size",
+    "win_length",
+    "computer",
+    "status",
+    "turn",
+    "move_count",
+)
+
+# Columns copied as they are when a match is archived
+ARCHIVED_COLUMNS = (
+    "id",
+    "status",
+    "turn",
+    "board",
+    "board_size",
+    "win_length",
+    "move_count",
+    "created_at",
+    "updated_at",
+    "computer",
+    "version",
+)
+
+MOVE_COLUMNS = ("match_id", "seq", "player", "x", "y", "created_at")
+
+# Moves of the matches of each table
+MOVE_TABLES: dict[type[MatchColumns], type[MoveColumns]] = {
+    MatchDB: MoveDB,
+    ArchivedMatchDB: ArchivedMoveDB,
+}
+
+
+def match_rows(matches: list[Match]) -> list[dict]:
+    """Parameter sets to insert the given matches with a single executemany.
+
+    SQLAlchemy renders them as multi-row INSERT ... VALUES batches.
+    """
+    return [
+        {
+            "id": match.id,
+            "status": MatchDB.status_to_code(match.status),
+            "turn": MatchDB.turn_to_code(match.turn),
+            "board": MatchDB.board_to_bytes(match.board),
+            "board_size": match.board_size,
+            "win_length": match.win_length,
+            "move_count": match.move_count,
+            "computer": (
+                None if match.computer is None else MatchDB.turn_to_code(match.computer)
+            ),
+        }
+        for match in matches
+    ]
+
+
+def select_matches_statement(match_ids: Iterable[UUID]) -> Select:
+    """Rows of the given matches, each with the squares played after its
+    snapshot in order, or None. See `replay`."""
+    pending = (
+        select(
+            func.array_agg(
+                aggregate_order_by(MoveDB.x * MatchDB.board_size + MoveDB.y, MoveDB.seq)
+            )
+        )
+        .where(MoveDB.match_id == MatchDB.id, MoveDB.seq > MatchDB.move_count)
+        .scalar_subquery()
+    )
+
+    return select(MatchDB, pending).where(MatchDB.id.in_(match_ids))
+
+
+def replay(match_db: MatchDB, pending: list[int] | None) -> Match:
+    """Match of a `select_matches_statement` row, its snapshot with the
+    pending moves played again. The players alternate, and the match is
+    still being played, the snapshot is rewritten when it ends."""
+    match = match_db.to_match()
+    for square in pending or ():
+        x, y = divmod(square, match.board_size)
+        match.board[x][y] = match.turn
+        match.turn = "O" if match.turn == "X" else "X"
+        match.move_count += 1
+        match.version += 1
+
+    return match
+
+
+def move_rows(match: Match) -> list[dict]:
+    """Parameter sets inserting the moves played on the match."""
+    first = match.move_count - len(match.played) + 1
+    return [
+        {
+            "match_id": match.id,
+            "seq": first + index,
+            "player": MatchDB.turn_to_code(player),
+            "x": x,
+            "y": y,
+        }
+        for index, (player, x, y) in enumerate(match.played)
+    ]
+
+
+def needs_snapshot(match: Match, match_db: MatchDB) -> bool:
+    """Whether the row the match was read from must be rewritten: once the
+    match ends, every `SNAPSHOT_INTERVAL` moves, or when it was changed some
+    other way than by playing moves."""
+    return (
+        not match.played
+        or match.status != Status.PLAYING
+        or match.move_count - match_db.move_count >= SNAPSHOT_INTERVAL
+    )
+
+
+def snapshot_matches_statement(matches: list[tuple[Match, MatchDB]]) -> Update:
+    """Single UPDATE ... FROM (VALUES ...) writing all the given matches to
+    the rows they were read from.
+
+    A row is only written if it is still the one the match was read from, the
+    statement returns the id of the written rows.
+    """
+    batch = values(
+        column("id", UUID_PG(as_uuid=True)),
+        column("read_move_count", SmallInteger()),
+        column("read_version", Integer()),
+        column("status", SmallInteger()),
+        column("turn", SmallInteger()),
+        column("board", LargeBinary()),
+        column("move_count", SmallInteger()),
+        column("version", Integer()),
+        name="batch",
+    ).data(
+        [
+            (
+                match.id,
+                match_db.move_count,
+                match_db.version,
+                MatchDB.status_to_code(match.status),
+                MatchDB.turn_to_code(match.turn),
+                MatchDB.board_to_bytes(match.board),
+                match.move_count,
+                match.version,
+            )
+            for match, match_db in matches
+        ]
+    )
+
+    return (
+        update(MatchDB)
+        .where(
+            MatchDB.id == batch.c.id,
+            MatchDB.move_count == batch.c.read_move_count,
+            MatchDB.version == batch.c.read_version,
+        )
+        .values(
+            status=batch.c.status,
+            turn=batch.c.turn,
+            board=batch.c.board,
+            move_count=batch.c.move_count,
+            version=batch.c.version,
+        )
+        .returning(MatchDB.id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def archive_matches_statement(batch_size: int, min_age: timedelta) -> Insert:
+    """Single statement moving up to `batch_size` matches finished more than
+    `min_age` ago from `matches` to `matches_archive`, and their moves from
+    `moves` to `moves_archive`. Returns the matches moved as its row count.
+
+    The rows locked by someone else are skipped, so the statement never waits
+    for a move in progress and concurrent archivers take different rows.
+    """
+    # Inlined so the planner can use the ix_matches_finished partial index
+    playing: ColumnClause[int] = literal_column(
+        str(MatchDB.status_to_code(Status.PLAYING))
+    )
+    finished = (
+        select(MatchDB.id)
+        .where(
+            MatchDB.status != playing,
+            MatchDB.updated_at < func.now() - min_age,
+        )
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .cte("finished")
+    )
+    moved = (
+        delete(MatchDB)
+        .where(MatchDB.id.in_(select(finished.c.id)))
+        .returning(*(getattr(MatchDB, name) for name in ARCHIVED_COLUMNS))
+        .cte("moved")
+    )
+
+    moved_moves = (
+        delete(MoveDB)
+        .where(MoveDB.match_id.in_(select(moved.c.id)))
+        .returning(*(getattr(MoveDB, name) for name in MOVE_COLUMNS))
+        .cte("moved_moves")
+    )
+    archived_moves = (
+        insert(ArchivedMoveDB)
+        .from_select(
+            MOVE_COLUMNS, select(*(moved_moves.c[name] for name in MOVE_COLUMNS))
+        )
+        .cte("archived_moves")
+    )
+
+    return (
+        insert(ArchivedMatchDB)
+        .from_select(
+            ARCHIVED_COLUMNS, select(*(moved.c[name] for name in ARCHIVED_COLUMNS))
+        )
+        .add_cte(archived_moves)
+    )
+
+
+def statistics_statement(
+    table: type[MatchColumns], after: UUID | None, limit: int
+) -> Select:
+    """Next `limit` matches of `table` after the `after` id, in id order, with
+    the square of their first move when it was stored.
+
+    Boards are not read, the statistics only need the counters. The first
+    moves are merged in from the `moves` primary key, read in the same order.
+    """
+    moves = MOVE_TABLES[table]
+    first_move = and_(moves.match_id == table.id, moves.seq == 1)
+    statement = select(
+        # As text, the analytics only keep the last one
+        table.id.cast(Text),
+        *(getattr(table, name) for name in STATISTICS_COLUMNS),
+        moves.x,
+        moves.y,
+    )
+    if after is not None:
+        statement = statement.where(table.id > after)
+        # Not inferred from the join, without it the moves would be read from
+        # the first one again on every call
+        first_move = and_(first_move, moves.match_id > after)
+
+    return statement.outerjoin(moves, first_move).order_by(table.id).limit(limit)
+
+
+def _page_statement(table: type[MatchColumns], query: MatchQuery) -> Select:
+    sort = getattr(table, query.sort)
+    names = SUMMARY_COLUMNS + (("board",) if query.include_board else ())
+    statement = select(*(getattr(table, name) for name in names))
+
+    if query.status is not None:
+        statement = statement.where(
+            table.status == MatchDB.status_to_code(query.status)
+        )
+
+    for name, start, end in (
+        ("created_at", query.created_from, query.created_to),
+        ("updated_at", query.updated_from, query.updated_to),
+    ):
+        if start is not None:
+            statement = statement.where(getattr(table, name) >= start)
+        if end is not None:
+            statement = statement.where(getattr(table, name) < end)
+
+    if query.after is not None:
+        # Rather than a row comparison, which is only an index condition when
+        # the status is not filtered, a range on the sort column
+        timestamp, match_id = query.after
+        statement = statement.where(
+            sort <= timestamp, or_(sort < timestamp, table.id < match_id)
+        )
+
+    return statement.order_by(sort.desc(), table.id.desc()).limit(query.limit)
+
+
+def list_matches_statement(query: MatchQuery) -> Select:
+    """Keyset page of the live and archived matches passing the filters.
+
+    Each table returns its own first `query.limit` matches from a backward
+    scan of a `_listing_indexes` index, so the cost of a page does not depend
+    on how deep it is. Both are then merged.
+    """
+    # Playing matches are never archived
+    if query.status == Status.PLAYING:
+        return _page_statement(MatchDB, query)
+
+    pages = union_all(
+        _page_statement(MatchDB, query), _page_statement(ArchivedMatchDB, query)
+    ).subquery("pages")
+
+    return (
+        select(pages)
+        .order_by(pages.c[query.sort].desc(), pages.c.id.desc())
+        .limit(query.limit)
+    )
+
+
+def match_summary(row: Row) -> MatchSummary:
+    """Listed match of a `list_matches_statement` row."""
+    mapping = row._mapping
+    return MatchSummary(
+        id=row.id,
+        status=STATUSES[row.status],
+        turn=TURNS[row.turn],
+        board_size=row.board_size,
+        win_length=row.win_length,
+        move_count=row.move_count,
+        computer=None if row.computer is None else TURNS[row.computer],
+        created_at=row.created_at,
+        updated_at=row.updated_at,
+        board=(
+            MatchDB.bytes_to_board(mapping["board"], row.board_size)
+            if "board" in mapping
+            else None
+        ),
+    )
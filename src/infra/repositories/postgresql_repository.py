@@ -1,43 +1,72 @@
 import os
+from typing import Callable, Iterable
 from uuid import UUID
 
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, insert, select
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session, sessionmaker
 
 from src.domain.exception.errors import (
     DatabaseEnvVarNotSetException,
     DatabaseGetMatchException,
     DatabaseMatchNotFoundException,
+    DatabaseMoveConflictException,
     DatabaseSaveMatchException,
     DatabaseUpdateMatchException,
 )
 from src.domain.logging.logger_interface import LoggerInterface
 from src.domain.models.match import Match
+from src.domain.models.match_page import MatchQuery, MatchSummary
 from src.domain.repositories.match_database_repository import MatchDatabaseRepository
-from src.infra.entities.match_db import Base, MatchDB
+from src.infra.database.engine import (
+    PoolSettings,
+    create_database_engine,
+    create_session_factory,
+)
+from src.infra.entities.match_db import ArchivedMatchDB, MatchDB
+from src.infra.entities.move_db import MoveDB
+from src.infra.repositories.match_statements import (
+    list_matches_statement,
+    match_rows,
+    match_summary,
+    move_rows,
+    needs_snapshot,
+    replay,
+    select_matches_statement,
+    snapshot_matches_statement,
+)
 
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
 
 
 class PostgreSQLRepository(MatchDatabaseRepository):
+    MAX_MOVE_ATTEMPTS = 3
 
-    def __init__(self, logger: LoggerInterface):
+    def __init__(
+        self,
+        logger: LoggerInterface,
+        session_factory: sessionmaker[Session] | None = None,
+    ):
         self.logger = logger
 
-        if DATABASE_URL is None:
-            raise DatabaseEnvVarNotSetException("DATABASE_URL env variable is not set")
+        # The API injects the process-wide session factory created at startup.
+        # Building a dedicated engine is only meant for scripts and tests.
+        if session_factory is None:
+            if DATABASE_URL is None:
+                raise DatabaseEnvVarNotSetException(
+                    "DATABASE_URL env variable is not set"
+                )
 
-        self.engine = create_engine(DATABASE_URL)
+            session_factory = create_session_factory(
+                create_database_engine(DATABASE_URL, PoolSettings.from_env())
+            )
 
-        self.SessionLocal = sessionmaker(
-            autocommit=False, autoflush=False, bind=self.engine
-        )
-        Base.metadata.create_all(bind=self.engine)
+        self.SessionLocal = session_factory
 
     def save_match(self, match: Match) -> Match:
-        self.logger.info(f"Saving match:\n{match}")
+        self.logger.debug("Saving match:\n%s", match)
 
         try:
             with self.SessionLocal() as session:
@@ -48,54 +77,241 @@ class PostgreSQLRepository(MatchDatabaseRepository):
                     status=match_db.status,
                     turn=match_db.turn,
                     board=match_db.board,
+                    board_size=match_db.board_size,
+                    win_length=match_db.win_length,
+                    move_count=match_db.move_count,
+                    computer=match_db.computer,
                 )
                 session.execute(stmt)
+                if match.played:
+                    # The computer may have played first
+                    session.execute(insert(MoveDB), move_rows(match))
                 session.commit()
+                match.played = ()
 
-                self.logger.info(f"Match: {match_db.id} SAVED!")
+                self.logger.info("Match SAVED!", match_id=match.id)
 
                 return match_db.to_match()
         except Exception as e:
-            self.logger.error(f"Error saving match:{match}\nError: {e}")
+            self.logger.error("Error saving match: %s", e, match_id=match.id)
             raise DatabaseSaveMatchException(f"Error saving match: {e}")
 
-    def update_match(self, match: Match) -> Match:
-        self.logger.info(f"Updating match:\n{match}")
+    def save_matches(self, matches: list[Match]) -> list[Match]:
+        self.logger.info("Saving matches", count=len(matches))
 
         try:
             with self.SessionLocal() as session:
-                statement = select(MatchDB).filter(MatchDB.id == match.id)
-                if match_instance := session.execute(statement).scalar_one_or_none():
-                    match_instance.status = match.status.value
-                    match_instance.turn = match.turn
-                    match_instance.board = MatchDB.board_to_string(match.board)
+                session.execute(insert(MatchDB), match_rows(matches))
+                if rows := [row for match in matches for row in move_rows(match)]:
+                    session.execute(insert(MoveDB), rows)
+                session.commit()
+                for match in matches:
+                    match.played = ()
+
+                self.logger.info("Matches SAVED!", count=len(matches))
 
-                    session.commit()
+                return matches
+        except Exception as e:
+            self.logger.error("Error saving matches: %s", e, count=len(matches))
+            raise DatabaseSaveMatchException(f"Error saving matches: {e}")
 
-                    self.logger.info(f"Match: {match} UPDATED!")
+    def update_match(self, match: Match) -> Match:
+        """Writes the match over the stored one, as a move would: only if no
+        move was stored since it was read, bumping its version."""
+        self.logger.debug("Updating match:\n%s", match)
 
-                    return match_instance.to_match()
-                else:
+        try:
+            with self.SessionLocal() as session:
+                statement = select_matches_statement([match.id])
+                row = (session.execute(statement)).one_or_none()
+                if row is None:
                     raise DatabaseMatchNotFoundException("Match not found")
-        except DatabaseMatchNotFoundException as e:
+
+                match_db, pending = row
+                if replay(match_db, pending).version != match.version or not (
+                    self._store_moves(session, [(match, match_db)])
+                ):
+                    raise DatabaseMoveConflictException(
+                        f"Match {match.id} was updated since it was read, try again"
+                    )
+
+                self.logger.info("Match UPDATED!", match_id=match.id)
+
+                return match
+        except (DatabaseMatchNotFoundException, DatabaseMoveConflictException) as e:
             raise e
         except Exception as e:
-            self.logger.error(f"Error updating match:{match}\nError: {e}")
+            self.logger.error("Error updating match: %s", e, match_id=match.id)
             raise DatabaseUpdateMatchException(f"Error updating match: {e}")
 
+    def _archived_matches(
+        self, session: Session, match_ids: Iterable[UUID]
+    ) -> dict[UUID, Match]:
+        """Finished matches moved out of `matches` by the `MatchArchiver`."""
+        statement = select(ArchivedMatchDB).filter(ArchivedMatchDB.id.in_(match_ids))
+        result = session.execute(statement)
+
+        return {
+            match.id: match
+            for match in (
+                match_instance.to_match() for match_instance in result.scalars()
+            )
+        }
+
     def get_match(self, match_id: UUID) -> Match | None:
-        self.logger.info(f"Retrieving match:\n{match_id}")
+        self.logger.debug("Retrieving match", match_id=match_id)
 
         try:
             with self.SessionLocal() as session:
-                statement = select(MatchDB).filter(MatchDB.id == match_id)
-                if match_instance := session.execute(statement).scalar_one_or_none():
-                    match = match_instance.to_match()
-                    self.logger.info(f"Match: {match} RETRIEVED!")
+                statement = select_matches_statement([match_id])
+                if row := session.execute(statement).one_or_none():
+                    match = replay(*row)
+                    self.logger.info("Match RETRIEVED!", match_id=match_id)
 
                     return match
 
-                return None
+                archived = self._archived_matches(session, [match_id])
+                if match_id in archived:
+                    self.logger.info("Archived match RETRIEVED!", match_id=match_id)
+
+                return archived.get(match_id)
         except Exception as e:
-            self.logger.error(f"Error getting match!\nMatch:{match_id}\nError: {e}")
+            self.logger.error("Error getting match: %s", e, match_id=match_id)
             raise DatabaseGetMatchException(f"Error getting match: {e}")
+
+    def _store_moves(
+        self, session: Session, changed: list[tuple[Match, MatchDB]]
+    ) -> bool:
+        """Appends the moves played on the changed matches, and rewrites the
+        rows needing a snapshot. False, with nothing written, if some match
+        was updated concurrently since it was read."""
+        for match, _ in changed:
+            match.version += len(match.played) or 1
+        snapshots = [
+            (match, match_db)
+            for match, match_db in changed
+            if needs_snapshot(match, match_db)
+        ]
+
+        # The transaction is ended on conflicts, so the next attempt reads the
+        # new moves
+        try:
+            if rows := [row for match, _ in changed for row in move_rows(match)]:
+                session.execute(insert(MoveDB), rows)
+            if snapshots:
+                result = session.execute(snapshot_matches_statement(snapshots))
+                if len(result.scalars().all()) != len(snapshots):
+                    # Rewritten by someone else since it was read
+                    session.rollback()
+                    return False
+        except IntegrityError:
+            # Another move took the same seq
+            session.rollback()
+            return False
+
+        session.commit()
+        for match, _ in changed:
+            match.played = ()
+
+        return True
+
+    def apply_move(
+        self, match_id: UUID, apply: Callable[[Match], None]
+    ) -> Match | None:
+        self.logger.debug("Applying move", match_id=match_id)
+
+        try:
+            with self.SessionLocal() as session:
+                for _ in range(self.MAX_MOVE_ATTEMPTS):
+                    statement = select_matches_statement([match_id])
+                    row = session.execute(statement).one_or_none()
+                    if row is None:
+                        archived = self._archived_matches(session, [match_id])
+                        if (match := archived.get(match_id)) is None:
+                            return None
+
+                        # Archived matches are finished, so the move is rejected
+                        apply(match)
+                        raise DatabaseUpdateMatchException(
+                            f"Match {match_id} is archived and cannot be updated"
+                        )
+
+                    match_db, pending = row
+                    match = replay(match_db, pending)
+                    apply(match)
+
+                    if self._store_moves(session, [(match, match_db)]):
+                        self.logger.info("Match UPDATED!", match_id=match.id)
+
+                        return match
+
+                    self.logger.warning("Concurrent update on match", match_id=match_id)
+
+            raise DatabaseMoveConflictException(
+                f"Match {match_id} is being updated concurrently, try again"
+            )
+        except SQLAlchemyError as e:
+            self.logger.error("Error applying move: %s", e, match_id=match_id)
+            raise DatabaseUpdateMatchException(f"Error updating match: {e}")
+
+    def apply_moves(
+        self,
+        match_ids: Iterable[UUID],
+        apply: Callable[[dict[UUID, Match]], None],
+    ) -> dict[UUID, Match]:
+        match_ids = set(match_ids)
+        self.logger.debug("Applying moves", matches=len(match_ids))
+
+        try:
+            with self.SessionLocal() as session:
+                for _ in range(self.MAX_MOVE_ATTEMPTS):
+                    statement = select_matches_statement(match_ids)
+                    matches: dict[UUID, Match] = {}
+                    rows: dict[UUID, MatchDB] = {}
+                    for match_db, pending in session.execute(statement).tuples():
+                        match = replay(match_db, pending)
+                        matches[match.id] = match
+                        rows[match.id] = match_db
+
+                    move_counts = {
+                        match.id: match.move_count for match in matches.values()
+                    }
+                    if missing := match_ids - matches.keys():
+                        # Their movements are rejected, archived matches are finished
+                        matches.update(self._archived_matches(session, missing))
+                    apply(matches)
+
+                    changed = [
+                        (match, rows[match.id])
+                        for match in matches.values()
+                        if match.move_count
+                        != move_counts.get(match.id, match.move_count)
+                    ]
+                    if not changed:
+                        return matches
+
+                    if self._store_moves(session, changed):
+                        self.logger.info("Matches UPDATED!", count=len(changed))
+
+                        return matches
+
+                    self.logger.warning("Concurrent update on a batch of matches")
+
+            raise DatabaseMoveConflictException(
+                "Some matches are being updated concurrently, try again"
+            )
+        except SQLAlchemyError as e:
+            self.logger.error("Error applying moves: %s", e)
+            raise DatabaseUpdateMatchException(f"Error updating matches: {e}")
+
+    def list_matches(self, query: MatchQuery) -> list[MatchSummary]:
+        self.logger.debug("Listing matches", limit=query.limit)
+
+        try:
+            with self.SessionLocal() as session:
+                result = session.execute(list_matches_statement(query))
+
+                return [match_summary(row) for row in result]
+        except SQLAlchemyError as e:
+            self.logger.error("Error listing matches: %s", e)
+            raise DatabaseGetMatchException(f"Error listing matches: {e}")
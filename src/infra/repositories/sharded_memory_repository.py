@@ -0,0 +1,493 @@
+"""Bounded in-memory match storage, safe to share between threads.
+
+Matches are spread over shards by id, each with its own lock, so moves on a
+match are serialized while moves on matches of other shards run in parallel.
+
+Stored matches are never modified. A move is applied to a copy that replaces
+the stored match once `apply` succeeded, so readers, which do not take the
+lock, see either the match before the move or after it, and a move failing
+validation leaves nothing behind.
+
+With MEMORY_DATA_DIR set, the matches survive restarts and crashes, see
+`match_log`.
+
+Each shard holds at most its share of `capacity` matches. Once full, the least
+recently updated finished match is dropped to make room, then the least
+recently updated playing match idle for `idle_ttl` seconds. When there is none
+the new match is refused.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterable, NamedTuple
+from uuid import UUID
+
+from src.domain.exception.errors import (
+    DatabaseSaveMatchException,
+    DatabaseUpdateMatchException,
+)
+from src.domain.logging.logger_interface import LoggerInterface
+from src.domain.models.match import Match
+from src.domain.models.match_page import MatchQuery, MatchSummary
+from src.domain.models.status import Status
+from src.domain.repositories.async_match_database_repository import (
+    AsyncMatchDatabaseRepository,
+)
+from src.domain.repositories.match_database_repository import MatchDatabaseRepository
+from src.infra.repositories.match_log import (
+    DurabilitySettings,
+    MatchLog,
+    encode_delete,
+    encode_match,
+    lock_directory,
+    recover,
+    write_snapshot,
+)
+from src.infra.settings import env_float, env_int
+
+
+def _to_datetime(timestamp: float) -> datetime:
+    # Naive UTC, like the timestamps read from the database
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+
+@dataclass(frozen=True)
+class MemorySettings:
+    shards: int = 64
+    capacity: int = 1_000_000
+    idle_ttl: float = 3_600.0
+
+    @staticmethod
+    def from_env() -> "MemorySettings":
+        return MemorySettings(
+            shards=env_int("MEMORY_SHARDS", MemorySettings.shards),
+            capacity=env_int("MEMORY_CAPACITY", MemorySettings.capacity),
+            idle_ttl=env_float("MEMORY_IDLE_TTL", MemorySettings.idle_ttl),
+        )
+
+
+class StoredMatch(NamedTuple):
+    """Stored match with its creation and last update times, in seconds since
+    the epoch. Cheaper to build than a frozen dataclass, on every move."""
+
+    match: Match
+    created_at: float
+    updated_at: float
+
+
+class Shard:
+    """Matches of a shard, least recently updated first."""
+
+    def __init__(self, capacity: int, idle_ttl: float):
+        self.capacity = capacity
+        self.idle_ttl = idle_ttl
+        self.lock = threading.Lock()
+        self.playing: OrderedDict[UUID, StoredMatch] = OrderedDict()
+        self.finished: OrderedDict[UUID, StoredMatch] = OrderedDict()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.playing) + len(self.finished)
+
+    def get(self, match_id: UUID) -> StoredMatch | None:
+        return self.playing.get(match_id) or self.finished.get(match_id)
+
+    def put(self, stored: StoredMatch) -> None:
+        """Stores a match already in the shard, or one there is room for."""
+        match_id = stored.match.id
+        target, other = (
+            (self.playing, self.finished)
+            if stored.match.status == Status.PLAYING
+            else (self.finished, self.playing)
+        )
+        # Added before being removed from the other dict, readers do not lock
+        target[match_id] = stored
+        target.move_to_end(match_id)
+        other.pop(match_id, None)
+
+    def make_room(self, count: int, now: float) -> list[UUID]:
+        """Evicts matches until `count` new ones fit, or evicts none. Returns
+        the ids of the evicted matches."""
+        if (excess := len(self) + count - self.capacity) <= 0:
+            return []
+
+        # Playing matches are in update order too, the idle ones come first
+        idle: list[UUID] = []
+        for match_id, stored in self.playing.items():
+            if len(self.finished) + len(idle) >= excess:
+                break
+            if now - stored.updated_at < self.idle_ttl:
+                break
+            idle.append(match_id)
+
+        if len(self.finished) + len(idle) < excess:
+            raise DatabaseSaveMatchException("In-memory repository is full")
+
+        evicted = [
+            self.finished.popitem(last=False)[0] for _ in range(excess - len(idle))
+        ]
+        for match_id in idle:
+            del self.playing[match_id]
+        self.evictions += excess
+
+        return evicted + idle
+
+
+class ShardedInMemoryRepository(MatchDatabaseRepository):
+    """With a `log`, every change is appended to it before being made, under
+    the locks of its shards, and the caller waits for it to be on disk after
+    releasing them. See `open` and `match_log`."""
+
+    def __init__(
+        self,
+        logger: LoggerInterface,
+        settings: MemorySettings = MemorySettings(),
+        log: MatchLog | None = None,
+    ):
+        self.logger = logger
+        self.settings = settings
+        self.log = log
+        # Rounded up, so the shards hold at least `capacity` matches together
+        shard_capacity = -(-settings.capacity // settings.shards)
+        self.shards = [
+            Shard(shard_capacity, settings.idle_ttl) for _ in range(settings.shards)
+        ]
+        self.snapshot_lock = threading.Lock()
+
+    @classmethod
+    def open(
+        cls,
+        logger: LoggerInterface,
+        settings: MemorySettings,
+        durability: DurabilitySettings,
+    ) -> "ShardedInMemoryRepository":
+        """Repository with the matches recovered from the data directory of
+        `durability`, logging its changes there."""
+        directory = Path(durability.directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        started = time.perf_counter()
+
+        lock_file = lock_directory(directory)
+        try:
+            recovered, next_segment = recover(directory)
+            log = MatchLog(directory, durability, next_segment, lock_file)
+        except BaseException:
+            lock_file.close()
+            raise
+
+        repository = cls(logger, settings, log)
+        # In update order, the least recently updated are evicted first
+        for match, created_at, updated_at in sorted(
+            recovered.values(), key=lambda state: state[2]
+        ):
+            repository._shard(match.id).put(StoredMatch(match, created_at, updated_at))
+
+        logger.info(
+            "Recovered %d matches from %s in %.3fs",
+            len(recovered),
+            directory,
+            time.perf_counter() - started,
+        )
+        return repository
+
+    def _shard(self, match_id: UUID) -> Shard:
+        return self.shards[match_id.int % len(self.shards)]
+
+    def _shards(self, match_ids: Iterable[UUID]) -> list[Shard]:
+        # Always locked in the same order, so batches never deadlock
+        indexes = {match_id.int % len(self.shards) for match_id in match_ids}
+        return [self.shards[index] for index in sorted(indexes)]
+
+    def _append(self, records: list[bytes], error: type[Exception]) -> int:
+        """Logs changes before they are made, returns the position to wait
+        for, 0 when there is nothing to wait for."""
+        if self.log is None or not records:
+            return 0
+
+        try:
+            return self.log.append(records)
+        except OSError as e:
+            raise error(f"Error writing the match log: {e}")
+
+    def wait(self, position: int, error: type[Exception]) -> None:
+        if self.log is not None and position:
+            try:
+                self.log.wait(position)
+            except OSError as e:
+                raise error(f"Error syncing the match log: {e}")
+
+    async def wait_async(self, position: int, error: type[Exception]) -> None:
+        if self.log is not None and position:
+            try:
+                await self.log.wait_async(position)
+            except OSError as e:
+                raise error(f"Error syncing the match log: {e}")
+
+    def get_match(self, match_id: UUID) -> Match | None:
+        stored = self._shard(match_id).get(match_id)
+        return None if stored is None else stored.match.copy()
+
+    def save_match(self, match: Match) -> Match:
+        return self.save_matches([match])[0]
+
+    def save_matches(self, matches: list[Match]) -> list[Match]:
+        self.wait(self.save_matches_unsynced(matches), DatabaseSaveMatchException)
+        return matches
+
+    def save_matches_unsynced(self, matches: list[Match]) -> int:
+        """Stores the matches, returns the log position to `wait` for."""
+        now = time.time()
+        by_shard: dict[int, list[Match]] = {}
+        for match in matches:
+            by_shard.setdefault(match.id.int % len(self.shards), []).append(match)
+
+        shards = [self.shards[index] for index in sorted(by_shard)]
+        self._lock(shards)
+        try:
+            # Room is made in every shard before any match is stored
+            evicted = []
+            for index, shard_matches in by_shard.items():
+                shard = self.shards[index]
+                new = sum(1 for match in shard_matches if shard.get(match.id) is None)
+                evicted += shard.make_room(new, now)
+
+            stored = []
+            for match in matches:
+                found = self._shard(match.id).get(match.id)
+                created_at = now if found is None else found.created_at
+                stored.append(StoredMatch(match.copy(), created_at, now))
+
+            position = self._append(
+                [encode_delete(match_id) for match_id in evicted]
+                + [encode_match(*entry) for entry in stored],
+                DatabaseSaveMatchException,
+            )
+            for entry in stored:
+                self._shard(entry.match.id).put(entry)
+        finally:
+            self._unlock(shards)
+
+        return position
+
+    def update_match(self, match: Match) -> Match:
+        return self.save_matches([match])[0]
+
+    def apply_move(
+        self, match_id: UUID, apply: Callable[[Match], None]
+    ) -> Match | None:
+        match, position = self.apply_move_unsynced(match_id, apply)
+        self.wait(position, DatabaseUpdateMatchException)
+        return match
+
+    def apply_move_unsynced(
+        self, match_id: UUID, apply: Callable[[Match], None]
+    ) -> tuple[Match | None, int]:
+        shard = self._shard(match_id)
+        with shard.lock:
+            if (stored := shard.get(match_id)) is None:
+                return None, 0
+
+            match = stored.match.copy()
+            apply(match)
+            match.version += 1
+            # Logged whole, the moves are not kept apart
+            match.played = ()
+            updated = StoredMatch(match, stored.created_at, time.time())
+            position = self._append(
+                [encode_match(*updated)], DatabaseUpdateMatchException
+            )
+            shard.put(updated)
+
+        return match.copy(), position
+
+    def apply_moves(
+        self,
+        match_ids: Iterable[UUID],
+        apply: Callable[[dict[UUID, Match]], None],
+    ) -> dict[UUID, Match]:
+        matches, position = self.apply_moves_unsynced(match_ids, apply)
+        self.wait(position, DatabaseUpdateMatchException)
+        return matches
+
+    def apply_moves_unsynced(
+        self,
+        match_ids: Iterable[UUID],
+        apply: Callable[[dict[UUID, Match]], None],
+    ) -> tuple[dict[UUID, Match], int]:
+        match_ids = set(match_ids)
+        shards = self._shards(match_ids)
+        self._lock(shards)
+        try:
+            stored = {
+                match_id: found
+                for match_id in match_ids
+                if (found := self._shard(match_id).get(match_id)) is not None
+            }
+            matches = {
+                match_id: found.match.copy() for match_id, found in stored.items()
+            }
+            apply(matches)
+
+            now = time.time()
+            updated = []
+            for match_id, match in matches.items():
+                if match.move_count != stored[match_id].match.move_count:
+                    match.version += 1
+                    updated.append(
+                        StoredMatch(match.copy(), stored[match_id].created_at, now)
+                    )
+
+            position = self._append(
+                [encode_match(*entry) for entry in updated],
+                DatabaseUpdateMatchException,
+            )
+            for entry in updated:
+                self._shard(entry.match.id).put(entry)
+        finally:
+            self._unlock(shards)
+
+        return matches, position
+
+    def snapshot(self) -> int:
+        """Writes every match to the snapshot of the log, then removes the
+        log segments it covers. Returns the number of matches written."""
+        assert self.log is not None
+        with self.snapshot_lock:
+            # Changes logged before the rotation are seen below, the later
+            # ones may be too, replaying them again does no harm
+            next_segment = self.log.rotate()
+            stored: list[StoredMatch] = []
+            for shard in self.shards:
+                with shard.lock:
+                    stored += [*shard.playing.values(), *shard.finished.values()]
+
+            write_snapshot(
+                self.log.directory,
+                (encode_match(*entry) for entry in stored),
+                next_segment,
+            )
+            self.log.remove_segments(next_segment)
+
+        return len(stored)
+
+    def close(self) -> None:
+        """Snapshots the matches and closes the log, so the next start does
+        not replay it."""
+        if self.log is None:
+            return
+
+        try:
+            self.snapshot()
+        finally:
+            # Also after a failure of the log, which no snapshot follows
+            self.log.close()
+
+    def list_matches(self, query: MatchQuery) -> list[MatchSummary]:
+        ranges = (
+            ("created_at", query.created_from, query.created_to),
+            ("updated_at", query.updated_from, query.updated_to),
+        )
+        summaries = []
+        for shard in self.shards:
+            with shard.lock:
+                snapshot = [*shard.playing.values(), *shard.finished.values()]
+
+            for stored in snapshot:
+                match = stored.match
+                if query.status is not None and match.status != query.status:
+                    continue
+
+                summary = MatchSummary(
+                    id=match.id,
+                    status=match.status,
+                    turn=match.turn,
+                    board_size=match.board_size,
+                    win_length=match.win_length,
+                    move_count=match.move_count,
+                    computer=match.computer,
+                    created_at=_to_datetime(stored.created_at),
+                    updated_at=_to_datetime(stored.updated_at),
+                    board=(
+                        [list(row) for row in match.board]
+                        if query.include_board
+                        else None
+                    ),
+                )
+                if query.after is not None and summary.key(query.sort) >= query.after:
+                    continue
+
+                if all(
+                    (start is None or getattr(summary, name) >= start)
+                    and (end is None or getattr(summary, name) < end)
+                    for name, start, end in ranges
+                ):
+                    summaries.append(summary)
+
+        summaries.sort(key=lambda summary: summary.key(query.sort), reverse=True)
+
+        return summaries[: query.limit]
+
+    def count(self) -> int:
+        return sum(len(shard) for shard in self.shards)
+
+    def evictions(self) -> int:
+        return sum(shard.evictions for shard in self.shards)
+
+    @staticmethod
+    def _lock(shards: list[Shard]) -> None:
+        for shard in shards:
+            shard.lock.acquire()
+
+    @staticmethod
+    def _unlock(shards: list[Shard]) -> None:
+        for shard in reversed(shards):
+            shard.lock.release()
+
+
+class AsyncShardedInMemoryRepository(AsyncMatchDatabaseRepository):
+    """Async facade over `ShardedInMemoryRepository`.
+
+    Locks are only held while copying and applying a move, never across an
+    await, so the calls run straight on the event loop. Waiting for the log
+    to reach the disk does not block it either.
+    """
+
+    def __init__(self, repository: ShardedInMemoryRepository):
+        self.repository = repository
+
+    async def get_match(self, match_id: UUID) -> Match | None:
+        return self.repository.get_match(match_id)
+
+    async def save_match(self, match: Match) -> Match:
+        return (await self.save_matches([match]))[0]
+
+    async def save_matches(self, matches: list[Match]) -> list[Match]:
+        position = self.repository.save_matches_unsynced(matches)
+        await self.repository.wait_async(position, DatabaseSaveMatchException)
+        return matches
+
+    async def update_match(self, match: Match) -> Match:
+        return (await self.save_matches([match]))[0]
+
+    async def apply_move(
+        self, match_id: UUID, apply: Callable[[Match], None]
+    ) -> Match | None:
+        match, position = self.repository.apply_move_unsynced(match_id, apply)
+        await self.repository.wait_async(position, DatabaseUpdateMatchException)
+        return match
+
+    async def apply_moves(
+        self,
+        match_ids: Iterable[UUID],
+        apply: Callable[[dict[UUID, Match]], None],
+    ) -> dict[UUID, Match]:
+        matches, position = self.repository.apply_moves_unsynced(match_ids, apply)
+        await self.repository.wait_async(position, DatabaseUpdateMatchException)
+        return matches
+
+    async def list_matches(self, query: MatchQuery) -> list[MatchSummary]:
+        return self.repository.list_matches(query)
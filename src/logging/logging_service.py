@@ -1,26 +1,150 @@
+import atexit
+import copy
+import itertools
 import logging
+import os
+import queue
 import sys
+import threading
+from dataclasses import dataclass
+from logging.handlers import QueueHandler, QueueListener
+from typing import Iterator
 
 from src.domain.logging.logger_interface import LoggerInterface
+from src.infra.settings import env_float
 
+LOGGER_NAME = "tic_tac_toe"
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
 
-class LoggingService(LoggerInterface):
-    def __init__(self):
-        logging.basicConfig(
-            level=logging.INFO,
-            format="%(asctime)s - %(levelname)s - %(message)s",
-            handlers=[logging.StreamHandler(sys.stderr)],
+
+@dataclass(frozen=True)
+class LoggingSettings:
+    level: str = "INFO"
+    # Fraction of the info and debug messages of each template that is written
+    sample_rate: float = 1.0
+
+    @staticmethod
+    def from_env() -> "LoggingSettings":
+        return LoggingSettings(
+            level=os.getenv("LOG_LEVEL") or "INFO",
+            sample_rate=env_float("LOG_SAMPLE_RATE", 1.0),
         )
-        self.logger = logging.getLogger("tic_tac_toe")
 
-    def info(self, message: str) -> None:
-        self.logger.info(message)
 
-    def warning(self, message: str) -> None:
-        self.logger.warning(message)
+class StructuredFormatter(logging.Formatter):
+    """Appends the `fields` of the record to the message as key=value pairs."""
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        message = super().formatMessage(record)
+        if fields := getattr(record, "fields", None):
+            message += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+
+        return message
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Only renders the message on the calling thread, as its arguments may
+    change once the call returns. The rest of the formatting and the write
+    happen on the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+
+        return record
+
+
+class MessageSampler:
+    """Keeps the first message of each template and then one every
+    `1 / rate`, so rare messages are never lost to sampling."""
+
+    def __init__(self, rate: float):
+        self.every = round(1 / rate) if rate > 0 else 0
+        self.counters: dict[str, Iterator[int]] = {}
+
+    def keep(self, message: str) -> bool:
+        if self.every <= 1:
+            return self.every == 1
+
+        if (counter := self.counters.get(message)) is None:
+            counter = self.counters.setdefault(message, itertools.count())
+
+        return next(counter) % self.every == 0
+
+
+_listener: QueueListener | None = None
+_handler: DeferredQueueHandler | None = None
+_listener_lock = threading.Lock()
+
+
+def _start_listener(*handlers: logging.Handler) -> queue.SimpleQueue[logging.LogRecord]:
+    """Starts the thread writing the records put in the queue returned."""
+    global _listener
+
+    records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    _listener = QueueListener(records, *handlers)
+    _listener.start()
+
+    return records
+
+
+def _stop_listener() -> None:
+    """Flushes the pending records of the current listener."""
+    if _listener is not None:
+        _listener.stop()
+
+
+def _restart_after_fork() -> None:
+    """Threads are not copied into a forked child, like the gunicorn workers of
+    a preloaded app, so the child starts its own listener with an empty queue.
+    The records queued before the fork are written by the parent."""
+    global _listener_lock
+
+    _listener_lock = threading.Lock()
+    if _listener is not None and _handler is not None:
+        _handler.queue = _start_listener(*_listener.handlers)
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+atexit.register(_stop_listener)
+
+
+def configure_logging(settings: LoggingSettings) -> logging.Logger:
+    """Sets up the app logger once per process: records are put in a queue
+    and written to stderr by a background thread."""
+    global _handler
+
+    logger = logging.getLogger(LOGGER_NAME)
+    with _listener_lock:
+        if _handler is None:
+            stream_handler = logging.StreamHandler(sys.stderr)
+            stream_handler.setFormatter(StructuredFormatter(LOG_FORMAT))
+
+            _handler = DeferredQueueHandler(_start_listener(stream_handler))
+            logger.addHandler(_handler)
+            logger.setLevel(settings.level)
+            logger.propagate = False
+
+    return logger
+
+
+class LoggingService(LoggerInterface):
+    def __init__(self, settings: LoggingSettings | None = None):
+        settings = settings or LoggingSettings.from_env()
+        self.logger = configure_logging(settings)
+        self.sampler = MessageSampler(settings.sample_rate)
+
+    def info(self, message: str, *args: object, **fields: object) -> None:
+        if self.logger.isEnabledFor(logging.INFO) and self.sampler.keep(message):
+            self.logger.info(message, *args, extra={"fields": fields})
+
+    def warning(self, message: str, *args: object, **fields: object) -> None:
+        self.logger.warning(message, *args, extra={"fields": fields})
 
-    def error(self, message: str) -> None:
-        self.logger.error(message)
+    def error(self, message: str, *args: object, **fields: object) -> None:
+        self.logger.error(message, *args, extra={"fields": fields})
 
-    def debug(self, message: str) -> None:
-        self.logger.debug(message)
+    def debug(self, message: str, *args: object, **fields: object) -> None:
+        if self.logger.isEnabledFor(logging.DEBUG) and self.sampler.keep(message):
+            self.logger.debug(message, *args, extra={"fields": fields})
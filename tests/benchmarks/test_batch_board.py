@@ -0,0 +1,21 @@
+import json
+
+from benchmarks import batch_board
+
+
+def test_batch_board_command(capsys):
+    arguments = [
+        "--games",
+        "50",
+        "--scalar-games",
+        "10",
+        "--variants",
+        "3x3/3",
+        "5x5/4",
+    ]
+
+    assert batch_board.main([*arguments, "--json"]) == 0
+
+    rows = json.loads(capsys.readouterr().out)
+    assert [row["variant"] for row in rows] == ["3x3/3", "5x5/4"]
+    assert all(row["games_per_second"] > 0 for row in rows)
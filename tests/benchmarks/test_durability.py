@@ -0,0 +1,28 @@
+import json
+
+from benchmarks import durability
+
+
+def test_writes_command(tmp_path, capsys):
+    arguments = ["--directory", str(tmp_path), "--json", "writes"]
+
+    assert (
+        durability.main(
+            [*arguments, "--threads", "2", "--duration", "0.1", "--windows", "0"]
+        )
+        == 0
+    )
+
+    [row] = json.loads(capsys.readouterr().out)
+    assert row["sync"] == "group"
+    assert row["moves_per_second"] > 0
+
+
+def test_recovery_command(tmp_path, capsys):
+    arguments = ["--directory", str(tmp_path), "--json", "recovery"]
+
+    assert durability.main([*arguments, "--matches", "50", "--records", "20"]) == 0
+
+    [row] = json.loads(capsys.readouterr().out)
+    assert row["matches"] == 50
+    assert row["recovery_seconds"] >= 0
@@ -0,0 +1,25 @@
+import json
+
+from benchmarks import load
+
+
+def test_percentile():
+    latencies = [float(value) for value in range(1, 101)]
+
+    assert load.percentile(latencies, 50) == 50
+    assert load.percentile(latencies, 99) == 99
+    assert load.percentile([3.0], 95) == 3.0
+    assert load.percentile([], 95) == 0.0
+
+
+def test_in_process_run_with_memory_repository(monkeypatch, capsys):
+    monkeypatch.setenv("MATCH_REPOSITORY", "memory")
+    arguments = ["--players", "3", "--duration", "0.3", "--seed", "1", "--json"]
+
+    assert load.main(["--repository", "memory", *arguments]) == 0
+
+    result = json.loads(capsys.readouterr().out)
+    assert result["games"] > 0
+    for endpoint in load.ENDPOINTS:
+        assert result["endpoints"][endpoint]["requests"] > 0
+        assert result["endpoints"][endpoint]["errors"] == 0
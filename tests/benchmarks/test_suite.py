@@ -0,0 +1,33 @@
+import json
+
+from benchmarks import suite
+
+
+def test_compare_reports_regressions_above_threshold():
+    baseline = {"match.str": 1000.0, "in_memory.get_match": 100.0}
+    current = {"match.str": 1200.0, "in_memory.get_match": 105.0, "new": 50.0}
+
+    assert suite.compare(baseline, current, threshold=10) == ["match.str"]
+    assert suite.compare(baseline, current, threshold=25) == []
+
+
+def test_every_benchmark_runs():
+    for function in suite.benchmarks().values():
+        function()
+
+
+def test_compare_command(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    arguments = ["--filter", "in_memory.get_match", "--rounds", "1"]
+
+    assert suite.main(["run", "--output", str(baseline), *arguments]) == 0
+    saved = json.loads(baseline.read_text())["benchmarks"]
+    assert list(saved) == ["in_memory.get_match"]
+
+    saved["in_memory.get_match"]["ns_per_call"] = 1e9
+    baseline.write_text(json.dumps({"benchmarks": saved}))
+    assert suite.main(["compare", str(baseline), *arguments]) == 0
+
+    saved["in_memory.get_match"]["ns_per_call"] = 1e-3
+    baseline.write_text(json.dumps({"benchmarks": saved}))
+    assert suite.main(["compare", str(baseline), *arguments]) == 1
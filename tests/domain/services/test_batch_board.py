@@ -0,0 +1,154 @@
+import uuid
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from src.domain.exception.errors import (
+    BoardNotValidException,
+    SquareNotAvailableException,
+)
+from src.domain.models.match import Match
+from src.domain.models.movement import Movement
+from src.domain.models.status import Status
+from src.domain.services.batch_board import (
+    EMPTY,
+    STATUSES,
+    O,
+    X,
+    evaluate,
+    simulate,
+    to_array,
+)
+from src.domain.services.bitboard import Bitboard
+from src.domain.services.match_service import MatchService
+
+
+@st.composite
+def variants(draw) -> tuple[int, int]:
+    size = draw(st.integers(3, 6))
+    return size, draw(st.integers(3, size))
+
+
+def play(
+    size: int, win_length: int, squares: list[int]
+) -> tuple[Match, list[list[list[str | None]]]]:
+    """Plays the squares with MatchService until the match ends, returns it
+    and the board after every move."""
+    service = MatchService(MagicMock(), MagicMock())
+    match = Match(
+        id=uuid.uuid4(),
+        board=[[None] * size for _ in range(size)],
+        turn="X",
+        status=Status.PLAYING,
+        board_size=size,
+        win_length=win_length,
+    )
+    boards = []
+    for square in squares:
+        if match.status != Status.PLAYING:
+            break
+
+        x, y = divmod(square, size)
+        movement = Movement(
+            matchId=match.id, playerId=match.turn, square={"x": x, "y": y}
+        )
+        service._apply_movement(movement, match)
+        boards.append([list(row) for row in match.board])
+
+    return match, boards
+
+
+def winner(match: Match) -> int:
+    if match.status != Status.WINNER:
+        return EMPTY
+
+    # The turn passes to the other player after the winning move
+    return O if match.turn == "X" else X
+
+
+@settings(max_examples=200, deadline=None)
+@given(
+    variants().flatmap(
+        lambda v: st.tuples(st.just(v), st.permutations(range(v[0] ** 2)))
+    )
+)
+def test_evaluate_matches_the_match_service_after_every_move(game):
+    (size, win_length), squares = game
+    match, boards = play(size, win_length, squares)
+
+    status, winners = evaluate(to_array(boards), win_length)
+
+    # Every board but the last one was still playing
+    assert [STATUSES[code] for code in status] == [Status.PLAYING] * (
+        len(boards) - 1
+    ) + [match.status]
+    assert winners[-1] == winner(match)
+
+
+@settings(max_examples=200, deadline=None)
+@given(
+    variants().flatmap(
+        lambda v: st.tuples(
+            st.just(v),
+            st.lists(
+                st.sampled_from([EMPTY, X, O]), min_size=v[0] ** 2, max_size=v[0] ** 2
+            ),
+        )
+    )
+)
+def test_evaluate_matches_the_bitboard_on_any_board(board):
+    (size, win_length), squares = board
+    array = np.array(squares, dtype=np.int8).reshape(1, size, size)
+    names = {EMPTY: None, X: "X", O: "O"}
+    bitboard = Bitboard.from_board(
+        [[names[square] for square in row] for row in array[0].tolist()], win_length
+    )
+
+    status, winners = evaluate(array, win_length)
+
+    assert STATUSES[status[0]] == bitboard.status()
+    assert (winners[0] == X) == bitboard.is_winner(bitboard.x)
+
+
+@settings(max_examples=20, deadline=None)
+@given(variants(), st.integers(0, 2**32 - 1))
+def test_simulated_games_replay_the_same_with_the_match_service(variant, seed):
+    size, win_length = variant
+    simulation = simulate(50, size, win_length, rng=np.random.default_rng(seed))
+
+    for game in range(50):
+        moves = simulation.moves[game]
+        match, _ = play(size, win_length, moves[moves >= 0].tolist())
+
+        assert match.move_count == simulation.move_count[game]
+        assert STATUSES[simulation.status[game]] == match.status
+        assert simulation.winner[game] == winner(match)
+        assert simulation.boards[game].tolist() == to_array([match.board])[0].tolist()
+
+
+def test_simulate_with_a_policy():
+    def first_empty(boards, player, rng):
+        return (boards.reshape(len(boards), -1) == EMPTY).argmax(axis=1)
+
+    simulation = simulate(3, policy=first_empty)
+
+    # X takes the last diagonal, squares 2, 4 and 6
+    assert simulation.winner.tolist() == [X] * 3
+    assert simulation.moves[0].tolist() == [0, 1, 2, 3, 4, 5, 6, -1, -1]
+
+
+def test_simulate_rejects_taken_squares_and_bad_boards():
+    with pytest.raises(SquareNotAvailableException):
+        simulate(2, policy=lambda boards, player, rng: np.zeros(len(boards), int))
+
+    with pytest.raises(BoardNotValidException):
+        simulate(2, size=3, win_length=4)
+
+
+@pytest.mark.parametrize("win_length", [2, 4])
+def test_evaluate_rejects_bad_win_lengths(win_length):
+    with pytest.raises(BoardNotValidException):
+        evaluate(np.zeros((2, 3, 3), dtype=np.int8), win_length)
@@ -0,0 +1,72 @@
+import itertools
+
+import pytest
+
+from src.domain.models.status import Status
+from src.domain.services.bitboard import Bitboard, line_masks
+
+
+def test_line_masks():
+    assert sorted(line_masks(3, 3)) == sorted(
+        [0b000000111, 0b000111000, 0b111000000]
+        + [0b001001001, 0b010010010, 0b100100100]
+        + [0b100010001, 0b001010100]
+    )
+
+
+def test_board_round_trip():
+    for squares in itertools.product([None, "X", "O"], repeat=9):
+        board = [list(squares[i : i + 3]) for i in range(0, 9, 3)]
+
+        assert Bitboard.from_board(board).to_board() == board
+
+
+def test_place():
+    bitboard = Bitboard(3)
+
+    bitboard.place("X", 1, 2)
+    bitboard.place("O", 2, 0)
+
+    assert bitboard.to_board() == [
+        [None, None, None],
+        [None, None, "X"],
+        ["O", None, None],
+    ]
+
+
+@pytest.mark.parametrize(
+    "board, status",
+    [
+        ([[None, None, None], [None, None, None], [None, None, None]], Status.PLAYING),
+        ([["X", "O", None], [None, "X", None], ["O", None, None]], Status.PLAYING),
+        ([[None, None, None], ["O", "O", "O"], ["X", "X", None]], Status.WINNER),
+        ([["X", "O", None], ["X", "O", None], ["X", None, None]], Status.WINNER),
+        ([["X", "O", None], ["O", "X", None], [None, None, "X"]], Status.WINNER),
+        ([["X", "X", "O"], [None, "O", None], ["O", None, "X"]], Status.WINNER),
+        ([["X", "O", "X"], ["X", "O", "O"], ["O", "X", "X"]], Status.DRAW),
+        ([["X", "X", "X"], ["O", "O", "X"], ["X", "O", "O"]], Status.WINNER),
+    ],
+)
+def test_status(board, status):
+    assert Bitboard.from_board(board).status() == status
+
+
+def test_line_masks_shorter_than_board():
+    # 8 horizontal, 8 vertical and 4 + 4 diagonal lines of 3 squares
+    assert len(line_masks(4, 3)) == 4 * 2 * 2 + 2 * 2 * 2
+
+
+def test_status_with_win_length():
+    board = [[None] * 4 for _ in range(4)]
+    board[1][1] = board[2][2] = board[3][3] = "X"
+
+    assert Bitboard.from_board(board).status() == Status.PLAYING
+    assert Bitboard.from_board(board, win_length=3).status() == Status.WINNER
+
+
+def test_status_without_win_table():
+    board = [[None] * 5 for _ in range(5)]
+    for i in range(5):
+        board[i][4 - i] = "O"
+
+    assert Bitboard.from_board(board).status() == Status.WINNER
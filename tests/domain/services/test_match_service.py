@@ -1,20 +1,28 @@
+import asyncio
+import threading
 import uuid
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import pytest
 
 from src.domain.exception.errors import (
+    BoardNotValidException,
     MatchAlreadyEndedException,
     MatchNotFoundException,
+    PageNotValidException,
     PlayerNotValidException,
     SquareNotAvailableException,
     SquareNotValidException,
     SquareOutOfBoundsException,
     TurnNotValidException,
 )
+from src.domain.models.match_page import MatchQuery
 from src.domain.models.movement import Movement
 from src.domain.models.status import Status
 from src.domain.services.match_service import MatchService
+from src.infra.repositories.async_in_memory_repository import (
+    AsyncInMemoryRepository,
+)
 from src.infra.repositories.in_memory_repository import InMemoryRepository
 from src.logging.logging_service import LoggingService
 
@@ -27,6 +35,14 @@ def service():
     )
 
 
+@pytest.fixture
+def async_service():
+    return MatchService(
+        match_database_repository=AsyncInMemoryRepository(MagicMock()),
+        logger=LoggingService(),
+    )
+
+
 def test_create_match(service):
     match = service.create_match()
 
@@ -34,6 +50,30 @@ def test_create_match(service):
     assert match.status == Status.PLAYING
 
 
+def test_create_matches_in_batches(service):
+    batches = list(service.create_matches(2500, board_size=15))
+
+    assert [len(batch) for batch in batches] == [1000, 1000, 500]
+    for match in (match for batch in batches for match in batch):
+        assert match.board_size == 15 and match.win_length == 5
+        assert service.get_match_status(match.id) == Status.PLAYING
+
+
+def test_create_matches_validates_board_eagerly(service):
+    with pytest.raises(BoardNotValidException):
+        service.create_matches(10, board_size=2)
+
+
+def test_async_create_matches(async_service):
+    async def create():
+        return [batch async for batch in async_service.create_matches_async(3, 4, 3)]
+
+    batches = asyncio.run(create())
+
+    assert len(batches) == 1 and len(batches[0]) == 3
+    assert asyncio.run(async_service.get_match_status_async(batches[0][0].id))
+
+
 def test_get_match_status(service):
     match = service.create_match()
 
@@ -133,6 +173,7 @@ def test_draw(service):
         ["X", "O", "O"],
         ["O", "X", "X"],
     ]
+    match.move_count = 8
     movement = Movement(matchId=match.id, playerId="X", square={"x": 0, "y": 2})
 
     message = service.move(movement)
@@ -141,6 +182,45 @@ def test_draw(service):
     assert message == "Draw!!!"
 
 
+def test_create_gomoku_match(service):
+    match = service.create_match(board_size=15)
+
+    assert len(match.board) == 15
+    assert all(len(row) == 15 for row in match.board)
+    assert match.win_length == 5
+
+
+@pytest.mark.parametrize("board_size, win_length", [(2, 2), (20, 5), (5, 6), (5, 2)])
+def test_create_match_board_not_valid(service, board_size, win_length):
+    with pytest.raises(BoardNotValidException):
+        service.create_match(board_size=board_size, win_length=win_length)
+
+
+def test_gomoku_diagonal_winner(service):
+    match = service.create_match(board_size=15, win_length=5)
+    for i in (3, 4, 6, 7):
+        match.board[i][14 - i] = "O"
+    match.turn = "O"
+    movement = Movement(matchId=match.id, playerId="O", square={"x": 5, "y": 9})
+
+    message = service.move(movement)
+
+    assert match.status == Status.WINNER
+    assert message == "Player 'O' Wins!!!!"
+
+
+def test_gomoku_four_in_a_row_keeps_playing(service):
+    match = service.create_match(board_size=15, win_length=5)
+    match.board[7][3:6] = ["X", "X", "X"]
+    movement = Movement(matchId=match.id, playerId="X", square={"x": 7, "y": 6})
+
+    message = service.move(movement)
+
+    assert match.status == Status.PLAYING
+    assert match.move_count == 1
+    assert message == "Movement performed. Next turn: O"
+
+
 def test_player_not_valid(service):
     match = service.create_match()
     match.status = Status.PLAYING
@@ -197,6 +277,15 @@ def test_x_square_out_of_bounds(service):
         service.move(movement)
 
 
+def test_negative_square_out_of_bounds(service):
+    match = service.create_match()
+    match.turn = "X"
+    movement = Movement(matchId=match.id, playerId="X", square={"x": -1, "y": 0})
+
+    with pytest.raises(SquareOutOfBoundsException):
+        service.move(movement)
+
+
 def test_y_square_out_of_bounds(service):
     match = service.create_match()
     match.turn = "X"
@@ -204,3 +293,265 @@ def test_y_square_out_of_bounds(service):
 
     with pytest.raises(SquareOutOfBoundsException):
         service.move(movement)
+
+
+def test_async_make_valid_move(async_service):
+    match = asyncio.run(async_service.create_match_async())
+    movement = Movement(matchId=match.id, playerId="X", square={"x": 1, "y": 1})
+
+    message = asyncio.run(async_service.move_async(movement))
+
+    assert match.board[1][1] == "X"
+    assert message == "Movement performed. Next turn: O"
+    assert asyncio.run(async_service.get_match_status_async(match.id)) == Status.PLAYING
+
+
+def test_async_match_status_match_not_found(async_service):
+    with pytest.raises(MatchNotFoundException):
+        asyncio.run(async_service.get_match_status_async(uuid.uuid4()))
+
+
+def test_move_many(service):
+    first = service.create_match()
+    second = service.create_match()
+    movements = [
+        Movement(matchId=first.id, playerId="X", square={"x": 0, "y": 0}),
+        Movement(matchId=second.id, playerId="X", square={"x": 1, "y": 1}),
+        Movement(matchId=first.id, playerId="X", square={"x": 0, "y": 1}),
+        Movement(matchId=first.id, playerId="O", square={"x": 0, "y": 0}),
+        Movement(matchId=first.id, playerId="O", square={"x": 2, "y": 2}),
+        Movement(matchId=uuid.uuid4(), playerId="X", square={"x": 0, "y": 0}),
+    ]
+
+    results = service.move_many(movements)
+
+    assert results[0] == "Movement performed. Next turn: O"
+    assert results[1] == "Movement performed. Next turn: O"
+    assert isinstance(results[2], TurnNotValidException)
+    assert isinstance(results[3], SquareNotAvailableException)
+    assert results[4] == "Movement performed. Next turn: X"
+    assert isinstance(results[5], MatchNotFoundException)
+    assert first.board[0][0] == "X" and first.board[2][2] == "O"
+    assert first.move_count == 2
+    assert second.board[1][1] == "X"
+
+
+def test_async_move_many(async_service):
+    match = asyncio.run(async_service.create_match_async())
+    movements = [
+        (
+            Movement(matchId=match.id, playerId="X", square={"x": 0, "y": i})
+            if i % 2 == 0
+            else Movement(matchId=match.id, playerId="O", square={"x": 1, "y": i})
+        )
+        for i in range(3)
+    ]
+
+    results = asyncio.run(async_service.move_many_async(movements))
+
+    assert results[-1] == "Movement performed. Next turn: O"
+    assert match.move_count == 3
+
+
+def test_hint(service):
+    match = service.create_match()
+    match.board = [["X", "X", None], ["O", "O", None], [None, None, None]]
+    match.move_count = 4
+
+    assert service.hint(match.id) == (0, 2)
+
+
+def test_hint_match_ended(service):
+    match = service.create_match()
+    match.status = Status.DRAW
+
+    with pytest.raises(MatchAlreadyEndedException):
+        service.hint(match.id)
+
+    with pytest.raises(MatchNotFoundException):
+        service.hint(uuid.uuid4())
+
+
+def test_computer_plays_first(service):
+    match = service.create_match(computer="x")
+
+    assert match.computer == "X"
+    assert match.turn == "O"
+    assert match.move_count == 1
+
+
+def test_computer_replies_to_each_movement(service):
+    match = service.create_match(computer="O")
+
+    message = service.move(
+        Movement(matchId=match.id, playerId="X", square={"x": 0, "y": 0})
+    )
+
+    assert message == "Computer played [1, 1]. Movement performed. Next turn: X"
+    assert match.board[1][1] == "O"
+    assert match.move_count == 2
+
+
+def test_moves_are_recorded_in_order_for_the_repository(service):
+    match = service.create_match(computer="O")
+
+    service.move(Movement(matchId=match.id, playerId="X", square={"x": 0, "y": 0}))
+
+    assert match.played == (("X", 0, 0), ("O", 1, 1))
+    # Copies, like the ones repositories hand out, start without any
+    assert match.copy().played == ()
+
+
+def test_computer_wins(service):
+    match = service.create_match(computer="O")
+    messages = [
+        service.move(Movement(matchId=match.id, playerId="X", square=square))
+        for square in ({"x": 0, "y": 0}, {"x": 2, "y": 2}, {"x": 0, "y": 2})
+    ]
+
+    assert match.status == Status.WINNER
+    assert messages[-1].endswith("Player 'O' Wins!!!!")
+
+
+def test_computer_not_valid(service):
+    with pytest.raises(PlayerNotValidException):
+        service.create_match(computer="Z")
+
+
+def test_async_hint_and_computer(async_service):
+    match = asyncio.run(async_service.create_match_async(computer="O"))
+    asyncio.run(
+        async_service.move_async(
+            Movement(matchId=match.id, playerId="X", square={"x": 1, "y": 1})
+        )
+    )
+
+    x, y = asyncio.run(async_service.hint_async(match.id))
+    assert match.board[x][y] is None
+
+
+def next_free(match) -> dict[str, int]:
+    x, y = next(
+        (x, y)
+        for x in range(match.board_size)
+        for y in range(match.board_size)
+        if match.board[x][y] is None
+    )
+    return {"x": x, "y": y}
+
+
+def searching_threads(service: MatchService) -> list[threading.Thread]:
+    """Records the thread of every search of `service`."""
+    threads: list[threading.Thread] = []
+    best_square = service._best_square
+
+    def recorded(match):
+        threads.append(threading.current_thread())
+        return best_square(match)
+
+    service._best_square = recorded  # type: ignore[method-assign]
+    return threads
+
+
+def test_async_searches_run_off_the_event_loop(async_service):
+    threads = searching_threads(async_service)
+
+    match = asyncio.run(async_service.create_match_async(board_size=4, computer="X"))
+    asyncio.run(
+        async_service.move_async(
+            Movement(matchId=match.id, playerId="O", square=next_free(match))
+        )
+    )
+    asyncio.run(async_service.hint_async(match.id))
+
+    assert match.move_count == 3
+    assert len(threads) == 3
+    assert threading.main_thread() not in threads
+
+
+def test_async_batch_searches_the_replies_once(async_service):
+    threads = searching_threads(async_service)
+    match = asyncio.run(async_service.create_match_async(board_size=4, computer="O"))
+    plain = asyncio.run(async_service.create_match_async(board_size=4))
+    movements = [
+        Movement(matchId=match.id, playerId="X", square={"x": 0, "y": 0}),
+        Movement(matchId=plain.id, playerId="X", square={"x": 0, "y": 0}),
+        Movement(matchId=match.id, playerId="X", square={"x": 3, "y": 3}),
+    ]
+
+    with patch.object(
+        async_service, "_search_replies", wraps=async_service._search_replies
+    ) as search_replies:
+        results = asyncio.run(async_service.move_many_async(movements))
+
+    assert all(result.startswith("Computer played") for result in results[::2])
+    assert match.move_count == 4 and plain.move_count == 1
+    search_replies.assert_called_once()
+    assert len(threads) == 2 and threading.main_thread() not in threads
+
+
+def test_async_replies_are_searched_again_on_other_boards(async_service):
+    match = asyncio.run(async_service.create_match_async(board_size=4, computer="O"))
+    search_replies = async_service._search_replies
+
+    def moved_meanwhile(movements, matches, replies):
+        search_replies(movements, matches, replies)
+        # Another request takes the square once the first search is done
+        match.board[3][3] = "X"
+
+    with patch.object(
+        async_service, "_search_replies", side_effect=moved_meanwhile
+    ) as searched:
+        with pytest.raises(SquareNotAvailableException):
+            asyncio.run(
+                async_service.move_async(
+                    Movement(matchId=match.id, playerId="X", square={"x": 3, "y": 3})
+                )
+            )
+
+    assert searched.call_count == 2
+
+
+def test_list_matches_pages(service):
+    repository = service.match_database_repository
+    repository.cache, repository.timestamps = {}, {}
+    created = [service.create_match() for _ in range(5)]
+    service.move(Movement(matchId=created[0].id, playerId="X", square={"x": 0, "y": 0}))
+
+    pages = []
+    query = MatchQuery(limit=2)
+    while True:
+        page = service.list_matches(query)
+        pages.append([match.id for match in page.matches])
+        if page.next is None:
+            break
+        query.after = page.next
+
+    listed = [match_id for ids in pages for match_id in ids]
+    assert sorted(listed) == sorted(match.id for match in created)
+    # The last updated match comes first
+    assert listed[0] == created[0].id
+    assert [len(ids) for ids in pages] == [2, 2, 1]
+
+
+def test_list_matches_filters_by_status(service):
+    repository = service.match_database_repository
+    repository.cache, repository.timestamps = {}, {}
+    playing = service.create_match()
+    service.create_match(computer="X")
+
+    page = service.list_matches(MatchQuery(status=Status.PLAYING, limit=10))
+    assert len(page.matches) == 2 and page.next is None
+
+    playing.status = Status.DRAW
+    page = service.list_matches(MatchQuery(status=Status.DRAW, include_board=True))
+    assert [match.id for match in page.matches] == [playing.id]
+    assert page.matches[0].board == playing.board
+
+
+@pytest.mark.parametrize(
+    "query", [MatchQuery(limit=0), MatchQuery(limit=1_001), MatchQuery(sort="id")]
+)
+def test_list_matches_query_not_valid(service, query):
+    with pytest.raises(PageNotValidException):
+        service.list_matches(query)
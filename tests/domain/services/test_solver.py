@@ -0,0 +1,107 @@
+import time
+
+import pytest
+
+from src.domain.models.status import Status
+from src.domain.services.bitboard import Bitboard
+from src.domain.services.solver import (
+    NO_MOVE,
+    Solver,
+    canonical,
+    perfect_play_table,
+    symmetries,
+)
+
+
+def play(bitboard: Bitboard, turn: str, square: int) -> str:
+    bitboard.place(turn, *divmod(square, bitboard.size))
+    return "O" if turn == "X" else "X"
+
+
+def test_symmetries_are_distinct_permutations():
+    permutations = symmetries(3)
+
+    assert len(set(permutations)) == 8
+    assert all(sorted(permutation) == list(range(9)) for permutation in permutations)
+
+
+def test_canonical_is_the_same_for_symmetric_positions():
+    corner = canonical(0b000000001, 0b000010000, 3)
+
+    for x in (0b000000100, 0b001000000, 0b100000000):
+        assert canonical(x, 0b000010000, 3) == corner
+    assert canonical(0b000000010, 0b000010000, 3) != corner
+
+
+def test_perfect_play_table_covers_every_reachable_position():
+    table = perfect_play_table()
+
+    assert sum(square != NO_MOVE for square in table) == 4520
+
+
+@pytest.mark.parametrize("solver_plays", ["X", "O"])
+def test_solver_never_loses_3x3(solver_plays):
+    solver = Solver()
+
+    def explore(bitboard: Bitboard, turn: str) -> None:
+        if bitboard.status() != Status.PLAYING:
+            assert not bitboard.is_winner(
+                bitboard.o if solver_plays == "X" else bitboard.x
+            )
+            return
+
+        if turn == solver_plays:
+            squares = [solver.best_move(bitboard, turn)]
+        else:
+            empty = bitboard.full_mask() & ~(bitboard.x | bitboard.o)
+            squares = [square for square in range(9) if empty >> square & 1]
+
+        for square in squares:
+            child = Bitboard(3, 3, bitboard.x, bitboard.o)
+            explore(child, play(child, turn, square))
+
+    explore(Bitboard(3, 3), "X")
+
+
+def test_solver_takes_the_win_over_blocking():
+    # X X .
+    # O O .
+    # . . .
+    bitboard = Bitboard(3, 3, x=0b000000011, o=0b000011000)
+
+    assert Solver().best_move(bitboard, "X") == 2
+    assert Solver().best_move(Bitboard(3, 3, x=0b000000011, o=0b000001000), "O") == 2
+
+
+def test_gomoku_takes_the_win_and_blocks():
+    bitboard = Bitboard(15, 5)
+    for y in range(4):
+        bitboard.place("X", 7, 3 + y)
+    for x in range(3):
+        bitboard.place("O", x, 0)
+
+    assert Solver().best_move(bitboard, "X") in (7 * 15 + 2, 7 * 15 + 7)
+    # O must block one of the ends of the four
+    assert Solver().best_move(bitboard, "O") in (7 * 15 + 2, 7 * 15 + 7)
+
+
+def test_search_respects_the_time_budget():
+    bitboard = Bitboard(15, 5)
+    turn = "X"
+    for square in (112, 113, 127, 97, 128):
+        turn = play(bitboard, turn, square)
+
+    started = time.perf_counter()
+    square = Solver(time_budget=0.05).best_move(bitboard, turn)
+
+    assert time.perf_counter() - started < 0.5
+    assert not (bitboard.x | bitboard.o) >> square & 1
+
+
+def test_solver_wins_4x4_three_in_a_row():
+    bitboard = Bitboard(4, 3)
+    turn = "X"
+    while bitboard.status() == Status.PLAYING:
+        turn = play(bitboard, turn, Solver().best_move(bitboard, turn))
+
+    assert bitboard.is_winner(bitboard.x)
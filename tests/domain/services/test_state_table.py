@@ -0,0 +1,83 @@
+import uuid
+from unittest.mock import MagicMock
+
+from src.domain.models.match import Match
+from src.domain.models.movement import Movement
+from src.domain.models.status import Status
+from src.domain.services.match_service import MatchService
+from src.domain.services.state_table import (
+    NO_STATE,
+    PATH,
+    POSITIONS,
+    SQUARES,
+    STATE_TABLE,
+    generate,
+)
+
+
+def test_shipped_table_is_up_to_date():
+    with open(PATH, "rb") as file:
+        assert file.read() == generate()
+
+
+def test_table_has_every_reachable_position():
+    assert STATE_TABLE.count == 5478
+    assert sum(state != NO_STATE for state in STATE_TABLE.index_of) == 5478
+    assert len(STATE_TABLE.index_of) == POSITIONS
+
+
+def test_table_matches_the_rules_on_every_move():
+    service = MatchService(MagicMock(), MagicMock())
+    empty: list[list[str | None]] = [[None] * 3 for _ in range(3)]
+    seen = {STATE_TABLE.index(empty)}
+    pending = [(empty, "X", 0)]
+    while pending:
+        board, turn, move_count = pending.pop()
+        state = STATE_TABLE.index(board)
+        for square in range(SQUARES):
+            x, y = divmod(square, 3)
+            successor = STATE_TABLE.successor(state, square)
+            if board[x][y] is not None or STATE_TABLE.status(state) != Status.PLAYING:
+                assert successor == NO_STATE
+                continue
+
+            child = [row.copy() for row in board]
+            child[x][y] = turn
+            match = Match(
+                id=uuid.uuid4(),
+                board=child,
+                turn=turn,
+                status=Status.PLAYING,
+                move_count=move_count + 1,
+            )
+            status = service._check_movement(match, x, y)
+
+            assert successor == STATE_TABLE.index(child) != NO_STATE
+            assert STATE_TABLE.status(successor) == status
+            if successor not in seen:
+                seen.add(successor)
+                next_turn = "O" if turn == "X" else "X"
+                pending.append((child, next_turn, move_count + 1))
+
+    assert len(seen) == STATE_TABLE.count
+
+
+def test_unreachable_positions_are_checked_with_the_rules():
+    repository = MagicMock()
+    service = MatchService(repository, MagicMock())
+    # X played three times in a row, which the table does not know about
+    match = Match(
+        id=uuid.uuid4(),
+        board=[["X", "X", None], [None, "X", None], [None] * 3],
+        turn="X",
+        status=Status.PLAYING,
+        move_count=3,
+    )
+
+    assert STATE_TABLE.index(match.board) == NO_STATE
+
+    service._apply_movement(
+        Movement(matchId=match.id, playerId="X", square={"x": 0, "y": 2}), match
+    )
+
+    assert match.status == Status.WINNER
@@ -0,0 +1,29 @@
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+
+from src.domain.exception.errors import PageNotValidException
+from src.infra.api.cursors import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    key = (datetime(2026, 10, 18, 17, 3, 12, 460271), uuid4())
+
+    cursor = encode_cursor("created_at", key)
+
+    assert decode_cursor(cursor, "created_at") == key
+    assert "=" not in cursor
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "AAAA", "////" * 10])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(PageNotValidException):
+        decode_cursor(cursor, "updated_at")
+
+
+def test_cursors_only_work_with_their_sort():
+    cursor = encode_cursor("updated_at", (datetime(2026, 10, 18), uuid4()))
+
+    with pytest.raises(PageNotValidException):
+        decode_cursor(cursor, "created_at")
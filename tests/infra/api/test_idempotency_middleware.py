@@ -0,0 +1,154 @@
+import uuid
+from unittest.mock import MagicMock, patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.application.create_match_usecase import CreateMatchUseCase
+from src.application.create_matches_usecase import CreateMatchesUseCase
+from src.application.make_movement_usecase import MakeMovementUseCase
+from src.domain.exception.errors import (
+    DatabaseMoveConflictException,
+    TurnNotValidException,
+)
+from src.infra.api.idempotency_middleware import IdempotencyMiddleware
+from src.infra.api.routers import get_match_repository, router
+from src.infra.repositories.idempotency_store import (
+    IdempotencySettings,
+    IdempotencyStore,
+)
+
+app = FastAPI()
+app.add_middleware(IdempotencyMiddleware)
+app.include_router(router)
+app.dependency_overrides[get_match_repository] = lambda: MagicMock()
+
+client = TestClient(app)
+
+
+def setup_function():
+    app.state.idempotency = IdempotencyStore(IdempotencySettings(), MagicMock())
+
+
+def movement(x: int = 0) -> dict:
+    return {
+        "matchId": "a1b2c3d4-e5f6-7890-1234-567890abcdef",
+        "playerId": "X",
+        "square": {"x": x, "y": 0},
+    }
+
+
+@patch.object(MakeMovementUseCase, "run_async")
+def test_retried_move_is_replayed(mock_make_movement):
+    mock_make_movement.return_value = "Movement performed. Next turn: O"
+    headers = {"Idempotency-Key": "move-1"}
+
+    first = client.post("/move", json=movement(), headers=headers)
+    # The first attempt succeeded, running it again would fail
+    mock_make_movement.side_effect = TurnNotValidException("Not your turn")
+    retry = client.post("/move", json=movement(), headers=headers)
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.headers["content-type"] == "application/json"
+    assert "idempotent-replayed" not in first.headers
+    mock_make_movement.assert_awaited_once()
+
+
+@patch.object(CreateMatchUseCase, "run_async")
+def test_retried_create_returns_the_same_match(mock_create_match):
+    mock_create_match.side_effect = lambda **kwargs: MagicMock(
+        id=uuid.uuid4(), turn="X", computer=None
+    )
+    headers = {"Idempotency-Key": "create-1"}
+
+    first = client.get("/create", headers=headers)
+    retry = client.get("/create", headers=headers)
+    other = client.get("/create", headers={"Idempotency-Key": "create-2"})
+
+    assert retry.json()["matchId"] == first.json()["matchId"]
+    assert other.json()["matchId"] != first.json()["matchId"]
+    assert mock_create_match.await_count == 2
+
+
+@patch.object(MakeMovementUseCase, "run_async")
+def test_client_errors_are_replayed(mock_make_movement):
+    mock_make_movement.side_effect = TurnNotValidException("Not your turn")
+    headers = {"Idempotency-Key": "move-1"}
+
+    client.post("/move", json=movement(), headers=headers)
+    retry = client.post("/move", json=movement(), headers=headers)
+
+    assert retry.status_code == 400
+    assert retry.json() == {"detail": "Not your turn"}
+    mock_make_movement.assert_awaited_once()
+
+
+@patch.object(MakeMovementUseCase, "run_async")
+def test_conflicts_and_server_errors_run_again(mock_make_movement):
+    mock_make_movement.side_effect = [
+        DatabaseMoveConflictException("Match changed"),
+        Exception("Boom"),
+        "Movement performed. Next turn: O",
+    ]
+    headers = {"Idempotency-Key": "move-1"}
+
+    statuses = [
+        client.post("/move", json=movement(), headers=headers).status_code
+        for _ in range(3)
+    ]
+
+    assert statuses == [409, 500, 200]
+    assert not app.state.idempotency.in_flight
+
+
+@patch.object(MakeMovementUseCase, "run_async")
+def test_key_reused_for_another_request(mock_make_movement):
+    mock_make_movement.return_value = "Movement performed. Next turn: O"
+    headers = {"Idempotency-Key": "move-1"}
+
+    client.post("/move", json=movement(0), headers=headers)
+    response = client.post("/move", json=movement(1), headers=headers)
+
+    assert response.status_code == 422
+    mock_make_movement.assert_awaited_once()
+
+
+def test_key_not_valid():
+    response = client.post(
+        "/move", json=movement(), headers={"Idempotency-Key": "k" * 256}
+    )
+
+    assert response.status_code == 400
+
+
+@patch.object(MakeMovementUseCase, "run_async")
+def test_requests_without_key_always_run(mock_make_movement):
+    mock_make_movement.return_value = "Movement performed. Next turn: O"
+
+    client.post("/move", json=movement())
+    client.post("/move", json=movement())
+
+    assert mock_make_movement.await_count == 2
+    assert not app.state.idempotency.cache.entries
+
+
+@patch.object(CreateMatchesUseCase, "run_async")
+def test_retries_of_responses_too_large_are_rejected(mock_create_matches):
+    async def batches():
+        yield [MagicMock(id=uuid.uuid4(), turn="X") for _ in range(10)]
+
+    mock_create_matches.side_effect = lambda **kwargs: batches()
+    app.state.idempotency = IdempotencyStore(
+        IdempotencySettings(max_body=100), MagicMock()
+    )
+    headers = {"Idempotency-Key": "create-many-1"}
+
+    first = client.post("/create", json={"count": 10}, headers=headers)
+    retry = client.post("/create", json={"count": 10}, headers=headers)
+
+    assert len(first.text.splitlines()) == 10
+    assert retry.status_code == 422
+    assert "too large to be replayed" in retry.json()["detail"]
+    mock_create_matches.assert_called_once()
@@ -0,0 +1,19 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+
+from src.domain.exception.errors import WorkersNotValidException
+from src.infra.api.lifespan import MEMORY_REPOSITORY, lifespan
+
+
+def test_memory_repository_needs_a_single_worker(monkeypatch):
+    monkeypatch.setenv("MATCH_REPOSITORY", MEMORY_REPOSITORY)
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+
+    async def start() -> None:
+        async with lifespan(FastAPI()):
+            pass
+
+    with pytest.raises(WorkersNotValidException):
+        asyncio.run(start())
@@ -0,0 +1,81 @@
+import uuid
+from unittest.mock import MagicMock, patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.application.get_match_status_usecase import GetMatchStatusUseCase
+from src.domain.exception.errors import MatchNotFoundException
+from src.infra.api.metrics_middleware import MetricsMiddleware
+from src.infra.api.routers import get_match_repository, router
+from src.infra.metrics.metrics import (
+    DOMAIN_EXCEPTIONS,
+    REQUEST_LATENCY,
+    UNEXPECTED_EXCEPTION,
+)
+from src.infra.metrics.workers import WORKER_GAUGES
+
+app = FastAPI()
+app.add_middleware(MetricsMiddleware)
+app.include_router(router)
+app.dependency_overrides[get_match_repository] = lambda: MagicMock()
+
+client = TestClient(app)
+
+
+@patch.object(GetMatchStatusUseCase, "run_async")
+def test_request_latency_by_route_template(mock_get_match_status):
+    mock_get_match_status.side_effect = MatchNotFoundException("Match not found")
+    latency = REQUEST_LATENCY.labels("GET", "/status/{matchId}", "404")
+    not_found = DOMAIN_EXCEPTIONS.labels("MatchNotFoundException")
+    requests, errors = latency.count, not_found.value
+
+    client.get(f"/status/{uuid.uuid4()}")
+    client.get(f"/status/{uuid.uuid4()}")
+
+    assert latency.count == requests + 2
+    assert not_found.value == errors + 2
+
+
+@patch.object(GetMatchStatusUseCase, "run_async")
+def test_unexpected_exceptions_share_a_label(mock_get_match_status):
+    mock_get_match_status.side_effect = ValueError("unexpected")
+    unexpected = DOMAIN_EXCEPTIONS.labels(UNEXPECTED_EXCEPTION)
+    errors = unexpected.value
+
+    response = client.get(f"/status/{uuid.uuid4()}")
+
+    assert response.status_code == 500
+    assert unexpected.value == errors + 1
+    assert "ValueError" not in client.get("/metrics").text
+
+
+def test_metrics_endpoint_has_worker_gauges():
+    WORKER_GAUGES.claim()
+
+    response = client.get("/metrics")
+
+    # The scrape itself is in flight
+    assert f'worker_requests_in_flight{{worker="{WORKER_GAUGES.slot}"}} 1' in (
+        response.text
+    )
+    assert (
+        f'worker_db_pool_connections{{worker="{WORKER_GAUGES.slot}",state="size"}}'
+        in response.text
+    )
+
+
+def test_metrics_endpoint():
+    client.get("/unknown")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="unmatched",'
+        'status="404"}' in response.text
+    )
+    assert 'domain_exceptions_total{exception="TurnNotValidException"}' in (
+        response.text
+    )
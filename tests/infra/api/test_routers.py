@@ -1,38 +1,51 @@
+import json
 import uuid
+from datetime import datetime
 from unittest.mock import MagicMock, patch
 
-from fastapi import HTTPException
+from fastapi import FastAPI, HTTPException
 from fastapi.testclient import TestClient
 
 from src.application.create_match_usecase import CreateMatchUseCase
+from src.application.create_matches_usecase import CreateMatchesUseCase
+from src.application.get_hint_usecase import GetHintUseCase
 from src.application.get_match_status_usecase import GetMatchStatusUseCase
+from src.application.list_matches_usecase import ListMatchesUseCase
 from src.application.make_movement_usecase import MakeMovementUseCase
+from src.application.make_movements_usecase import MakeMovementsUseCase
 from src.domain.exception.errors import (
+    BoardNotValidException,
     DatabaseEnvVarNotSetException,
     DatabaseGetMatchException,
     DatabaseMatchNotFoundException,
+    DatabaseMoveConflictException,
     DatabaseSaveMatchException,
     DatabaseUpdateMatchException,
     MatchAlreadyEndedException,
     MatchNotFoundException,
+    PageNotValidException,
     PlayerNotValidException,
     SquareNotAvailableException,
     SquareNotValidException,
     SquareOutOfBoundsException,
     TurnNotValidException,
 )
-from src.infra.api.routers import router, to_http_exception
-from src.infra.repositories.postgresql_repository import PostgreSQLRepository
+from src.domain.models.match_page import MatchPage, MatchSummary
+from src.domain.models.status import Status
+from src.infra.api.cursors import encode_cursor
+from src.infra.api.routers import get_match_repository, router, to_http_exception
 
-client = TestClient(router)
+app = FastAPI()
+app.include_router(router)
+app.dependency_overrides[get_match_repository] = lambda: MagicMock()
 
+client = TestClient(app)
 
-@patch.object(PostgreSQLRepository, "__init__")
-@patch.object(CreateMatchUseCase, "run")
-def test_create_match(mock_create_match, mock_postgre):
+
+@patch.object(CreateMatchUseCase, "run_async")
+def test_create_match(mock_create_match):
     id = uuid.uuid4()
-    mock_postgre.return_value = None
-    mock_create_match.return_value = MagicMock(id=id, turn="X")
+    mock_create_match.return_value = MagicMock(id=id, turn="X", computer=None)
 
     response = client.get("/create")
 
@@ -40,10 +53,102 @@ def test_create_match(mock_create_match, mock_postgre):
     assert response.json() == {"matchId": str(id), "turn": "X"}
 
 
-@patch.object(PostgreSQLRepository, "__init__")
-@patch.object(GetMatchStatusUseCase, "run")
-def test_get_match_status(mock_get_match_status, mock_postgre):
-    mock_postgre.return_value = None
+@patch.object(CreateMatchUseCase, "run_async")
+def test_create_gomoku_match(mock_create_match):
+    mock_create_match.return_value = MagicMock(id=uuid.uuid4(), turn="X", computer=None)
+
+    response = client.get("/create?boardSize=15&winLength=5")
+
+    assert response.status_code == 200
+    mock_create_match.assert_awaited_once_with(
+        board_size=15, win_length=5, computer=None
+    )
+
+
+@patch.object(CreateMatchUseCase, "run_async")
+def test_create_match_against_computer(mock_create_match):
+    board = [["X", None, None], [None] * 3, [None] * 3]
+    mock_create_match.return_value = MagicMock(
+        id=uuid.uuid4(), turn="O", computer="X", board=board
+    )
+
+    response = client.get("/create?computer=X")
+
+    assert response.json()["board"] == board
+    mock_create_match.assert_awaited_once_with(
+        board_size=3, win_length=None, computer="X"
+    )
+
+
+@patch.object(GetHintUseCase, "run_async")
+def test_hint(mock_hint):
+    mock_hint.return_value = (0, 2)
+
+    response = client.get(f"/hint/{uuid.uuid4()}")
+
+    assert response.status_code == 200
+    assert response.json() == {"square": {"x": 0, "y": 2}}
+
+
+@patch.object(GetHintUseCase, "run_async")
+def test_hint_match_ended(mock_hint):
+    mock_hint.side_effect = MatchAlreadyEndedException("Match has already ended")
+
+    response = client.get(f"/hint/{uuid.uuid4()}")
+
+    assert response.status_code == 400
+
+
+def batches_of(*batches, error=None):
+    async def generate():
+        for batch in batches:
+            yield [MagicMock(id=id, turn="X") for id in batch]
+        if error is not None:
+            raise error
+
+    return generate()
+
+
+@patch.object(CreateMatchesUseCase, "run_async")
+def test_create_matches(mock_create_matches):
+    ids = [uuid.uuid4() for _ in range(3)]
+    mock_create_matches.return_value = batches_of(ids[:2], ids[2:])
+
+    response = client.post("/create", json={"count": 3, "boardSize": 15})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        {"matchId": str(id), "turn": "X"} for id in ids
+    ]
+    mock_create_matches.assert_called_once_with(count=3, board_size=15, win_length=None)
+
+
+@patch.object(CreateMatchesUseCase, "run_async")
+def test_create_matches_failing_batch(mock_create_matches):
+    id = uuid.uuid4()
+    mock_create_matches.return_value = batches_of(
+        [id], error=DatabaseSaveMatchException("Error saving matches")
+    )
+
+    response = client.post("/create", json={"count": 2000})
+
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        {"matchId": str(id), "turn": "X"},
+        {"status_code": 400, "detail": "Error saving matches"},
+    ]
+
+
+@patch.object(CreateMatchesUseCase, "run_async")
+def test_create_matches_not_valid(mock_create_matches):
+    mock_create_matches.side_effect = BoardNotValidException("Board size not valid")
+
+    assert client.post("/create", json={"count": 0}).status_code == 422
+    assert client.post("/create", json={"count": 2, "boardSize": 2}).status_code == 400
+
+
+@patch.object(GetMatchStatusUseCase, "run_async")
+def test_get_match_status(mock_get_match_status):
     mock_get_match_status.return_value = "PLAYING"
 
     response = client.get(f"/status/{str(uuid.uuid4())}")
@@ -52,10 +157,66 @@ def test_get_match_status(mock_get_match_status, mock_postgre):
     assert response.json() == {"status": "PLAYING"}
 
 
-@patch.object(PostgreSQLRepository, "__init__")
-@patch.object(MakeMovementUseCase, "run")
-def test_make_valid_move(mock_move, mock_postgre):
-    mock_postgre.return_value = None
+@patch.object(ListMatchesUseCase, "run_async")
+def test_list_matches(mock_list_matches):
+    match = MatchSummary(
+        id=uuid.uuid4(),
+        status=Status.WINNER,
+        turn="O",
+        board_size=3,
+        win_length=3,
+        move_count=5,
+        computer=None,
+        created_at=datetime(2026, 10, 18, 10, 0),
+        updated_at=datetime(2026, 10, 18, 10, 5),
+    )
+    mock_list_matches.return_value = MatchPage([match], match.key("updated_at"))
+    after = (datetime(2026, 10, 18, 11, 0), uuid.uuid4())
+
+    response = client.get(
+        "/matches",
+        params={
+            "status": "winner",
+            "updatedFrom": "2026-10-18T12:00:00+02:00",
+            "cursor": encode_cursor("updated_at", after),
+            "limit": 1,
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "matches": [
+            {
+                "matchId": str(match.id),
+                "status": "winner",
+                "turn": "O",
+                "boardSize": 3,
+                "winLength": 3,
+                "moveCount": 5,
+                "computer": None,
+                "createdAt": "2026-10-18T10:00:00",
+                "updatedAt": "2026-10-18T10:05:00",
+            }
+        ],
+        "nextCursor": encode_cursor("updated_at", match.key("updated_at")),
+    }
+    query = mock_list_matches.call_args.kwargs["query"]
+    assert query.status == Status.WINNER
+    assert query.updated_from == datetime(2026, 10, 18, 10, 0)
+    assert query.after == after
+    assert query.limit == 1
+
+
+def test_list_matches_with_a_cursor_of_another_sort():
+    cursor = encode_cursor("updated_at", (datetime(2026, 10, 18), uuid.uuid4()))
+
+    response = client.get("/matches", params={"sort": "createdAt", "cursor": cursor})
+
+    assert response.status_code == 400
+
+
+@patch.object(MakeMovementUseCase, "run_async")
+def test_make_valid_move(mock_move):
     mock_move.return_value = "Movement performed. Next turn: O"
     move_data = {
         "matchId": str(uuid.uuid4()),
@@ -69,9 +230,36 @@ def test_make_valid_move(mock_move, mock_postgre):
     assert response.json() == {"message": "Movement performed. Next turn: O"}
 
 
+@patch.object(MakeMovementsUseCase, "run_async")
+def test_make_batch_moves(mock_moves):
+    mock_moves.return_value = [
+        "Movement performed. Next turn: O",
+        TurnNotValidException("Player X, it's not your turn"),
+    ]
+    match_id = str(uuid.uuid4())
+    moves_data = [
+        {"matchId": match_id, "playerId": "X", "square": {"x": 0, "y": 0}},
+        {"matchId": "not-an-uuid", "playerId": "X", "square": {"x": 0, "y": 0}},
+        {"matchId": match_id, "playerId": "X", "square": {"x": 0, "y": 1}},
+    ]
+
+    response = client.post("/moves", json=moves_data)
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "results": [
+            {"message": "Movement performed. Next turn: O"},
+            {"status_code": 500, "detail": "Internal server error"},
+            {"status_code": 400, "detail": "Player X, it's not your turn"},
+        ]
+    }
+    assert len(mock_moves.call_args.kwargs["movements"]) == 2
+
+
 def test_to_http_exception_400():
     exceptions = [
         PlayerNotValidException(""),
+        BoardNotValidException(""),
         SquareNotValidException(""),
         MatchAlreadyEndedException(""),
         TurnNotValidException(""),
@@ -80,6 +268,7 @@ def test_to_http_exception_400():
         DatabaseSaveMatchException(""),
         DatabaseUpdateMatchException(""),
         DatabaseGetMatchException(""),
+        PageNotValidException(""),
     ]
 
     for exc in exceptions:
@@ -103,6 +292,13 @@ def test_to_http_exception_404():
         assert result.status_code == 404
 
 
+def test_to_http_exception_409():
+    result = to_http_exception(DatabaseMoveConflictException(""))
+
+    assert isinstance(result, HTTPException)
+    assert result.status_code == 409
+
+
 def test_to_http_exception_500():
     exc = Exception("")
 
@@ -0,0 +1,132 @@
+import json
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.dialects import postgresql
+
+from src.infra.database import analytics
+from src.infra.database.analytics import MatchStatistics, collect, read_table
+from src.infra.entities.match_db import ArchivedMatchDB, Base, MatchDB
+from src.infra.repositories.match_statements import (
+    MOVE_TABLES,
+    statistics_statement,
+)
+
+# status, turn, computer, move count and first square of each match
+LIVE = [
+    (0, 1, None, 1, (1, 1)),
+    (1, 1, None, 5, (1, 1)),
+    (1, 0, 1, 6, (0, 0)),
+]
+ARCHIVED = [
+    (2, 1, None, 9, (1, 1)),
+    (1, 1, 1, 7, None),
+]
+
+
+def insert_matches(connection, table, matches) -> None:
+    for status, turn, computer, move_count, opening in matches:
+        match_id = uuid4()
+        connection.execute(
+            insert(table).values(
+                id=match_id,
+                status=status,
+                turn=turn,
+                board=b"\0" * 4,
+                move_count=move_count,
+                computer=computer,
+            )
+        )
+        if opening is not None:
+            connection.execute(
+                insert(MOVE_TABLES[table]).values(
+                    match_id=match_id, seq=1, player=0, x=opening[0], y=opening[1]
+                )
+            )
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'matches.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        insert_matches(connection, MatchDB, LIVE)
+        insert_matches(connection, ArchivedMatchDB, ARCHIVED)
+
+    yield engine
+    engine.dispose()
+
+
+def test_statistics_statement_reads_the_moves_from_the_last_id():
+    after = uuid4()
+    sql = str(
+        statistics_statement(MatchDB, after, 100).compile(dialect=postgresql.dialect())
+    )
+
+    assert "matches.board," not in sql
+    assert "LEFT OUTER JOIN moves" in sql
+    assert "moves.match_id > " in sql
+    assert "ORDER BY matches.id" in sql
+    assert "LEFT OUTER JOIN moves_archive" in str(
+        statistics_statement(ArchivedMatchDB, None, 100).compile(
+            dialect=postgresql.dialect()
+        )
+    )
+
+
+def test_collect_counts_every_match(engine, tmp_path):
+    output = tmp_path / "analytics.json"
+
+    statistics = collect(
+        engine, MatchStatistics(), output, MagicMock(), chunk_size=1, cursor_rows=2
+    )
+
+    summary = statistics.summary()["3x3, 3 in a row"]
+    assert (summary["matches"], summary["playing"], summary["finished"]) == (5, 1, 4)
+    assert (summary["x_wins"], summary["o_wins"], summary["draws"]) == (2, 1, 1)
+    assert summary["first_move_advantage"] == 0.25
+    assert summary["average_moves"] == 6.75
+    assert summary["opponents"]["computer O"]["matches"] == 2
+    # The archived match without a stored first move has no opening
+    assert summary["openings"][0]["matches"] == 3
+    assert summary["openings"][0]["draw_ratio"] == 0.5
+    assert summary["openings"][0]["average_moves"] == 7.0
+    assert summary["openings"][1]["average_moves"] == 6.0
+    assert [opening["square"] for opening in summary["openings"]] == [[1, 1], [0, 0]]
+    assert json.loads(output.read_text())["progress"] == {
+        "matches": True,
+        "matches_archive": True,
+    }
+
+
+def test_collect_resumes_from_the_saved_progress(engine, tmp_path):
+    full = collect(engine, MatchStatistics(), tmp_path / "full.json", MagicMock())
+
+    interrupted = MatchStatistics()
+    chunks = read_table(engine, "matches", interrupted, MagicMock(), 1, 10)
+    next(chunks)
+    next(chunks)
+    chunks.close()
+    assert interrupted.rows == 2
+
+    output = tmp_path / "analytics.json"
+    output.write_text(json.dumps(interrupted.to_dict()))
+    resumed = MatchStatistics.from_dict(json.loads(output.read_text()))
+    collect(engine, resumed, output, MagicMock(), chunk_size=2, cursor_rows=10)
+
+    assert resumed.rows == full.rows == 5
+    assert resumed.outcomes == full.outcomes
+    assert resumed.openings == full.openings
+
+
+def test_main_writes_the_statistics(engine, tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("DATABASE_URL", str(engine.url))
+    output = tmp_path / "analytics.json"
+
+    assert analytics.main(["--output", str(output), "--chunk-size", "2"]) == 0
+
+    summary = json.loads(capsys.readouterr().out)
+    assert summary == json.loads(output.read_text())["summary"]
+    assert summary["3x3, 3 in a row"]["matches"] == 5
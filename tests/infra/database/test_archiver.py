@@ -0,0 +1,72 @@
+import asyncio
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import OperationalError
+
+from src.infra.database.archiver import ArchiveSettings, MatchArchiver
+from src.infra.repositories.match_statements import archive_matches_statement
+
+
+def make_archiver(rowcounts, **settings):
+    session = MagicMock()
+    session.execute = AsyncMock(
+        side_effect=lambda statement: MagicMock(rowcount=next(rowcounts))
+    )
+    session.commit = AsyncMock()
+    session_factory = MagicMock()
+    session_factory.return_value.__aenter__.return_value = session
+
+    return (
+        MatchArchiver(
+            session_factory,
+            MagicMock(),
+            ArchiveSettings(**{"batch_size": 2, "pause": 0, **settings}),
+        ),
+        session,
+    )
+
+
+def test_archive_statement_moves_the_finished_matches():
+    sql = str(
+        archive_matches_statement(100, timedelta(minutes=5)).compile(
+            dialect=postgresql.dialect()
+        )
+    )
+
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "DELETE FROM matches" in sql
+    assert "INSERT INTO matches_archive" in sql
+    assert "matches.status != 0" in sql
+    # With their moves
+    assert "DELETE FROM moves WHERE moves.match_id IN" in sql
+    assert "INSERT INTO moves_archive" in sql
+
+
+def test_archive_runs_batches_until_one_is_not_full():
+    # The lock timeout is set before each batch, so every other call returns 0
+    archiver, session = make_archiver(iter([0, 2, 0, 2, 0, 1]))
+
+    assert asyncio.run(archiver.archive()) == 5
+    assert session.commit.await_count == 3
+
+
+def test_run_keeps_going_after_errors():
+    archiver, session = make_archiver(iter([]), interval=0.001)
+    archiver.archive = AsyncMock(
+        side_effect=[OperationalError("", {}, Exception("lock timeout")), 3]
+    )
+
+    async def run():
+        task = asyncio.create_task(archiver.run())
+        while archiver.archive.await_count < 2:
+            await asyncio.sleep(0.001)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+
+    archiver.logger.warning.assert_called_once()
@@ -0,0 +1,138 @@
+import json
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.infra.database import transfer
+from src.infra.database.transfer import (
+    TABLES,
+    binary_to_hex,
+    export_statement,
+    export_table,
+    hex_to_binary,
+    import_table,
+)
+
+
+def fake_engine(copied: list[bytes]):
+    """Engine whose COPY TO STDOUT writes the `copied` chunks in turn and
+    whose COPY FROM STDIN records what it reads."""
+    cursor = MagicMock()
+    cursor.rowcount = 2
+    cursor.copied_in = []
+
+    def copy_expert(sql, file):
+        if "TO STDOUT" in sql:
+            file.write(copied.pop(0) if copied else b"")
+        else:
+            cursor.copied_in.append(file.read())
+
+    cursor.copy_expert.side_effect = copy_expert
+    engine = MagicMock()
+    engine.raw_connection.return_value.cursor.return_value = cursor
+
+    return engine, cursor
+
+
+def match_csv(match_id, board: str) -> bytes:
+    return (
+        f"{match_id},1,0,{board},3,3,5,"
+        + "2026-10-18 10:00:00.5,2026-10-18 10:01:00,,7\n"
+    ).encode()
+
+
+def test_hex_round_trip():
+    values = [b"\x00\x01\xab", b"", b"\xff" * 9]
+
+    hexed = binary_to_hex(pa.array(values, pa.binary()))
+
+    assert hexed.to_pylist() == ["0001ab", "", "ff" * 9]
+    assert hex_to_binary(hexed).to_pylist() == values
+    # Slices start at an offset of the buffers
+    assert hex_to_binary(hexed.slice(1)).to_pylist() == values[1:]
+
+
+def test_export_statement_pages_by_primary_key():
+    match_id = uuid4()
+    sql = transfer._sql(export_statement(TABLES["moves"], "ndjson", (match_id, 4), 100))
+
+    assert "json_build_object('match_id', moves.match_id" in sql
+    assert f"(moves.match_id, moves.seq) > ('{match_id}', 4)" in sql
+    assert "ORDER BY moves.match_id, moves.seq" in sql
+    assert "encode(matches.board, 'hex')" in transfer._sql(
+        export_statement(TABLES["matches"], "parquet", None, 100)
+    )
+
+
+def test_export_parquet_in_chunks(tmp_path):
+    first, second, third = sorted(str(uuid4()) for _ in range(3))
+    engine, cursor = fake_engine(
+        [match_csv(first, "0102") + match_csv(second, "0a0b"), match_csv(third, "ff00")]
+    )
+
+    assert (
+        export_table(
+            engine, TABLES["matches"], tmp_path, "parquet", MagicMock(), chunk_size=2
+        )
+        == 3
+    )
+
+    rows = pq.read_table(tmp_path / "matches.parquet").to_pylist()
+    assert [row["id"] for row in rows] == [first, second, third]
+    assert [row["board"] for row in rows] == [b"\x01\x02", b"\x0a\x0b", b"\xff\x00"]
+    assert rows[0]["computer"] is None and rows[0]["version"] == 7
+    # The second chunk starts after the last id of the first one
+    assert f"(matches.id) > ('{second}')" in cursor.copy_expert.call_args_list[1][0][0]
+    # Each chunk is its own transaction
+    assert engine.raw_connection.return_value.commit.call_count == 2
+
+
+def test_export_ndjson_writes_the_rows_as_copied(tmp_path):
+    first, second = str(uuid4()), str(uuid4())
+    lines = b"".join(
+        json.dumps({"id": match_id, "board": "0102"}).encode() + b"\n"
+        for match_id in (first, second)
+    )
+    engine, cursor = fake_engine([lines])
+
+    assert export_table(engine, TABLES["matches"], tmp_path, "ndjson", MagicMock()) == 2
+    assert (tmp_path / "matches.ndjson").read_bytes() == lines
+
+
+def test_import_parquet_copies_hex_boards(tmp_path):
+    match_id = str(uuid4())
+    engine, _ = fake_engine([match_csv(match_id, "0102"), b""])
+    export_table(engine, TABLES["matches"], tmp_path, "parquet", MagicMock())
+
+    engine, cursor = fake_engine([])
+    logger = MagicMock()
+    assert import_table(
+        engine, TABLES["matches"], tmp_path / "matches.parquet", logger, 10
+    ) == (1, 2)
+
+    [copied] = cursor.copied_in
+    assert copied.startswith(f'"{match_id}",1,0,"0102",3,3,5,'.encode())
+    statements = [call[0][0] for call in cursor.execute.call_args_list]
+    assert "ALTER TABLE import_matches ALTER COLUMN board TYPE text" in statements
+    assert any(
+        "decode(board, 'hex')" in sql and "ON CONFLICT DO NOTHING" in sql
+        for sql in statements
+    )
+    logger.info.assert_called_once()
+
+
+def test_import_ndjson_in_batches(tmp_path):
+    path = tmp_path / "moves.ndjson"
+    path.write_bytes(b'{"seq": 1}\n{"seq": 2}\n\n{"seq": 3, "note": "a\\\\b"}\n')
+    engine, cursor = fake_engine([])
+
+    assert import_table(engine, TABLES["moves"], path, MagicMock(), 2) == (3, 4)
+
+    assert cursor.copied_in == [
+        b'{"seq": 1}\n{"seq": 2}\n',
+        b'{"seq": 3, "note": "a\\\\\\\\b"}\n',
+    ]
+    # For the temporary table, each batch and dropping the table
+    assert engine.raw_connection.return_value.commit.call_count == 4
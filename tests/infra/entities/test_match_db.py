@@ -0,0 +1,76 @@
+from uuid import uuid4
+
+import pytest
+
+from src.domain.models.match import Match
+from src.domain.models.status import Status
+from src.infra.entities.match_db import MatchDB
+
+
+@pytest.fixture
+def match():
+    return Match(
+        id=uuid4(),
+        status=Status.WINNER,
+        turn="O",
+        board=[
+            ["X", "O", None],
+            [None, "X", "O"],
+            [None, None, "X"],
+        ],
+        move_count=5,
+        version=5,
+    )
+
+
+def test_board_to_bytes():
+    board = [["X", "O", None], [None, "X", "O"], [None, None, "X"]]
+
+    assert MatchDB.board_to_bytes(board) == bytes([0b00010001, 0x01, 0b00100010, 0x00])
+
+
+def test_gomoku_board_round_trip():
+    board: list[list[str | None]] = [[None] * 15 for _ in range(15)]
+    board[0][0] = "X"
+    board[7][7] = "O"
+    board[14][14] = "X"
+
+    data = MatchDB.board_to_bytes(board)
+
+    assert len(data) == 2 * 29
+    assert MatchDB.bytes_to_board(data, 15) == board
+
+
+def test_match_round_trip(match):
+    match_db = MatchDB.from_match(match)
+
+    assert match_db.status == 1
+    assert match_db.turn == 1
+    assert isinstance(match_db.board, bytes)
+
+    result = match_db.to_match()
+
+    assert result.id == match.id
+    assert result.status == match.status
+    assert result.turn == match.turn
+    assert result.board == match.board
+    assert result.move_count == match.move_count
+    assert result.version == match.version
+    assert result.computer is None
+
+
+def test_computer_round_trip(match):
+    match.computer = "O"
+
+    match_db = MatchDB.from_match(match)
+
+    assert match_db.computer == 1
+    assert match_db.to_match().computer == "O"
+
+
+def test_to_match_from_memoryview(match):
+    # psycopg2 returns bytea columns as memoryview
+    match_db = MatchDB.from_match(match)
+    match_db.board = memoryview(match_db.board)  # type: ignore[assignment]
+
+    assert match_db.to_match().board == match.board
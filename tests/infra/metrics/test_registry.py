@@ -0,0 +1,60 @@
+from src.infra.metrics.registry import (
+    CallbackMetric,
+    Counter,
+    Histogram,
+    Registry,
+)
+
+
+def test_counter_render():
+    counter = Counter("errors_total", "Errors", ("exception",))
+    counter.labels("TurnNotValidException").inc()
+    counter.labels("TurnNotValidException").inc(2)
+    counter.labels('Say "hi"\n').inc()
+
+    assert counter.render().splitlines() == [
+        "# HELP errors_total Errors",
+        "# TYPE errors_total counter",
+        'errors_total{exception="TurnNotValidException"} 3.0',
+        'errors_total{exception="Say \\"hi\\"\\n"} 1.0',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    assert histogram.render().splitlines()[2:] == [
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="1.0"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        "latency_seconds_sum 3.65",
+        "latency_seconds_count 4",
+    ]
+
+
+def test_labels_returns_the_same_child():
+    histogram = Histogram("latency_seconds", "Latency", ("route",))
+
+    assert histogram.labels("/move") is histogram.labels("/move")
+    assert histogram.labels("/move") is not histogram.labels("/create")
+
+
+def test_registry_renders_callback_metrics():
+    registry = Registry()
+    pools = {"async": 5}
+    registry.register(
+        CallbackMetric(
+            "pool_size",
+            "Pool size",
+            ("pool",),
+            lambda: (((name,), size) for name, size in pools.items()),
+        )
+    )
+
+    assert registry.render() == (
+        "# HELP pool_size Pool size\n"
+        "# TYPE pool_size gauge\n"
+        'pool_size{pool="async"} 5\n'
+    )
@@ -0,0 +1,41 @@
+import os
+
+from src.infra.metrics.workers import WorkerGauges
+
+
+def test_claimed_slots_are_read():
+    gauges = WorkerGauges(slots=4)
+    gauges.claim(2)
+    gauges.add("in_flight", 3)
+    gauges.add("in_flight", -1)
+
+    assert dict(gauges.read()) == {
+        2: {
+            "pid": os.getpid(),
+            "in_flight": 2,
+            "pool_size": 0,
+            "pool_checked_out": 0,
+            "pool_checked_in": 0,
+            "pool_overflow": 0,
+        }
+    }
+
+
+def test_claim_resets_the_slot():
+    gauges = WorkerGauges(slots=4)
+    gauges.claim(1)
+    gauges.add("in_flight", 5)
+
+    gauges.claim()
+
+    assert dict(gauges.read())[1]["in_flight"] == 0
+
+
+def test_released_slots_are_not_read():
+    gauges = WorkerGauges(slots=4)
+    gauges.claim(0)
+    gauges.claim(3)
+
+    gauges.release(0)
+
+    assert [slot for slot, _ in gauges.read()] == [3]
@@ -0,0 +1,148 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from src.domain.exception.errors import (
+    DatabaseGetMatchException,
+    DatabaseMatchNotFoundException,
+    DatabaseMoveConflictException,
+    DatabaseSaveMatchException,
+)
+from src.domain.models.match import Match
+from src.domain.models.status import Status
+from src.infra.entities.match_db import MatchDB
+from src.infra.repositories.async_postgresql_repository import (
+    AsyncPostgreSQLRepository,
+)
+
+
+@pytest.fixture
+def match():
+    return Match(
+        id=uuid4(),
+        status=Status.PLAYING,
+        turn="X",
+        board=[
+            [None, None, None],
+            [None, None, None],
+            [None, None, None],
+        ],
+    )
+
+
+@pytest.fixture
+def repository():
+    return AsyncPostgreSQLRepository(MagicMock(), session_factory=MagicMock())
+
+
+def get_session(repository):
+    return repository.SessionLocal.return_value.__aenter__.return_value
+
+
+def test_save_match_success(match, repository):
+    result = asyncio.run(repository.save_match(match))
+
+    assert result.id == match.id
+    get_session(repository).commit.assert_awaited_once()
+
+
+def test_save_match_failure(match, repository):
+    with patch.object(
+        repository, "SessionLocal", side_effect=SQLAlchemyError("DB error")
+    ):
+        with pytest.raises(DatabaseSaveMatchException):
+            asyncio.run(repository.save_match(match))
+
+
+def test_update_match_not_found(match, repository):
+    session = get_session(repository)
+    session.execute.return_value = MagicMock()
+    session.execute.return_value.one_or_none.return_value = None
+
+    with pytest.raises(DatabaseMatchNotFoundException):
+        asyncio.run(repository.update_match(match))
+
+
+def test_get_match_success(match, repository):
+    match_db = MagicMock()
+    match_db.to_match.return_value = match
+    session = get_session(repository)
+    session.execute.return_value = MagicMock()
+    session.execute.return_value.one_or_none.return_value = (match_db, None)
+
+    result = asyncio.run(repository.get_match(match.id))
+    assert result is match
+
+
+def test_get_match_not_found(repository):
+    session = get_session(repository)
+    session.execute.return_value = MagicMock()
+    session.execute.return_value.one_or_none.return_value = None
+
+    result = asyncio.run(repository.get_match(uuid4()))
+    assert result is None
+
+
+def test_get_match_failure(repository):
+    with patch.object(
+        repository, "SessionLocal", side_effect=SQLAlchemyError("DB error")
+    ):
+        with pytest.raises(DatabaseGetMatchException):
+            asyncio.run(repository.get_match(uuid4()))
+
+
+def play(match):
+    match.board[0][0] = match.turn
+    match.played += ((match.turn, 0, 0),)
+    match.move_count += 1
+    match.turn = "O"
+
+
+def test_apply_move_retries_on_conflict(match, repository):
+    session = get_session(repository)
+    read = MagicMock()
+    read.one_or_none.side_effect = lambda: (MatchDB.from_match(match), None)
+    session.execute.side_effect = [
+        read,
+        IntegrityError("INSERT INTO moves", {}, Exception("duplicate")),
+        read,
+        MagicMock(),
+    ]
+    apply = MagicMock(side_effect=play)
+
+    result = asyncio.run(repository.apply_move(match.id, apply))
+
+    assert result.version == match.version + 1
+    assert apply.call_count == 2
+    session.rollback.assert_awaited_once()
+    session.commit.assert_awaited_once()
+
+
+def test_apply_move_conflict(match, repository):
+    session = get_session(repository)
+    session.execute.return_value = MagicMock()
+    session.execute.return_value.one_or_none.side_effect = lambda: (
+        MatchDB.from_match(match),
+        None,
+    )
+    # Rewritten by someone else every time
+    session.execute.return_value.scalars.return_value.all.return_value = []
+
+    with pytest.raises(DatabaseMoveConflictException):
+        asyncio.run(repository.apply_move(match.id, MagicMock()))
+
+
+def test_get_match_falls_back_to_archive(match, repository):
+    match.status = Status.WINNER
+    session = get_session(repository)
+    session.execute.return_value = MagicMock()
+    session.execute.return_value.one_or_none.return_value = None
+    session.execute.return_value.scalars.return_value = [MatchDB.from_match(match)]
+
+    result = asyncio.run(repository.get_match(match.id))
+
+    assert result.id == match.id
+    assert session.execute.await_count == 2
@@ -0,0 +1,202 @@
+import asyncio
+import threading
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from src.domain.exception.errors import (
+    DatabaseMoveConflictException,
+    MatchAlreadyEndedException,
+)
+from src.domain.models.match import Match
+from src.domain.models.status import Status
+from src.infra.repositories.cached_repository import (
+    AsyncCachedMatchRepository,
+    CachedMatchRepository,
+    CacheSettings,
+    MatchCache,
+)
+
+
+def new_match(status: Status = Status.PLAYING) -> Match:
+    return Match(
+        id=uuid4(),
+        status=status,
+        turn="X",
+        board=[[None, None, None], [None, None, None], [None, None, None]],
+    )
+
+
+@pytest.fixture
+def cache():
+    return MatchCache(CacheSettings(size=2, ttl=5, finished_ttl=60))
+
+
+def test_cache_hit_and_miss(cache):
+    match = new_match()
+
+    assert cache.get(match.id) is None
+    cache.put(match)
+    assert cache.get(match.id).id == match.id
+
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.hit_ratio() == 0.5
+
+
+def test_cache_returns_copies(cache):
+    match = new_match()
+    cache.put(match)
+    match.board[0][0] = "X"
+
+    cached = cache.get(match.id)
+    cached.board[1][1] = "O"
+
+    assert cache.get(match.id).board[0][0] is None
+    assert cache.get(match.id).board[1][1] is None
+
+
+def test_cache_evicts_least_recently_used(cache):
+    first, second, third = new_match(), new_match(), new_match()
+    cache.put(first)
+    cache.put(second)
+    cache.get(first.id)
+
+    cache.put(third)
+
+    assert cache.get(second.id) is None
+    assert cache.get(first.id) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_ttl_depends_on_status(cache):
+    playing, finished = new_match(), new_match(Status.DRAW)
+
+    with patch("src.infra.repositories.cached_repository.time.monotonic") as now:
+        now.return_value = 100
+        cache.put(playing)
+        cache.put(finished)
+
+        now.return_value = 110
+
+        assert cache.get(playing.id) is None
+        assert cache.get(finished.id) is not None
+        assert cache.stats()["expirations"] == 1
+
+
+def test_cache_concurrent_access(cache):
+    matches = [new_match() for _ in range(50)]
+
+    def worker():
+        for match in matches:
+            cache.put(match)
+            cache.get(match.id)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.stats()["size"] == 2
+    assert cache.hits + cache.misses == 8 * 50
+
+
+def test_get_match_reads_through(cache):
+    match = new_match()
+    repository = MagicMock()
+    repository.get_match.return_value = match
+    cached_repository = CachedMatchRepository(repository, cache)
+
+    cached_repository.get_match(match.id)
+    result = cached_repository.get_match(match.id)
+
+    assert result.id == match.id
+    repository.get_match.assert_called_once_with(match.id)
+
+
+def test_save_match_writes_through(cache):
+    match = new_match()
+    repository = MagicMock()
+    repository.save_match.return_value = match
+    cached_repository = CachedMatchRepository(repository, cache)
+
+    cached_repository.save_match(match)
+
+    assert cached_repository.get_match(match.id).id == match.id
+    repository.get_match.assert_not_called()
+
+
+def test_apply_move_on_finished_match_skips_repository(cache):
+    match = new_match(Status.WINNER)
+    cache.put(match)
+    repository = MagicMock()
+    cached_repository = CachedMatchRepository(repository, cache)
+
+    def apply(match):
+        raise MatchAlreadyEndedException("")
+
+    with pytest.raises(MatchAlreadyEndedException):
+        cached_repository.apply_move(match.id, apply)
+
+    repository.apply_move.assert_not_called()
+
+
+def test_apply_move_conflict_invalidates(cache):
+    match = new_match()
+    cache.put(match)
+    repository = MagicMock()
+    repository.apply_move.side_effect = DatabaseMoveConflictException("")
+    cached_repository = CachedMatchRepository(repository, cache)
+
+    with pytest.raises(DatabaseMoveConflictException):
+        cached_repository.apply_move(match.id, MagicMock())
+
+    assert cache.get(match.id) is None
+
+
+def test_async_apply_move_writes_through(cache):
+    match = new_match()
+    moved = match.copy()
+    moved.turn = "O"
+    repository = AsyncMock()
+    repository.apply_move.return_value = moved
+    cached_repository = AsyncCachedMatchRepository(repository, cache)
+
+    asyncio.run(cached_repository.apply_move(match.id, MagicMock()))
+    result = asyncio.run(cached_repository.get_match(match.id))
+
+    assert result.turn == "O"
+    repository.get_match.assert_not_awaited()
+
+
+def test_cache_keeps_the_newer_version(cache):
+    match = new_match()
+    read = match.copy()
+    match.version = 1
+    cache.put(match)
+
+    # Read before the move was cached
+    cache.put(read)
+
+    assert cache.get(match.id).version == 1
+
+
+def test_cache_only_finished_matches_without_playing():
+    cache = MatchCache(CacheSettings(size=2, playing=False))
+    playing, finished = new_match(), new_match(Status.DRAW)
+
+    cache.put(playing)
+    cache.put(finished)
+
+    assert cache.get(playing.id) is None
+    assert cache.get(finished.id) is not None
+
+
+@pytest.mark.parametrize("workers, playing", [("", True), ("1", True), ("4", False)])
+def test_cache_playing_matches_default(monkeypatch, workers, playing):
+    monkeypatch.setenv("WEB_CONCURRENCY", workers)
+    monkeypatch.delenv("MATCH_CACHE_PLAYING", raising=False)
+
+    assert CacheSettings.from_env().playing is playing
@@ -0,0 +1,194 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import OperationalError
+
+from src.domain.exception.errors import (
+    IdempotencyKeyInProgressException,
+    IdempotencyKeyReusedException,
+)
+from src.infra.repositories.idempotency_store import (
+    MEMORY_STORE,
+    POSTGRESQL_STORE,
+    IdempotencySettings,
+    IdempotencyStore,
+    PostgreSQLKeys,
+    ResponseCache,
+    StoredResponse,
+)
+
+FINGERPRINT = b"request"
+
+
+def stored(fingerprint: bytes = FINGERPRINT) -> StoredResponse:
+    return StoredResponse(fingerprint, 200, "application/json", b'{"message": "ok"}')
+
+
+def new_store(keys=None, **settings) -> IdempotencyStore:
+    return IdempotencyStore(
+        IdempotencySettings(**{"poll_interval": 0, **settings}), MagicMock(), keys
+    )
+
+
+@pytest.mark.parametrize(
+    "concurrency, store",
+    [(None, MEMORY_STORE), ("1", MEMORY_STORE), ("4", POSTGRESQL_STORE)],
+)
+def test_keys_are_shared_by_default_with_several_workers(
+    monkeypatch, concurrency, store
+):
+    monkeypatch.delenv("IDEMPOTENCY_STORE", raising=False)
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    if concurrency is not None:
+        monkeypatch.setenv("WEB_CONCURRENCY", concurrency)
+
+    assert IdempotencySettings.from_env().store == store
+
+    monkeypatch.setenv("IDEMPOTENCY_STORE", MEMORY_STORE)
+    assert IdempotencySettings.from_env().store == MEMORY_STORE
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ResponseCache(IdempotencySettings(size=2))
+    cache.put("a", stored())
+    cache.put("b", stored())
+    cache.get("a")
+    cache.put("c", stored())
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+
+
+def test_cache_expires_responses():
+    cache = ResponseCache(IdempotencySettings(ttl=0))
+    cache.put("a", stored())
+
+    assert cache.get("a") is None
+    assert not cache.entries
+
+
+def test_completed_response_is_replayed():
+    store = new_store()
+
+    async def run():
+        assert await store.begin("key", FINGERPRINT) is None
+        await store.complete("key", stored())
+        return await store.begin("key", FINGERPRINT)
+
+    assert asyncio.run(run()) == stored()
+    assert not store.in_flight
+
+
+def test_key_reused_for_another_request():
+    store = new_store()
+
+    async def run():
+        await store.begin("key", FINGERPRINT)
+        with pytest.raises(IdempotencyKeyReusedException):
+            await store.begin("key", b"another request")
+        await store.complete("key", stored())
+        with pytest.raises(IdempotencyKeyReusedException):
+            await store.begin("key", b"another request")
+
+    asyncio.run(run())
+
+
+def test_retries_wait_for_the_request_in_flight():
+    store = new_store()
+
+    async def run():
+        assert await store.begin("key", FINGERPRINT) is None
+        retries = [
+            asyncio.create_task(store.begin("key", FINGERPRINT)) for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        assert not any(retry.done() for retry in retries)
+
+        await store.complete("key", stored())
+        return await asyncio.gather(*retries)
+
+    assert asyncio.run(run()) == [stored()] * 3
+
+
+def test_released_key_is_run_by_the_next_retry():
+    store = new_store()
+
+    async def run():
+        await store.begin("key", FINGERPRINT)
+        retry = asyncio.create_task(store.begin("key", FINGERPRINT))
+        await asyncio.sleep(0)
+        await store.release("key")
+        return await retry
+
+    assert asyncio.run(run()) is None
+    assert "key" in store.in_flight
+
+
+def test_retry_gives_up_waiting_after_the_lock_timeout():
+    store = new_store(lock_timeout=0.01)
+
+    async def run():
+        await store.begin("key", FINGERPRINT)
+        await store.begin("key", FINGERPRINT)
+
+    with pytest.raises(IdempotencyKeyInProgressException):
+        asyncio.run(run())
+
+
+def test_response_of_another_node_is_replayed():
+    keys = MagicMock()
+    keys.claim = AsyncMock(return_value=False)
+    keys.get = AsyncMock(
+        side_effect=[
+            # In flight on the other node first
+            MagicMock(fingerprint=FINGERPRINT, status_code=None),
+            MagicMock(
+                fingerprint=FINGERPRINT,
+                status_code=200,
+                content_type="application/json",
+                body=b'{"message": "ok"}',
+            ),
+        ]
+    )
+    store = new_store(keys)
+
+    assert asyncio.run(store.begin("key", FINGERPRINT)) == stored()
+    assert keys.claim.await_count == 2
+    assert store.cache.get("key") == stored()
+    assert not store.in_flight
+
+
+def test_key_claimed_in_the_database_is_completed_there():
+    keys = MagicMock()
+    keys.claim = AsyncMock(return_value=True)
+    keys.complete = AsyncMock(side_effect=OperationalError("", {}, Exception()))
+    store = new_store(keys)
+
+    async def run():
+        assert await store.begin("key", FINGERPRINT) is None
+        # A database error only loses the response for the other nodes
+        await store.complete("key", stored())
+
+    asyncio.run(run())
+
+    keys.complete.assert_awaited_once_with("key", stored())
+    assert store.cache.get("key") == stored()
+    assert not store.in_flight
+
+
+def test_claim_takes_over_expired_keys_only():
+    keys = PostgreSQLKeys(MagicMock(), IdempotencySettings())
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=MagicMock())
+    session.commit = AsyncMock()
+    keys.session_factory.return_value.__aenter__.return_value = session
+
+    asyncio.run(keys.claim("key", FINGERPRINT))
+
+    sql = str(session.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (key) DO UPDATE" in sql
+    assert "WHERE idempotency_keys.expires_at <= now()" in sql
+    assert "RETURNING idempotency_keys.key" in sql
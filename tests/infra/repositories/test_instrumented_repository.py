@@ -0,0 +1,62 @@
+import asyncio
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+import pytest
+
+from src.domain.models.match import Match
+from src.domain.models.status import Status
+from src.infra.repositories.async_in_memory_repository import (
+    AsyncInMemoryRepository,
+)
+from src.infra.repositories.in_memory_repository import InMemoryRepository
+from src.infra.repositories.instrumented_repository import (
+    AsyncInstrumentedMatchRepository,
+    InstrumentedMatchRepository,
+)
+
+
+@pytest.fixture
+def match():
+    return Match(
+        id=uuid4(),
+        status=Status.PLAYING,
+        turn="X",
+        board=[[None] * 3 for _ in range(3)],
+    )
+
+
+def test_times_each_operation(match):
+    repository = InstrumentedMatchRepository(InMemoryRepository(MagicMock()))
+    counts = {name: timer.count for name, timer in repository.timers.items()}
+
+    repository.save_match(match)
+    repository.get_match(match.id)
+    repository.get_match(uuid4())
+
+    assert repository.timers["save_match"].count == counts["save_match"] + 1
+    assert repository.timers["get_match"].count == counts["get_match"] + 2
+    assert repository.timers["update_match"].count == counts["update_match"]
+
+
+def test_times_failed_operations(match):
+    inner = MagicMock(spec=InMemoryRepository)
+    inner.update_match.side_effect = RuntimeError("DB error")
+    repository = InstrumentedMatchRepository(inner)
+    count = repository.timers["update_match"].count
+
+    with pytest.raises(RuntimeError):
+        repository.update_match(match)
+
+    assert repository.timers["update_match"].count == count + 1
+
+
+def test_async_times_each_operation(match):
+    repository = AsyncInstrumentedMatchRepository(AsyncInMemoryRepository(MagicMock()))
+    count = repository.timers["apply_move"].count
+
+    asyncio.run(repository.save_match(match))
+    moved = asyncio.run(repository.apply_move(match.id, lambda match: None))
+
+    assert moved.version == 1
+    assert repository.timers["apply_move"].count == count + 1
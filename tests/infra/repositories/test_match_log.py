@@ -0,0 +1,286 @@
+import asyncio
+import errno
+import os
+import threading
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from src.domain.exception.errors import (
+    DatabaseSaveMatchException,
+    DatabaseUpdateMatchException,
+)
+from src.domain.models.match import Match
+from src.domain.models.status import Status
+from src.infra.repositories import match_log
+from src.infra.repositories.match_log import (
+    SYNC_ASYNC,
+    DurabilitySettings,
+    MatchLog,
+    decode,
+    encode_delete,
+    encode_match,
+    lock_directory,
+    recover,
+    segment_path,
+    segments,
+    write_snapshot,
+)
+from src.infra.repositories.sharded_memory_repository import (
+    AsyncShardedInMemoryRepository,
+    MemorySettings,
+    ShardedInMemoryRepository,
+)
+
+
+def new_match(board_size: int = 3) -> Match:
+    return Match(
+        id=uuid4(),
+        status=Status.PLAYING,
+        turn="X",
+        board=[[None] * board_size for _ in range(board_size)],
+        board_size=board_size,
+    )
+
+
+def new_log(directory, next_segment: int = 0, **settings) -> MatchLog:
+    return MatchLog(
+        directory,
+        DurabilitySettings(directory=str(directory), **settings),
+        next_segment,
+        lock_directory(directory),
+    )
+
+
+def open_repository(directory, **settings) -> ShardedInMemoryRepository:
+    return ShardedInMemoryRepository.open(
+        MagicMock(),
+        MemorySettings(shards=4, capacity=100),
+        DurabilitySettings(directory=str(directory), **settings),
+    )
+
+
+def play(x: int, y: int):
+    def apply(match: Match) -> None:
+        match.board[x][y] = match.turn
+        match.turn = "O" if match.turn == "X" else "X"
+        match.move_count += 1
+
+    return apply
+
+
+def test_records_round_trip():
+    match = new_match(board_size=4)
+    match.board[3][2] = "O"
+    match.board[0][1] = "X"
+    match.move_count = 2
+    match.version = 7
+    match.computer = "O"
+
+    match_id, state = decode(encode_match(match, 10.5, 20.25))
+
+    assert match_id == match.id
+    decoded, created_at, updated_at = state
+    assert decoded.board == match.board
+    assert (decoded.board_size, decoded.move_count, decoded.version) == (4, 2, 7)
+    assert (decoded.turn, decoded.status, decoded.computer) == (
+        "X",
+        Status.PLAYING,
+        "O",
+    )
+    assert (created_at, updated_at) == (10.5, 20.25)
+    assert decode(encode_delete(match.id)) == (match.id, None)
+
+
+def test_recover_replays_the_log_after_the_snapshot(tmp_path):
+    kept, removed, moved = new_match(), new_match(), new_match()
+    write_snapshot(
+        tmp_path, [encode_match(match, 1.0, 1.0) for match in (kept, removed)], 3
+    )
+    # Covered by the snapshot, left by a crash before it was removed
+    segment_path(tmp_path, 2).write_bytes(b"")
+
+    log = new_log(tmp_path, next_segment=3)
+    moved.board[1][1] = "X"
+    log.wait(log.append([encode_delete(removed.id), encode_match(moved, 2.0, 3.0)]))
+    log.close()
+
+    matches, next_segment = recover(tmp_path)
+
+    assert set(matches) == {kept.id, moved.id}
+    assert matches[moved.id][0].board[1][1] == "X"
+    assert next_segment == 4
+    assert segments(tmp_path) == [3]
+
+
+def test_recover_cuts_off_a_torn_record(tmp_path):
+    first, second = new_match(), new_match()
+    log = new_log(tmp_path, sync=SYNC_ASYNC)
+    log.append([encode_match(first, 1.0, 1.0)])
+    log.append([encode_match(second, 1.0, 1.0)])
+    log.close()
+
+    path = segment_path(tmp_path, 0)
+    data = path.read_bytes()
+    path.write_bytes(data[:-3])
+
+    matches, _ = recover(tmp_path)
+
+    assert list(matches) == [first.id]
+    assert path.stat().st_size < len(data) - 3
+
+
+def test_callers_wait_for_the_fsync(tmp_path):
+    log = new_log(tmp_path, group_commit_ms=1.0)
+    positions = []
+
+    def append() -> None:
+        for _ in range(20):
+            position = log.append([encode_match(new_match(), 1.0, 1.0)])
+            log.wait(position)
+            assert log.durable >= position
+            positions.append(position)
+
+    threads = [threading.Thread(target=append) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    async def append_async() -> int:
+        position = log.append([encode_delete(uuid4())])
+        await log.wait_async(position)
+        return position
+
+    assert asyncio.run(append_async()) <= log.durable
+    # Appends made while syncing share the next fsync
+    assert log.syncs < len(positions) + 1
+    log.close()
+
+
+def test_short_writes_are_completed_or_cut_off(tmp_path):
+    first, second, third = new_match(), new_match(), new_match()
+    log = new_log(tmp_path)
+    log.wait(log.append([encode_match(first, 1.0, 1.0)]))
+    write = os.write
+    calls = []
+
+    def full_disk(fd, data):
+        calls.append(len(data))
+        if len(calls) == 1:
+            return write(fd, data[:10])
+        if len(calls) == 2:
+            raise OSError(errno.ENOSPC, "No space left on device")
+        return write(fd, data)
+
+    with patch.object(match_log.os, "write", side_effect=full_disk):
+        with pytest.raises(OSError):
+            log.append([encode_match(second, 1.0, 1.0)])
+        log.wait(log.append([encode_match(third, 1.0, 1.0)]))
+    log.close()
+
+    matches, _ = recover(tmp_path)
+
+    # The record after the cut off one is not lost with it
+    assert list(matches) == [first.id, third.id]
+
+
+def test_failed_fsync_fails_the_waiting_and_later_changes(tmp_path):
+    repository = open_repository(tmp_path)
+    match = repository.save_match(new_match())
+
+    with patch.object(
+        match_log.os, "fsync", side_effect=OSError(errno.EIO, "I/O error")
+    ):
+        with pytest.raises(DatabaseSaveMatchException):
+            repository.save_match(new_match())
+        repository.log.thread.join()
+
+    # Nothing reaches the log once it failed
+    with pytest.raises(DatabaseUpdateMatchException):
+        repository.apply_move(match.id, play(0, 0))
+    with pytest.raises(DatabaseSaveMatchException):
+        asyncio.run(AsyncShardedInMemoryRepository(repository).save_match(new_match()))
+    assert repository.get_match(match.id).move_count == 0
+    with pytest.raises(OSError):
+        repository.close()
+    assert repository.log.lock_file.closed
+
+
+def test_failed_fsync_fails_the_async_waiters(tmp_path):
+    log = new_log(tmp_path, group_commit_ms=50.0)
+
+    async def append_async() -> None:
+        await log.wait_async(log.append([encode_delete(uuid4())]))
+
+    with patch.object(
+        match_log.os, "fsync", side_effect=OSError(errno.EIO, "I/O error")
+    ):
+        with pytest.raises(OSError, match="Match log failed"):
+            asyncio.run(append_async())
+    log.close()
+
+
+def test_directory_is_used_by_one_process_at_a_time(tmp_path):
+    repository = open_repository(tmp_path)
+
+    with pytest.raises(RuntimeError):
+        open_repository(tmp_path)
+
+    repository.close()
+    open_repository(tmp_path).close()
+
+
+def test_matches_survive_a_crash(tmp_path):
+    repository = open_repository(tmp_path)
+    match = repository.save_match(new_match())
+    finished = repository.save_match(new_match())
+    repository.apply_move(match.id, play(0, 0))
+    repository.snapshot()
+    repository.apply_move(match.id, play(1, 1))
+    asyncio.run(
+        AsyncShardedInMemoryRepository(repository).apply_move(finished.id, play(2, 2))
+    )
+    # Stopped without the snapshot `close` takes, as if killed
+    repository.log.close()
+
+    recovered = open_repository(tmp_path)
+
+    stored = recovered.get_match(match.id)
+    assert stored.board[0][0] == "X" and stored.board[1][1] == "O"
+    assert (stored.move_count, stored.version) == (2, 2)
+    assert recovered.get_match(finished.id).board[2][2] == "X"
+    recovered.close()
+
+
+def test_evictions_are_logged(tmp_path):
+    repository = ShardedInMemoryRepository.open(
+        MagicMock(),
+        MemorySettings(shards=1, capacity=1),
+        DurabilitySettings(directory=str(tmp_path)),
+    )
+    first = new_match()
+    first.status = Status.DRAW
+    repository.save_match(first)
+    second = repository.save_match(new_match())
+    repository.log.close()
+
+    matches, _ = recover(tmp_path)
+
+    assert list(matches) == [second.id]
+
+
+def test_close_snapshots_and_removes_the_log(tmp_path):
+    repository = open_repository(tmp_path)
+    match = repository.save_match(new_match())
+    repository.close()
+
+    assert segments(tmp_path) == [1]
+    assert segment_path(tmp_path, 1).stat().st_size == 0
+    recovered = open_repository(tmp_path)
+    assert recovered.get_match(match.id) is not None
+
+    recovered.close()
+    with pytest.raises(DatabaseUpdateMatchException):
+        recovered.apply_move(match.id, play(0, 0))
@@ -1,16 +1,24 @@
+from datetime import datetime
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 from uuid import uuid4
 
 import pytest
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
 from src.domain.exception.errors import (
     DatabaseGetMatchException,
     DatabaseMatchNotFoundException,
+    DatabaseMoveConflictException,
     DatabaseSaveMatchException,
+    MatchAlreadyEndedException,
+    SquareNotAvailableException,
 )
 from src.domain.models.match import Match
+from src.domain.models.match_page import MatchQuery
 from src.domain.models.status import Status
+from src.infra.entities.match_db import MatchDB
+from src.infra.repositories.match_statements import SUMMARY_COLUMNS
 from src.infra.repositories.postgresql_repository import PostgreSQLRepository
 
 
@@ -54,26 +62,70 @@ def test_save_match_failure(match, repository):
             repository.save_match(match)
 
 
-def test_update_match_success(match, repository):
-    match_db_mock = MagicMock()
-    match_db_mock.to_match.return_value = match
+def test_save_matches_success(match, repository):
+    matches = [match, match.copy()]
+    with patch.object(repository, "SessionLocal") as mock_session:
+        session_instance = mock_session.return_value.__enter__.return_value
+
+        result = repository.save_matches(matches)
 
+        assert result == matches
+        rows = session_instance.execute.call_args.args[1]
+        assert [row["id"] for row in rows] == [m.id for m in matches]
+        session_instance.commit.assert_called_once()
+
+
+def test_save_matches_failure(match, repository):
     with patch.object(
-        repository, "SessionLocal", return_value=MagicMock()
-    ) as mock_session:
-        mock_session.execute.return_value.scalar_one_or_none.return_value = (
-            match_db_mock
+        repository, "SessionLocal", side_effect=SQLAlchemyError("DB error")
+    ):
+        with pytest.raises(DatabaseSaveMatchException):
+            repository.save_matches([match])
+
+
+def test_update_match_success(match, repository):
+    with patch.object(repository, "SessionLocal") as mock_session:
+        session_instance = mock_session.return_value.__enter__.return_value
+        session_instance.execute.return_value.one_or_none.return_value = (
+            MatchDB.from_match(match),
+            None,
         )
+        session_instance.execute.return_value.scalars.return_value.all.return_value = [
+            match.id
+        ]
 
         result = repository.update_match(match)
-        assert result is not None
+
+        assert result.version == 1
+        # Read, then the row is rewritten
+        assert session_instance.execute.call_count == 2
+        session_instance.commit.assert_called_once()
+
+
+@pytest.mark.parametrize("version, written", [(1, [uuid4()]), (0, [])])
+def test_update_match_conflict(match, repository, version, written):
+    stored = MatchDB.from_match(match)
+    match.version = version
+
+    with patch.object(repository, "SessionLocal") as mock_session:
+        session_instance = mock_session.return_value.__enter__.return_value
+        # A move stored after the match was read, or the row rewritten since
+        session_instance.execute.return_value.one_or_none.return_value = (stored, None)
+        session_instance.execute.return_value.scalars.return_value.all.return_value = (
+            written
+        )
+
+        with pytest.raises(DatabaseMoveConflictException):
+            repository.update_match(match)
+
+        session_instance.commit.assert_not_called()
 
 
 def test_update_match_not_found(match, repository):
     with patch.object(repository, "SessionLocal") as mock_session:
         # I needed help from chatGPT with this mock
         session_instance = mock_session.return_value.__enter__.return_value
-        session_instance.execute.return_value.scalar_one_or_none.return_value = None
+        session_instance.execute.return_value.one_or_none.return_value = None
 
         with pytest.raises(DatabaseMatchNotFoundException):
             repository.update_match(match)
@@ -83,10 +135,12 @@ def test_get_match_success(match, repository):
     match_db = MagicMock()
     match_db.to_match.return_value = match
 
-    with patch.object(
-        repository, "SessionLocal", return_value=MagicMock()
-    ) as mock_session:
-        mock_session.execute.return_value.scalar_one_or_none.return_value = match_db
+    with patch.object(repository, "SessionLocal") as mock_session:
+        session_instance = mock_session.return_value.__enter__.return_value
+        session_instance.execute.return_value.one_or_none.return_value = (
+            match_db,
+            None,
+        )
 
         result = repository.get_match(match.id)
         assert result is not None
@@ -98,7 +152,7 @@ def test_get_match_not_found(repository):
     with patch.object(repository, "SessionLocal") as mock_session:
         # I needed help from chatGPT with this mock
         session_instance = mock_session.return_value.__enter__.return_value
-        session_instance.execute.return_value.scalar_one_or_none.return_value = None
+        session_instance.execute.return_value.one_or_none.return_value = None
 
         result = repository.get_match(match_id)
         assert result is None
@@ -112,3 +166,210 @@ def test_get_match_failure(repository):
     ):
         with pytest.raises(DatabaseGetMatchException):
             repository.get_match(match_id)
+
+
+def test_get_match_replays_the_moves_after_the_snapshot(match, repository):
+    with patch.object(repository, "SessionLocal") as mock_session:
+        session_instance = mock_session.return_value.__enter__.return_value
+        session_instance.execute.return_value.one_or_none.return_value = (
+            MatchDB.from_match(match),
+            [4, 2],
+        )
+
+        result = repository.get_match(match.id)
+
+    assert result.board[1][1] == "X"
+    assert result.board[0][2] == "O"
+    assert (result.turn, result.move_count, result.version) == ("X", 2, 2)
+
+
+def play(match):
+    match.board[0][0] = match.turn
+    match.played += ((match.turn, 0, 0),)
+    match.move_count += 1
+    match.turn = "O"
+
+
+def test_apply_move_appends_the_move(match, repository):
+    with patch.object(repository, "SessionLocal") as mock_session:
+        session_instance = mock_session.return_value.__enter__.return_value
+        session_instance.execute.return_value.one_or_none.return_value = (
+            MatchDB.from_match(match),
+            None,
+        )
+
+        result = repository.apply_move(match.id, play)
+
+        assert result.board[0][0] == "X"
+        assert result.version == match.version + 1
+        assert result.played == ()
+        # The row is not rewritten, only the move is inserted
+        assert session_instance.execute.call_count == 2
+        assert session_instance.execute.call_args.args[1] == [
+            {"match_id": match.id, "seq": 1, "player": 0, "x": 0, "y": 0}
+        ]
+        session_instance.commit.assert_called_once()
+
+
+def test_apply_move_snapshots_finished_matches(match, repository):
+    def apply(match):
+        play(match)
+        match.status = Status.WINNER
+
+    with patch.object(repository, "SessionLocal") as mock_session:
+        session_instance = mock_session.return_value.__enter__.return_value
+        session_instance.execute.return_value.one_or_none.return_value = (
+            MatchDB.from_match(match),
+            None,
+        )
+        session_instance.execute.return_value.scalars.return_value.all.return_value = [
+            match.id
+        ]
+
+        result = repository.apply_move(match.id, apply)
+
+        assert result.status == Status.WINNER
+        assert session_instance.execute.call_count == 3
+        session_instance.commit.assert_called_once()
+
+
+def test_apply_move_conflict(match, repository):
+    def execute(statement, rows=None):
+        if rows is not None:
+            raise IntegrityError("INSERT INTO moves", rows, Exception("duplicate"))
+
+        return MagicMock(
+            one_or_none=MagicMock(return_value=(MatchDB.from_match(match), None))
+        )
+
+    with patch.object(repository, "SessionLocal") as mock_session:
+        session_instance = mock_session.return_value.__enter__.return_value
+        session_instance.execute.side_effect = execute
+
+        with pytest.raises(DatabaseMoveConflictException):
+            repository.apply_move(match.id, play)
+
+        assert session_instance.rollback.call_count == repository.MAX_MOVE_ATTEMPTS
+        session_instance.commit.assert_not_called()
+
+
+def test_apply_move_not_found(match, repository):
+    with patch.object(repository, "SessionLocal") as mock_session:
+        session_instance = mock_session.return_value.__enter__.return_value
+        session_instance.execute.return_value.one_or_none.return_value = None
+
+        assert repository.apply_move(match.id, MagicMock()) is None
+
+
+def test_apply_move_propagates_domain_errors(match, repository):
+    apply = MagicMock(side_effect=SquareNotAvailableException(""))
+
+    with patch.object(repository, "SessionLocal") as mock_session:
+        session_instance = mock_session.return_value.__enter__.return_value
+        session_instance.execute.return_value.one_or_none.return_value = (
+            MatchDB.from_match(match),
+            None,
+        )
+
+        with pytest.raises(SquareNotAvailableException):
+            repository.apply_move(match.id, apply)
+
+
+def test_apply_moves_only_updates_changed_matches(match, repository):
+    untouched = Match(
+        id=uuid4(), status=Status.PLAYING, turn="X", board=[[None] * 3] * 3
+    )
+
+    def apply(matches):
+        play(matches[match.id])
+
+    with patch.object(repository, "SessionLocal") as mock_session:
+        session_instance = mock_session.return_value.__enter__.return_value
+        session_instance.execute.return_value.tuples.return_value = [
+            (MatchDB.from_match(match), None),
+            (MatchDB.from_match(untouched), None),
+        ]
+
+        result = repository.apply_moves([match.id, untouched.id], apply)
+
+        assert result[match.id].version == match.version + 1
+        assert result[untouched.id].version == untouched.version
+        session_instance.commit.assert_called_once()
+
+
+def test_apply_moves_conflict(match, repository):
+    def apply(matches):
+        # Not played as a move, so the row is rewritten
+        matches[match.id].move_count += 1
+
+    with patch.object(repository, "SessionLocal") as mock_session:
+        session_instance = mock_session.return_value.__enter__.return_value
+        session_instance.execute.return_value.tuples.side_effect = lambda: [
+            (MatchDB.from_match(match), None)
+        ]
+        session_instance.execute.return_value.scalars.return_value.all.return_value = []
+
+        with pytest.raises(DatabaseMoveConflictException):
+            repository.apply_moves([match.id], apply)
+
+        assert session_instance.rollback.call_count == repository.MAX_MOVE_ATTEMPTS
+
+
+def test_get_match_falls_back_to_archive(match, repository):
+    match.status = Status.WINNER
+
+    with patch.object(repository, "SessionLocal") as mock_session:
+        session_instance = mock_session.return_value.__enter__.return_value
+        session_instance.execute.return_value.one_or_none.return_value = None
+        session_instance.execute.return_value.scalars.return_value = [
+            MatchDB.from_match(match)
+        ]
+
+        result = repository.get_match(match.id)
+
+        assert result.id == match.id
+        assert result.status == Status.WINNER
+
+
+def test_apply_move_rejects_archived_matches(match, repository):
+    match.status = Status.DRAW
+    apply = MagicMock(side_effect=MatchAlreadyEndedException(""))
+
+    with patch.object(repository, "SessionLocal") as mock_session:
+        session_instance = mock_session.return_value.__enter__.return_value
+        session_instance.execute.return_value.one_or_none.return_value = None
+        session_instance.execute.return_value.scalars.return_value = [
+            MatchDB.from_match(match)
+        ]
+
+        with pytest.raises(MatchAlreadyEndedException):
+            repository.apply_move(match.id, apply)
+
+        session_instance.commit.assert_not_called()
+
+
+def test_list_matches_decodes_the_rows(match, repository):
+    match_db = MatchDB.from_match(match)
+    now = datetime(2026, 10, 18, 18, 0)
+    columns = {name: getattr(match_db, name) for name in SUMMARY_COLUMNS}
+    columns.update(id=match.id, created_at=now, updated_at=now)
+    row = SimpleNamespace(**columns, _mapping=columns)
+
+    with patch.object(repository, "SessionLocal") as mock_session:
+        session_instance = mock_session.return_value.__enter__.return_value
+        session_instance.execute.return_value = [row]
+
+        result = repository.list_matches(MatchQuery())
+
+    assert [summary.id for summary in result] == [match.id]
+    assert result[0].status == Status.PLAYING
+    assert result[0].updated_at == now
+    assert result[0].board is None
+
+
+def test_list_matches_failure(repository):
+    with patch.object(
+        repository, "SessionLocal", side_effect=SQLAlchemyError("DB error")
+    ):
+        with pytest.raises(DatabaseGetMatchException):
+            repository.list_matches(MatchQuery())
@@ -0,0 +1,190 @@
+import threading
+import time
+from datetime import timedelta
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+import pytest
+
+from src.domain.exception.errors import (
+    DatabaseSaveMatchException,
+    SquareNotAvailableException,
+)
+from src.domain.models.match import Match
+from src.domain.models.match_page import MatchQuery
+from src.domain.models.status import Status
+from src.infra.repositories.sharded_memory_repository import (
+    MemorySettings,
+    ShardedInMemoryRepository,
+)
+
+
+def new_match(status: Status = Status.PLAYING) -> Match:
+    return Match(
+        id=uuid4(),
+        status=status,
+        turn="X",
+        board=[[None, None, None], [None, None, None], [None, None, None]],
+    )
+
+
+def new_repository(**settings) -> ShardedInMemoryRepository:
+    return ShardedInMemoryRepository(MagicMock(), MemorySettings(**settings))
+
+
+def test_stored_matches_are_copies():
+    repository = new_repository()
+    match = repository.save_match(new_match())
+
+    match.board[0][0] = "X"
+    read = repository.get_match(match.id)
+    assert read is not None
+    read.board[1][1] = "O"
+
+    assert repository.get_match(match.id).board[0][0] is None
+    assert repository.get_match(match.id).board[1][1] is None
+
+
+def test_failed_move_leaves_the_match_untouched():
+    repository = new_repository()
+    match = repository.save_match(new_match())
+
+    def apply(stored: Match) -> None:
+        stored.board[0][0] = "X"
+        raise SquareNotAvailableException("Square already taken")
+
+    with pytest.raises(SquareNotAvailableException):
+        repository.apply_move(match.id, apply)
+
+    stored = repository.get_match(match.id)
+    assert stored.board[0][0] is None
+    assert stored.version == 0
+
+
+def test_apply_move_on_missing_match():
+    assert new_repository().apply_move(uuid4(), MagicMock()) is None
+
+
+def test_moves_on_a_match_are_serialized_and_never_seen_half_applied():
+    repository = new_repository(shards=4)
+    match = repository.save_match(new_match())
+    torn_reads = []
+    running = True
+
+    def apply(stored: Match) -> None:
+        stored.move_count += 1
+        # Lets the other threads run in the middle of the move
+        time.sleep(0)
+        stored.board[0][0] = str(stored.move_count)
+
+    def play() -> None:
+        for _ in range(100):
+            repository.apply_move(match.id, apply)
+
+    def read() -> None:
+        while running:
+            stored = repository.get_match(match.id)
+            if stored.move_count and stored.board[0][0] != str(stored.move_count):
+                torn_reads.append(stored)
+            time.sleep(0)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    players = [threading.Thread(target=play) for _ in range(8)]
+    for player in players:
+        player.start()
+    for player in players:
+        player.join()
+    running = False
+    reader.join()
+
+    stored = repository.get_match(match.id)
+    assert stored.move_count == stored.version == 800
+    assert not torn_reads
+
+
+def test_finished_matches_are_evicted_first():
+    repository = new_repository(shards=1, capacity=2)
+    finished = repository.save_match(new_match(Status.WINNER))
+    playing = repository.save_match(new_match())
+
+    repository.save_match(new_match())
+
+    assert repository.get_match(finished.id) is None
+    assert repository.get_match(playing.id) is not None
+    assert repository.evictions() == 1
+
+
+def test_idle_matches_are_evicted_when_no_match_is_finished():
+    repository = new_repository(shards=1, capacity=2, idle_ttl=0)
+    oldest = repository.save_match(new_match())
+    newest = repository.save_match(new_match())
+
+    repository.save_match(new_match())
+
+    assert repository.get_match(oldest.id) is None
+    assert repository.get_match(newest.id) is not None
+
+
+def test_full_repository_refuses_new_matches():
+    repository = new_repository(shards=1, capacity=2)
+    repository.save_matches([new_match(), new_match()])
+
+    with pytest.raises(DatabaseSaveMatchException):
+        repository.save_matches([new_match(Status.WINNER)])
+
+    assert repository.count() == 2
+    # Existing matches can still be updated
+    match = new_match()
+    match.id = next(iter(repository.shards[0].playing))
+    repository.update_match(match)
+
+
+def test_apply_moves_only_updates_changed_matches():
+    repository = new_repository()
+    played, untouched = new_match(), new_match()
+    repository.save_matches([played, untouched])
+
+    def apply(matches: dict) -> None:
+        matches[played.id].move_count += 1
+
+    matches = repository.apply_moves([played.id, untouched.id, uuid4()], apply)
+
+    assert set(matches) == {played.id, untouched.id}
+    assert repository.get_match(played.id).version == 1
+    assert repository.get_match(untouched.id).version == 0
+
+
+def test_failed_batch_leaves_every_match_untouched():
+    repository = new_repository()
+    first, second = new_match(), new_match()
+    repository.save_matches([first, second])
+
+    def apply(matches: dict) -> None:
+        matches[first.id].move_count += 1
+        raise RuntimeError("Boom")
+
+    with pytest.raises(RuntimeError):
+        repository.apply_moves([first.id, second.id], apply)
+
+    assert repository.get_match(first.id).move_count == 0
+
+
+def test_list_matches_newest_first():
+    repository = new_repository()
+    older, newer = new_match(), new_match(Status.DRAW)
+    repository.save_match(older)
+    repository.save_match(newer)
+
+    listed = repository.list_matches(MatchQuery())
+    assert [summary.id for summary in listed] == [newer.id, older.id]
+
+    (draw,) = repository.list_matches(MatchQuery(status=Status.DRAW))
+    assert draw.id == newer.id
+    assert draw.board is None
+
+    after = listed[0].key("updated_at")
+    assert [s.id for s in repository.list_matches(MatchQuery(after=after))] == [
+        older.id
+    ]
+    assert listed[0].updated_at - listed[1].updated_at >= timedelta(0)
@@ -0,0 +1,134 @@
+import logging
+import queue
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from src.logging.logging_service import (
+    DeferredQueueHandler,
+    LoggingService,
+    LoggingSettings,
+    MessageSampler,
+    StructuredFormatter,
+)
+
+
+class CountingStr:
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return "counted"
+
+
+@pytest.fixture
+def service():
+    service = LoggingService(LoggingSettings())
+    level = service.logger.level
+    yield service
+    service.logger.setLevel(level)
+
+
+def test_info_with_args_and_fields(service):
+    with patch.object(service.logger, "handle") as handle:
+        service.info("Match %s created", "abc", board_size=3)
+
+    record = handle.call_args.args[0]
+    assert record.getMessage() == "Match abc created"
+    assert record.fields == {"board_size": 3}
+
+
+def test_filtered_messages_are_not_formatted(service):
+    service.logger.setLevel(logging.WARNING)
+    argument = CountingStr()
+
+    with patch.object(service.logger, "handle") as handle:
+        service.info("Match:\n%s", argument)
+        service.debug("Match:\n%s", argument)
+
+    handle.assert_not_called()
+    assert argument.calls == 0
+
+
+def test_sampling_per_message_template():
+    sampler = MessageSampler(0.25)
+
+    kept = [sampler.keep("Movement performed") for _ in range(9)]
+
+    assert kept == [True, False, False, False, True, False, False, False, True]
+    assert sampler.keep("Match created")
+
+
+@pytest.mark.parametrize("rate, expected", [(1.0, True), (0.0, False)])
+def test_sampling_bounds(rate, expected):
+    sampler = MessageSampler(rate)
+
+    assert all(sampler.keep("Movement performed") == expected for _ in range(3))
+
+
+def test_sampled_service_info(service):
+    service.sampler = MessageSampler(0.5)
+
+    with patch.object(service.logger, "handle") as handle:
+        for _ in range(4):
+            service.info("Movement performed")
+        service.warning("Concurrent update on match")
+
+    assert handle.call_count == 3
+
+
+def test_structured_formatter():
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "Saved", None, None)
+    record.fields = {"match_id": "abc", "count": 2}
+
+    message = StructuredFormatter("%(levelname)s - %(message)s").format(record)
+
+    assert message == "INFO - Saved match_id=abc count=2"
+
+
+def test_deferred_queue_handler_renders_the_message_on_emit():
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    board = [["X", None]]
+    record = logging.LogRecord(
+        "test", logging.INFO, __file__, 1, "Board: %s", (board,), None
+    )
+
+    DeferredQueueHandler(records).emit(record)
+    board[0][1] = "O"
+
+    queued = records.get_nowait()
+    assert queued.msg == "Board: [['X', None]]"
+    assert queued.args is None
+
+
+def test_forked_children_write_their_records():
+    # The parent sets up logging before forking, as gunicorn's preloaded app
+    script = """
+import os
+import sys
+
+from src.logging.logging_service import LoggingService
+
+LoggingService().info("Parent ready")
+pid = os.fork()
+if pid == 0:
+    LoggingService().info("Logged by the child", pid=os.getpid())
+    sys.exit(0)
+os.waitpid(pid, 0)
+"""
+
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=Path(__file__).parents[2],
+        capture_output=True,
+        text=True,
+        timeout=30,
+        check=True,
+    )
+
+    assert "Parent ready" in result.stderr
+    assert "Logged by the child pid=" in result.stderr
@@ -0,0 +1,75 @@
+import os
+import runpy
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+ROOT = Path(__file__).parents[1]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.mark.parametrize(
+    "repository, workers, max_requests",
+    [("memory", 1, 0), ("postgresql", 8, 100_000)],
+)
+def test_workers_default(monkeypatch, repository, workers, max_requests):
+    monkeypatch.setattr("multiprocessing.cpu_count", lambda: 8)
+    monkeypatch.setenv("MATCH_REPOSITORY", repository)
+    monkeypatch.delenv("MAX_REQUESTS", raising=False)
+    # Recorded first, so the value set by the config is undone
+    monkeypatch.setenv("WEB_CONCURRENCY", "")
+    monkeypatch.delenv("WEB_CONCURRENCY")
+
+    config = runpy.run_path(str(ROOT / "gunicorn.conf.py"))
+
+    assert config["workers"] == workers
+    # Replacing the only worker of the memory repository loses its matches
+    assert config["max_requests"] == max_requests
+    assert config["max_requests_jitter"] == max_requests // 10
+    # Read by the workers
+    assert os.environ["WEB_CONCURRENCY"] == str(workers)
+
+
+def test_preloaded_workers_write_the_app_logs():
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "main:app", "-c", "gunicorn.conf.py"],
+        cwd=ROOT,
+        env={
+            **os.environ,
+            "BIND": f"127.0.0.1:{port}",
+            "WEB_CONCURRENCY": "1",
+            "MATCH_REPOSITORY": "memory",
+            "MEMORY_DATA_DIR": "",
+        },
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                response = httpx.get(f"http://127.0.0.1:{port}/create")
+                break
+            except httpx.TransportError:
+                assert time.monotonic() < deadline, "gunicorn did not start"
+                time.sleep(0.1)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        _, stderr = server.communicate(timeout=30)
+
+    assert response.status_code == 200
+    # Logged by the worker, forked once the app was imported by the master
+    assert "Create match request received" in stderr
+    assert f"Match created match_id={response.json()['matchId']}" in stderr